@@ -1,4 +1,3 @@
-import pygame
 import os
 
 # Window settings
@@ -6,6 +5,13 @@ WINDOW_WIDTH = 800
 WINDOW_HEIGHT = 600
 FPS = 60
 
+# Scenes draw into a WINDOW_WIDTH x WINDOW_HEIGHT framebuffer that is upscaled
+# once per frame: 'native' (no scaling), 'scaled' (GPU, nearest neighbour, fit
+# to the desktop) or 'integer' (software, by DISPLAY_SCALE). Vsync needs 'scaled'.
+DISPLAY_MODE = 'native'
+DISPLAY_SCALE = 2
+DISPLAY_VSYNC = False
+
 # Colors
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -27,30 +33,77 @@ SOUNDS_DIR = os.path.join(ASSETS_DIR, "sounds")
 FONTS_DIR = os.path.join(ASSETS_DIR, "fonts")
 DATA_DIR = os.path.join(PROJECT_ROOT, "data")
 POKEDEX_DIR = os.path.join(DATA_DIR, "pokedex")
+# Party size, last played time and fingerprint of every save, rebuilt from the saves if missing
+PROFILE_INDEX_FILE = os.path.join(DATA_DIR, "profiles.json")
 
 # Battle paths
 BATTLE_IMAGES_DIR = os.path.join(IMAGES_DIR, "battle")
 BATTLE_ATTACKS_DIR = os.path.join(BATTLE_IMAGES_DIR, "animation")
 
-# Required directory structure
+# Baked asset caches
+ASSET_CACHE_DIR = os.path.join(ASSETS_DIR, "cache")
+ATTACK_FRAMES_CACHE = os.path.join(ASSET_CACHE_DIR, "attack_frames.bin")
+ATTACK_TYPES = ['normal', 'fire', 'water', 'electric']
+ATTACK_FRAME_SIZE = 70
+# Every runtime asset pre-decoded into one memory mapped file, baked with `python -m data.asset_bundle`
+ASSET_BUNDLE = os.path.join(ASSET_CACHE_DIR, "assets.bundle")
+ASSET_BUNDLE_SOURCES = [ASSETS_DIR, os.path.join(DATA_DIR, 'sprites')]
+# Sound effects decoded to the mixer's sample format, rewritten when a source or the mixer settings change
+SOUND_CACHE = os.path.join(ASSET_CACHE_DIR, "sounds.pcm")
+
+# Directories the game writes to, created on startup by ensure_directories()
 REQUIRED_DIRS = [
     os.path.join(DATA_DIR, 'sprites'),
-    os.path.join(DATA_DIR, 'pokedex'),
-    os.path.join(IMAGES_DIR, 'battle', 'states'),
-    os.path.join(IMAGES_DIR, 'battle', 'sounds'),
-    os.path.join(IMAGES_DIR, 'battle', 'animation'),
-    os.path.join(SOUNDS_DIR, 'menu'),
-    os.path.join(SOUNDS_DIR, 'battle'),
-    os.path.join(SOUNDS_DIR, 'attacks'),
+    POKEDEX_DIR,
+    ASSET_CACHE_DIR,
 ]
 
-# Create all required directories
-for directory in REQUIRED_DIRS:
-    os.makedirs(directory, exist_ok=True)
+def ensure_directories():
+    for directory in REQUIRED_DIRS:
+        os.makedirs(directory, exist_ok=True)
 
 # API
 POKEAPI_BASE_URL = "https://pokeapi.co/api/v2"
 
 # Game settings
 INITIAL_POKEMON_COUNT = 30
-MAX_PLAYER_POKEMON = 3 
\ No newline at end of file
+MAX_PLAYER_POKEMON = 3
+# Recent profiles listed on the Continue name entry screen
+PROFILE_PICKER_SIZE = 4
+
+# Enemy AI difficulty: 'easy', 'normal', 'hard' or 'expert'
+ENEMY_AI_DIFFICULTY = 'normal'
+
+# Battle animation speed multiplier, and the multiplier while fast-forwarding
+BATTLE_ANIMATION_SPEED = 1.0
+BATTLE_FAST_FORWARD = 4.0
+
+# Record a binary replay of every battle to REPLAY_DIR
+RECORD_REPLAYS = False
+REPLAY_DIR = os.path.join(DATA_DIR, "replays")
+
+# Audio, set to False to run with the silent backend
+SOUND_ENABLED = True
+MUSIC_FADE_MS = 500
+
+# Logging level per subsystem, 'default' covers the others. None disables
+# logging entirely. POKEMON_LOG="battle=DEBUG,ai=INFO" overrides it at runtime.
+LOG_LEVELS = {'default': 'WARNING'}
+# Optional JSON lines log file, e.g. os.path.join(PROJECT_ROOT, "game.log.jsonl")
+LOG_FILE = None
+# At most this many repeats of the same message per interval in seconds
+LOG_RATE_LIMIT = 5
+LOG_RATE_INTERVAL = 10.0
+
+# Memory instrumentation: surface and sound bytes per subsystem and tracemalloc
+# diffs logged on scene changes (at INFO for 'memory'), with a warning when
+# memory grows past the limit over MEMORY_GROWTH_BATTLES battles
+MEMORY_TRACKING = False
+MEMORY_GROWTH_BATTLES = 5
+MEMORY_GROWTH_LIMIT_MB = 8
+
+# Headless battle server (tools/battle_server.py), on TCP or a Unix socket path
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+SERVER_AI_DIFFICULTY = 'easy'
+SERVER_MAX_LINE = 64 * 1024
@@ -1,30 +1,74 @@
-import requests
 import json
 import os
 from config import POKEAPI_BASE_URL, DATA_DIR
+from data.move_db import AILMENT_STATES, MOVES_FILE
+
+# Seconds to wait on PokeAPI, moves.json may be fetched in the background
+REQUEST_TIMEOUT = 10
 
 def fetch_pokemon_data(pokemon_id):
     """Fetch Pokemon data from PokeAPI"""
+    import requests  # Only needed when downloading, keeps offline startup fast
     url = f"{POKEAPI_BASE_URL}/pokemon/{pokemon_id}"
-    response = requests.get(url)
+    response = requests.get(url, timeout=REQUEST_TIMEOUT)
     if response.status_code == 200:
         return response.json()
     return None
 
 def fetch_pokemon_species(pokemon_id):
     """Fetch Pokemon species data for evolution info"""
+    import requests
     url = f"{POKEAPI_BASE_URL}/pokemon-species/{pokemon_id}"
-    response = requests.get(url)
+    response = requests.get(url, timeout=REQUEST_TIMEOUT)
     if response.status_code == 200:
         return response.json()
     return None
 
+def fetch_move_data(move_name):
+    """Fetch move data (type, power, accuracy, ailment) from PokeAPI"""
+    import requests
+    url = f"{POKEAPI_BASE_URL}/move/{move_name}"
+    response = requests.get(url, timeout=REQUEST_TIMEOUT)
+    if response.status_code == 200:
+        data = response.json()
+        meta = data.get('meta') or {}
+        ailment = AILMENT_STATES.get((meta.get('ailment') or {}).get('name'))
+        ailment_chance = meta.get('ailment_chance', 0) / 100
+        # Status moves report a 0% chance when the ailment always applies
+        if ailment and not ailment_chance and data['damage_class']['name'] == 'status':
+            ailment_chance = 1.0
+        return {
+            'name': data['name'],
+            'type': data['type']['name'],
+            'power': data.get('power'),
+            'accuracy': data.get('accuracy'),
+            'ailment': ailment,
+            'ailment_chance': ailment_chance if ailment else 0.0
+        }
+    return None
+
+def trim_sprite(full_path):
+    """Crop a sprite file to its opaque pixels, returns the crop's offset and the original size"""
+    import pygame
+    image = pygame.image.load(full_path)
+    bounds = image.get_bounding_rect()
+    # An alpha surface keeps the transparency the palette's colour key had
+    trimmed = pygame.Surface(bounds.size, pygame.SRCALPHA)
+    trimmed.blit(image, (0, 0), bounds)
+    pygame.image.save(trimmed, full_path)
+    return [bounds.x, bounds.y], list(image.get_size())
+
 def download_pokemon_sprite(pokemon_id):
-    """Download Pokemon sprite and save it"""
+    """Download Pokemon sprite, trim it and save it
+
+    Returns the sprite fields of the species data: the relative path, and
+    where the trimmed sprite sits in the original frame.
+    """
     pokemon_data = fetch_pokemon_data(pokemon_id)
     if pokemon_data:
+        import requests
         sprite_url = pokemon_data['sprites']['front_default']
-        response = requests.get(sprite_url)
+        response = requests.get(sprite_url, timeout=REQUEST_TIMEOUT)
         if response.status_code == 200:
             # Store only the relative path from data directory
             sprite_path = os.path.join('sprites', f'{pokemon_id}.png')  # Use os.path.join for cross-platform
@@ -32,8 +76,9 @@ def download_pokemon_sprite(pokemon_id):
             os.makedirs(os.path.dirname(full_path), exist_ok=True)
             with open(full_path, 'wb') as f:
                 f.write(response.content)
-            return sprite_path  # Return relative path only
-    return None
+            anchor, frame = trim_sprite(full_path)
+            return {'sprite_path': sprite_path, 'sprite_anchor': anchor, 'sprite_frame': frame}
+    return {'sprite_path': None}
 
 def initialize_pokemon_database(count=30):
     """Initialize the Pokemon database with the first 'count' Pokemon"""
@@ -62,11 +107,36 @@ def initialize_pokemon_database(count=30):
                     'speed': pokemon_data['stats'][5]['base_stat']
                 },
                 'moves': [move['move']['name'] for move in pokemon_data['moves'][:4]],
-                'sprite_path': download_pokemon_sprite(i),
                 'evolution_level': evolution_level
             }
+            pokemon.update(download_pokemon_sprite(i))
             pokemon_list.append(pokemon)
     
-    # Save to pokemons.json
     with open(os.path.join(DATA_DIR, 'pokemons.json'), 'w') as f:
-        json.dump(pokemon_list, f, indent=4) 
\ No newline at end of file
+        json.dump(pokemon_list, f, indent=4)
+    initialize_move_database(pokemon_list)
+
+def initialize_move_database(pokemon_list):
+    """Fetch data for every move the given Pokemon learn and save it to moves.json
+
+    Returns the move records, or None without writing anything when a move
+    could not be fetched, so an incomplete file never stops the next try.
+    """
+    move_names = []
+    for pokemon in pokemon_list:
+        for move_name in pokemon['moves']:
+            if move_name not in move_names:
+                move_names.append(move_name)
+    
+    move_list = []
+    for move_name in move_names:
+        move_data = fetch_move_data(move_name)
+        if not move_data:
+            return None
+        move_list.append(move_data)
+    
+    temporary_path = MOVES_FILE + '.tmp'
+    with open(temporary_path, 'w') as f:
+        json.dump(move_list, f, indent=4)
+    os.replace(temporary_path, MOVES_FILE)
+    return move_list
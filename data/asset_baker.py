@@ -0,0 +1,116 @@
+import os
+import struct
+from config import (ATTACK_FRAMES_CACHE, ATTACK_FRAME_SIZE, ATTACK_TYPES,
+                    BATTLE_ATTACKS_DIR)
+from models.log import get_logger
+
+log = get_logger('assets')
+
+ATTACK_FRAMES_MAGIC = b'PKAF'
+ATTACK_FRAMES_VERSION = 1
+HEADER_FORMAT = '<4sHHHH'
+ENTRY_FORMAT = '<HQQ'
+
+
+def source_signature(path):
+    """Size and modification time of a source asset, used to detect stale caches"""
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def decode_gif_frames(path, size):
+    """Decode every frame of a GIF into RGBA bytes scaled to size x size"""
+    from PIL import Image
+
+    frames = []
+    with Image.open(path) as gif:
+        for frame_idx in range(gif.n_frames):
+            gif.seek(frame_idx)
+            frame = gif.convert('RGBA').resize((size, size), Image.NEAREST)
+            frames.append(frame.tobytes())
+    return frames
+
+
+def bake_attack_frames(output_path=ATTACK_FRAMES_CACHE, size=ATTACK_FRAME_SIZE):
+    """Decode the attack animation GIFs into one pre-scaled RGBA frame strip file"""
+    entries = []
+    for attack_type in ATTACK_TYPES:
+        gif_path = os.path.join(BATTLE_ATTACKS_DIR, f'{attack_type}.gif')
+        # A GIF that fails to decode keeps its signature so it is not retried on every start
+        try:
+            signature = source_signature(gif_path)
+        except OSError:
+            signature = (0, 0)
+        try:
+            frames = decode_gif_frames(gif_path, size)
+        except (OSError, ValueError) as e:
+            log.error("Error loading %s.gif: %s", attack_type, e)
+            frames = []
+        entries.append((attack_type, frames, signature))
+
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    # Written aside and swapped in, an interrupted bake leaves no half written cache
+    temporary_path = output_path + '.tmp'
+    with open(temporary_path, 'wb') as f:
+        f.write(struct.pack(HEADER_FORMAT, ATTACK_FRAMES_MAGIC, ATTACK_FRAMES_VERSION,
+                            size, size, len(entries)))
+        for attack_type, frames, (source_size, source_mtime) in entries:
+            name = attack_type.encode()
+            f.write(struct.pack('<B', len(name)) + name)
+            f.write(struct.pack(ENTRY_FORMAT, len(frames), source_size, source_mtime))
+        for _, frames, _ in entries:
+            for frame in frames:
+                f.write(frame)
+    os.replace(temporary_path, output_path)
+    return output_path
+
+
+def read_attack_frames(path=ATTACK_FRAMES_CACHE):
+    """Read a baked attack frame cache
+
+    Returns (size, {attack_type: (frame_bytes_list, source_signature)}),
+    or None if the file is missing, truncated or in an older format.
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+
+    header_size = struct.calcsize(HEADER_FORMAT)
+    try:
+        magic, version, width, height, count = struct.unpack_from(HEADER_FORMAT, data)
+        if magic != ATTACK_FRAMES_MAGIC or version != ATTACK_FRAMES_VERSION:
+            return None
+
+        offset = header_size
+        index = []
+        for _ in range(count):
+            name_length = data[offset]
+            name = data[offset + 1:offset + 1 + name_length].decode()
+            offset += 1 + name_length
+            frame_count, source_size, source_mtime = struct.unpack_from(ENTRY_FORMAT, data, offset)
+            offset += struct.calcsize(ENTRY_FORMAT)
+            index.append((name, frame_count, (source_size, source_mtime)))
+    except (struct.error, IndexError, UnicodeDecodeError):
+        log.warning("%s is corrupt, baking it again", path)
+        return None
+
+    frame_bytes = width * height * 4
+    if offset + sum(frame_count for _, frame_count, _ in index) * frame_bytes > len(data):
+        log.warning("%s is truncated, baking it again", path)
+        return None
+    view = memoryview(data)
+    animations = {}
+    for name, frame_count, signature in index:
+        frames = []
+        for _ in range(frame_count):
+            frames.append(view[offset:offset + frame_bytes])
+            offset += frame_bytes
+        animations[name] = (frames, signature)
+    return width, animations
+
+
+# Run with `python -m data.asset_baker` after changing the source assets
+if __name__ == '__main__':
+    print(f"Baked attack frames to {bake_attack_frames()}")
@@ -0,0 +1,242 @@
+import hashlib
+import io
+import json
+import mmap
+import os
+import struct
+from config import (ASSET_BUNDLE, ASSET_BUNDLE_SOURCES, ASSET_CACHE_DIR, ATTACK_FRAME_SIZE,
+                    BATTLE_ATTACKS_DIR, PROJECT_ROOT)
+from data.asset_baker import decode_gif_frames, source_signature
+from models.log import get_logger
+
+log = get_logger('assets')
+
+ASSET_BUNDLE_MAGIC = b'PKAB'
+ASSET_BUNDLE_VERSION = 1
+# Magic, version and manifest length, the JSON manifest and the entry data follow
+HEADER_FORMAT = '<4sHI'
+# Entry data starts on this boundary so pixel rows are word aligned in the mapping
+ALIGNMENT = 16
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+_bundle = None
+
+
+def bundle_key(path):
+    """Manifest key of an asset, its path from the project root with forward slashes"""
+    return os.path.relpath(os.path.abspath(path), PROJECT_ROOT).replace(os.sep, '/')
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return content_hash(f.read())
+
+
+def bundle_sources(sources=ASSET_BUNDLE_SOURCES):
+    """Every runtime asset file under the source directories, skipping baked caches and dotfiles"""
+    for source in sources:
+        for root, dirs, files in os.walk(source):
+            dirs[:] = sorted(d for d in dirs
+                             if not d.startswith('.') and os.path.join(root, d) != ASSET_CACHE_DIR)
+            for name in sorted(files):
+                if not name.startswith('.'):
+                    yield os.path.join(root, name)
+
+
+def decode_entry(path, data):
+    """Pre-decode an asset for the bundle, returns its entry fields and bytes
+
+    Images become raw RGBA (RGB when fully opaque) pixels, attack GIFs a
+    strip of ATTACK_FRAME_SIZE RGBA frames. Anything else, and GIFs when PIL
+    is missing, is stored as the file itself.
+    """
+    import pygame
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension in IMAGE_EXTENSIONS:
+        image = pygame.image.load(io.BytesIO(data), os.path.basename(path))
+        if image.get_flags() & pygame.SRCALPHA or image.get_colorkey() is not None:
+            # Flatten colour keys and palettes into per-pixel alpha
+            rgba = pygame.Surface(image.get_size(), pygame.SRCALPHA)
+            rgba.blit(image, (0, 0))
+            pixel_format, pixels = 'RGBA', pygame.image.tobytes(rgba, 'RGBA')
+        else:
+            pixel_format, pixels = 'RGB', pygame.image.tobytes(image, 'RGB')
+        return {'kind': 'pixels', 'format': pixel_format, 'size': list(image.get_size())}, pixels
+
+    if extension == '.gif' and os.path.dirname(os.path.abspath(path)) == BATTLE_ATTACKS_DIR:
+        try:
+            frames = decode_gif_frames(path, ATTACK_FRAME_SIZE)
+        except ImportError:
+            log.warning("PIL is not installed, %s is bundled undecoded", bundle_key(path))
+        else:
+            return {'kind': 'frames', 'format': 'RGBA', 'size': [ATTACK_FRAME_SIZE, ATTACK_FRAME_SIZE],
+                    'count': len(frames)}, b''.join(frames)
+
+    return {'kind': 'file'}, data
+
+
+def bake_asset_bundle(output_path=ASSET_BUNDLE, sources=ASSET_BUNDLE_SOURCES):
+    """Pack every runtime asset into one mappable file, returns (entries, decoded)
+
+    Entries whose content hash matches the previous bundle are copied from
+    it as they are, only new and changed assets are decoded again.
+    """
+    previous = AssetBundle(output_path)
+    manifest = {}
+    blobs = []
+    offset = 0
+    decoded = 0
+    for path in bundle_sources(sources):
+        key = bundle_key(path)
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = content_hash(data)
+        old = previous.entries.get(key)
+        if old is not None and old['sha256'] == digest:
+            fields = {name: value for name, value in old.items() if name not in ('offset', 'length')}
+            blob = previous.read(old)
+        else:
+            try:
+                fields, blob = decode_entry(path, data)
+            except Exception as e:
+                log.error("Could not decode %s, bundling it undecoded: %s", key, e)
+                fields, blob = {'kind': 'file'}, data
+            decoded += 1
+        fields.update(sha256=digest, source=list(source_signature(path)), offset=offset, length=len(blob))
+        manifest[key] = fields
+        padding = -len(blob) % ALIGNMENT
+        blobs.append(bytes(blob) + b'\0' * padding)
+        offset += len(blob) + padding
+
+    header = json.dumps(manifest, separators=(',', ':')).encode()
+    header += b' ' * (-(struct.calcsize(HEADER_FORMAT) + len(header)) % ALIGNMENT)
+    # The running game may have the old bundle mapped, write a new file and swap it in
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    temporary_path = output_path + '.tmp'
+    with open(temporary_path, 'wb') as f:
+        f.write(struct.pack(HEADER_FORMAT, ASSET_BUNDLE_MAGIC, ASSET_BUNDLE_VERSION, len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    previous.close()
+    os.replace(temporary_path, output_path)
+    return len(manifest), decoded
+
+
+class AssetBundle:
+    """Read-only view of the asset bundle, memory mapped with a single open
+
+    Entries are checked against their source file the first time they are
+    asked for: a matching size and modification time, a matching content
+    hash or a missing source keep the bundled copy, anything else makes the
+    caller load the loose file until the bundle is baked again. A missing or
+    outdated bundle has no entries.
+    """
+
+    def __init__(self, path=ASSET_BUNDLE):
+        self.path = path
+        self.entries = {}
+        self.checked = {}
+        self.map = None
+        self.view = None
+        try:
+            with open(path, 'rb') as f:
+                # Copy on write, surfaces made from the mapping may be drawn on without touching the file
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        except (FileNotFoundError, ValueError):
+            return
+
+        header_size = struct.calcsize(HEADER_FORMAT)
+        try:
+            magic, version, manifest_length = struct.unpack_from(HEADER_FORMAT, self.map)
+            if magic != ASSET_BUNDLE_MAGIC or version != ASSET_BUNDLE_VERSION:
+                raise ValueError("another bundle version")
+            self.entries = json.loads(self.map[header_size:header_size + manifest_length])
+        except (struct.error, ValueError) as e:
+            log.warning("Ignoring %s (%s), run `python -m data.asset_bundle`", path, e)
+            self.entries = {}
+            self.close()
+            return
+        self.data_offset = header_size + manifest_length
+        self.view = memoryview(self.map)
+
+    def close(self):
+        try:
+            if self.view is not None:
+                self.view.release()
+            if self.map is not None:
+                self.map.close()
+        except BufferError:
+            # Surfaces still use the mapping, it closes once they are gone
+            pass
+        self.view = self.map = None
+
+    def is_fresh(self, key, entry):
+        path = os.path.join(PROJECT_ROOT, key)
+        try:
+            if list(source_signature(path)) == entry['source']:
+                return True
+        except FileNotFoundError:
+            # Shipped without the loose files
+            return True
+        # Touched by a checkout or a copy, the content decides
+        if file_hash(path) == entry['sha256']:
+            return True
+        log.info("%s changed since the asset bundle was baked, loading the file", key)
+        return False
+
+    def entry(self, path):
+        """The manifest entry of an asset, None when it is not bundled or its source changed"""
+        key = bundle_key(path)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        fresh = self.checked.get(key)
+        if fresh is None:
+            fresh = self.checked[key] = self.is_fresh(key, entry)
+        return entry if fresh else None
+
+    def read(self, entry):
+        """The bytes of an entry, a zero copy view into the mapping"""
+        start = self.data_offset + entry['offset']
+        return self.view[start:start + entry['length']]
+
+    def frames(self, entry):
+        """The frames of a 'frames' entry as separate views"""
+        data = self.read(entry)
+        width, height = entry['size']
+        frame_bytes = width * height * 4
+        return [data[i * frame_bytes:(i + 1) * frame_bytes] for i in range(entry['count'])]
+
+    def open(self, path):
+        """A bundled file as a file object, None when it is not bundled"""
+        entry = self.entry(path)
+        if entry is None or entry['kind'] != 'file':
+            return None
+        return io.BytesIO(self.read(entry))
+
+
+def get_asset_bundle(reload=False):
+    """Return the shared asset bundle, mapping it on first use"""
+    global _bundle
+    if _bundle is None or reload:
+        _bundle = AssetBundle()
+    return _bundle
+
+
+def asset_hash(path):
+    """Content hash of an asset, from the bundle manifest when it is bundled"""
+    entry = get_asset_bundle().entry(path)
+    return entry['sha256'] if entry is not None else file_hash(path)
+
+
+# Run with `python -m data.asset_bundle` after changing or downloading assets
+if __name__ == '__main__':
+    entries, decoded = bake_asset_bundle()
+    print(f"Bundled {entries} assets into {ASSET_BUNDLE} ({decoded} decoded, "
+          f"{entries - decoded} unchanged, {os.path.getsize(ASSET_BUNDLE) / 1024 / 1024:.1f} MB)")
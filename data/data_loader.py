@@ -1,6 +1,8 @@
 import json
 import os
 from config import DATA_DIR, POKEDEX_DIR
+from data.item_db import normalize_inventory, starting_inventory
+from data.profile_index import get_profile_index
 from models.pokemon import Pokemon
 
 def load_pokemons():
@@ -18,37 +20,64 @@ def get_pokemon_by_id(pokemons_data, pokemon_id):
             return Pokemon(pokemon_data)
     return None
 
-def save_player_pokedex(player_name, pokemon_list):
-    """Save player's pokemon to their personal pokedex file"""
+def save_player_pokedex(player_name, pokemon_list, inventory=None):
+    """Save player's pokemon and bag to their personal pokedex file"""
     file_path = os.path.join(POKEDEX_DIR, f"{player_name}.json")
-    pokemon_data = [{
-        'id': p.id,
-        'name': p.name,
-        'current_hp': p.current_hp,
-        'level': p.level,
-        'experience': p.experience,
-        'state': p.state,
-        'state_duration': p.state_duration
-    } for p in pokemon_list]
+    # Stats follow from the species and level, so only what changes is saved
+    pokemon_data = []
+    for p in pokemon_list:
+        entry = {'id': p.id, 'level': p.level, 'experience': p.experience, 'current_hp': p.current_hp}
+        if p.state:
+            entry['state'] = p.state
+            entry['state_duration'] = p.state_duration
+        pokemon_data.append(entry)
+    if inventory is None:
+        inventory = load_player_inventory(player_name)
+    save_data = {
+        'pokemon': pokemon_data,
+        'inventory': [{'name': item['name'], 'quantity': item['quantity']} for item in inventory]
+    }
     with open(file_path, 'w') as f:
-        json.dump(pokemon_data, f, indent=4)
+        json.dump(save_data, f, indent=4)
+    get_profile_index().record(player_name, len(pokemon_data))
+
+def read_player_save(player_name):
+    """Pokemon entries and inventory (None if not saved) of a pokedex file
+
+    Older pokedex files are a plain list of Pokemon without an inventory.
+    """
+    file_path = os.path.join(POKEDEX_DIR, f"{player_name}.json")
+    with open(file_path, 'r') as f:
+        save_data = json.load(f)
+    if isinstance(save_data, list):
+        return save_data, None
+    return save_data.get('pokemon', []), save_data.get('inventory')
 
 def load_player_pokedex(player_name, pokemons_data):
     """Load player's pokemon from their personal pokedex file"""
-    file_path = os.path.join(POKEDEX_DIR, f"{player_name}.json")
     try:
-        with open(file_path, 'r') as f:
-            pokemon_data = json.load(f)
-            pokemon_list = []
-            for p_data in pokemon_data:
-                pokemon = get_pokemon_by_id(pokemons_data, p_data['id'])
-                if pokemon:
-                    pokemon.current_hp = p_data.get('current_hp', pokemon.stats['hp'])
-                    pokemon.level = p_data.get('level', 1)
-                    pokemon.experience = p_data.get('experience', 0)
-                    pokemon.state = p_data.get('state', None)
-                    pokemon.state_duration = p_data.get('state_duration', 0)
-                    pokemon_list.append(pokemon)
-            return pokemon_list
+        pokemon_data, _ = read_player_save(player_name)
+    except FileNotFoundError:
+        return None
+    species = {data['id']: data for data in pokemons_data}
+    pokemon_list = []
+    for p_data in pokemon_data:
+        data = species.get(p_data['id'])
+        if data:
+            # Older saves also carry the name, stats always come from the level
+            pokemon = Pokemon(dict(data, level=p_data.get('level', 1), experience=p_data.get('experience', 0)))
+            pokemon.current_hp = min(p_data.get('current_hp', pokemon.stats['hp']), pokemon.stats['hp'])
+            pokemon.state = p_data.get('state', None)
+            pokemon.state_duration = p_data.get('state_duration', 0)
+            pokemon_list.append(pokemon)
+    return pokemon_list
+
+def load_player_inventory(player_name):
+    """Load player's bag, the starting bag for new players and older saves"""
+    try:
+        _, inventory = read_player_save(player_name)
     except FileNotFoundError:
-        return None 
\ No newline at end of file
+        inventory = None
+    if inventory is None:
+        return starting_inventory()
+    return normalize_inventory(inventory)
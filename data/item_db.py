@@ -0,0 +1,29 @@
+import json
+import os
+from config import DATA_DIR
+
+ITEMS_FILE = os.path.join(DATA_DIR, 'items.json')
+
+_items = None
+
+
+def get_item_registry(reload=False):
+    """Return the shared item records by name, in bag order, loading them on first use"""
+    global _items
+    if _items is None or reload:
+        with open(ITEMS_FILE, 'r') as f:
+            _items = {record['name']: record for record in json.load(f)}
+    return _items
+
+
+def starting_inventory():
+    """The bag a new player starts with, as name and quantity entries"""
+    return [{'name': name, 'quantity': record.get('quantity', 0)}
+            for name, record in get_item_registry().items()]
+
+
+def normalize_inventory(entries):
+    """Inventory entries from a save, dropping items that are no longer in the registry"""
+    items = get_item_registry()
+    return [{'name': entry['name'], 'quantity': int(entry.get('quantity', 0))}
+            for entry in entries if entry.get('name') in items]
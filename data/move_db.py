@@ -0,0 +1,142 @@
+import json
+import os
+from config import DATA_DIR
+
+MOVES_FILE = os.path.join(DATA_DIR, 'moves.json')
+
+# Move types that have an attack animation, everything else falls back to 'normal'
+ANIMATION_TYPES = ('normal', 'fire', 'water', 'electric')
+
+# PokeAPI ailment names mapped to the battle states the game knows about
+AILMENT_STATES = {
+    'poison': 'poison',
+    'burn': 'burn',
+    'freeze': 'freeze',
+    'sleep': 'asleep'
+}
+
+# Built-in move data, used for moves that were not ingested from PokeAPI
+FALLBACK_MOVES = [
+    # Normal moves
+    {'name': 'tackle', 'type': 'normal', 'ailment': 'burn', 'ailment_chance': 0.95},
+    {'name': 'scratch', 'type': 'normal', 'ailment': 'poison', 'ailment_chance': 0.95},
+    {'name': 'pound', 'type': 'normal', 'ailment': 'freeze', 'ailment_chance': 0.95},
+    {'name': 'quick-attack', 'type': 'normal', 'ailment': 'asleep', 'ailment_chance': 0.95},
+    {'name': 'slam', 'type': 'normal'},
+    {'name': 'cut', 'type': 'normal'},
+    {'name': 'double-kick', 'type': 'normal'},
+
+    # Fire moves
+    {'name': 'ember', 'type': 'fire', 'ailment': 'burn', 'ailment_chance': 0.1},
+    {'name': 'flamethrower', 'type': 'fire', 'ailment': 'burn', 'ailment_chance': 0.3},
+    {'name': 'fire-blast', 'type': 'fire', 'ailment': 'burn', 'ailment_chance': 0.4},
+    {'name': 'fire-punch', 'type': 'fire'},
+    {'name': 'flame-wheel', 'type': 'fire'},
+
+    # Water moves
+    {'name': 'water-gun', 'type': 'water'},
+    {'name': 'bubble', 'type': 'water'},
+    {'name': 'hydro-pump', 'type': 'water'},
+    {'name': 'surf', 'type': 'water'},
+    {'name': 'waterfall', 'type': 'water'},
+    {'name': 'aqua-jet', 'type': 'water'},
+
+    # Electric moves
+    {'name': 'thundershock', 'type': 'electric'},
+    {'name': 'thunderbolt', 'type': 'electric'},
+    {'name': 'thunder', 'type': 'electric'},
+    {'name': 'thunder-punch', 'type': 'electric'},
+    {'name': 'spark', 'type': 'electric'},
+    {'name': 'thunder-wave', 'type': 'electric'},
+    {'name': 'volt-tackle', 'type': 'electric'},
+
+    # Status moves
+    {'name': 'toxic', 'type': 'poison', 'ailment': 'poison', 'ailment_chance': 0.75},
+    {'name': 'poison-sting', 'type': 'poison', 'ailment': 'poison', 'ailment_chance': 0.2},
+    {'name': 'ice-beam', 'type': 'ice', 'ailment': 'freeze', 'ailment_chance': 0.1},
+    {'name': 'blizzard', 'type': 'ice', 'ailment': 'freeze', 'ailment_chance': 0.2},
+    {'name': 'hypnosis', 'type': 'psychic', 'ailment': 'asleep', 'ailment_chance': 0.6},
+    {'name': 'sleep-powder', 'type': 'grass', 'ailment': 'asleep', 'ailment_chance': 0.7}
+]
+
+
+def normalize_move_name(name):
+    """Normalize a move name to the PokeAPI form ('Quick Attack' -> 'quick-attack')"""
+    return name.lower().strip().replace(' ', '-')
+
+
+class MoveDatabase:
+    """Move data compiled into parallel lists indexed by interned move id"""
+
+    def __init__(self, records=()):
+        self.ids = {}
+        self.names = []
+        self.types = []
+        self.animations = []
+        self.power = []
+        self.accuracy = []
+        self.ailments = []
+        self.ailment_chances = []
+        for record in records:
+            self.add(record)
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, record):
+        """Compile a move record into the table, replacing any existing row"""
+        name = normalize_move_name(record['name'])
+        move_type = record.get('type') or 'normal'
+        row = (
+            name,
+            move_type,
+            move_type if move_type in ANIMATION_TYPES else 'normal',
+            record.get('power'),
+            record.get('accuracy'),
+            record.get('ailment'),
+            record.get('ailment_chance', 0.0) if record.get('ailment') else 0.0
+        )
+
+        move_id = self.ids.get(name)
+        if move_id is None:
+            move_id = len(self.names)
+            self.ids[name] = move_id
+            for column, value in zip(self._columns(), row):
+                column.append(value)
+        else:
+            for column, value in zip(self._columns(), row):
+                column[move_id] = value
+        return move_id
+
+    def intern(self, name):
+        """Return the id of a move, adding an untyped 'normal' row for unknown moves"""
+        move_id = self.ids.get(normalize_move_name(name))
+        if move_id is None:
+            move_id = self.add({'name': name})
+        return move_id
+
+    def _columns(self):
+        return (self.names, self.types, self.animations, self.power,
+                self.accuracy, self.ailments, self.ailment_chances)
+
+
+_move_db = None
+
+
+def load_move_records():
+    """Load the ingested move records from moves.json"""
+    try:
+        with open(MOVES_FILE, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def get_move_database(reload=False):
+    """Return the shared move table, compiling it on first use"""
+    global _move_db
+    if _move_db is None or reload:
+        _move_db = MoveDatabase(FALLBACK_MOVES)
+        for record in load_move_records():
+            _move_db.add(record)
+    return _move_db
@@ -0,0 +1,109 @@
+import json
+import os
+import time
+from config import POKEDEX_DIR, PROFILE_INDEX_FILE
+
+_index = None
+
+
+def save_fingerprint(path):
+    """Size and modification time of a save file, they change whenever it is rewritten"""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+class ProfileIndex:
+    """Party size, last played time and save fingerprint of every player by name
+
+    save_player_pokedex keeps it up to date, so checking whether a player
+    can continue or listing the profiles never opens a save. Saves added,
+    changed or removed behind its back are found by their fingerprint when
+    the index is loaded, and only those are read again.
+    """
+
+    def __init__(self, path=PROFILE_INDEX_FILE, pokedex_dir=POKEDEX_DIR):
+        self.path = path
+        self.pokedex_dir = pokedex_dir
+        self.profiles = {}
+        self.load()
+
+    def save_path(self, player_name):
+        return os.path.join(self.pokedex_dir, f"{player_name}.json")
+
+    def load(self):
+        try:
+            with open(self.path, 'r') as f:
+                self.profiles = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.profiles = {}
+        if self.refresh():
+            self.write()
+
+    def refresh(self):
+        """Bring the index in line with the save files, returns whether anything changed"""
+        try:
+            names = {entry[:-5] for entry in os.listdir(self.pokedex_dir) if entry.endswith('.json')}
+        except FileNotFoundError:
+            names = set()
+
+        changed = False
+        for name in list(self.profiles):
+            if name not in names:
+                del self.profiles[name]
+                changed = True
+
+        for name in names:
+            path = self.save_path(name)
+            fingerprint = save_fingerprint(path)
+            profile = self.profiles.get(name)
+            if profile and profile['fingerprint'] == fingerprint:
+                continue
+            try:
+                with open(path, 'r') as f:
+                    save_data = json.load(f)
+            except ValueError:
+                continue
+            # Older pokedex files are a plain list of Pokemon
+            pokemon = save_data if isinstance(save_data, list) else save_data.get('pokemon', [])
+            self.profiles[name] = {
+                'party_size': len(pokemon),
+                'last_played': os.path.getmtime(path),
+                'fingerprint': fingerprint
+            }
+            changed = True
+        return changed
+
+    def write(self):
+        with open(self.path, 'w') as f:
+            json.dump(self.profiles, f, indent=4)
+
+    def record(self, player_name, party_size):
+        """Update a player's profile right after their save was written"""
+        self.profiles[player_name] = {
+            'party_size': party_size,
+            'last_played': time.time(),
+            'fingerprint': save_fingerprint(self.save_path(player_name))
+        }
+        self.write()
+
+    def get(self, player_name):
+        return self.profiles.get(player_name)
+
+    def can_continue(self, player_name):
+        profile = self.profiles.get(player_name)
+        return bool(profile and profile['party_size'])
+
+    def list_profiles(self):
+        """Profiles that can continue, most recently played first, with their name"""
+        profiles = [dict(profile, name=name) for name, profile in self.profiles.items()
+                    if profile['party_size']]
+        profiles.sort(key=lambda profile: profile['last_played'], reverse=True)
+        return profiles
+
+
+def get_profile_index(reload=False):
+    """Return the shared profile index, loading and refreshing it on first use"""
+    global _index
+    if _index is None or reload:
+        _index = ProfileIndex()
+    return _index
@@ -0,0 +1,84 @@
+import json
+import mmap
+import os
+import struct
+from config import SOUND_CACHE
+
+SOUND_CACHE_MAGIC = b'PKSC'
+SOUND_CACHE_VERSION = 2
+# Magic, version, the mixer frequency, sample format and channels the
+# samples were decoded for, and the manifest length
+HEADER_FORMAT = '<4sHiiiI'
+ALIGNMENT = 16
+
+
+def write_sound_cache(sounds, settings, path=SOUND_CACHE):
+    """Write decoded sounds for one set of mixer settings
+
+    sounds is {name: (source hash, source signature, raw samples)}, the
+    signature is the source's size and mtime, or None when it has no loose file.
+    """
+    manifest = {}
+    offset = 0
+    for name, (digest, signature, samples) in sounds.items():
+        manifest[name] = {'sha256': digest, 'source': signature and list(signature),
+                          'offset': offset, 'length': len(samples)}
+        offset += len(samples) + -len(samples) % ALIGNMENT
+
+    header = json.dumps(manifest, separators=(',', ':')).encode()
+    header += b' ' * (-(struct.calcsize(HEADER_FORMAT) + len(header)) % ALIGNMENT)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary_path = path + '.tmp'
+    with open(temporary_path, 'wb') as f:
+        f.write(struct.pack(HEADER_FORMAT, SOUND_CACHE_MAGIC, SOUND_CACHE_VERSION, *settings, len(header)))
+        f.write(header)
+        for _, _, samples in sounds.values():
+            f.write(samples)
+            f.write(b'\0' * (-len(samples) % ALIGNMENT))
+    os.replace(temporary_path, path)
+
+
+class SoundCache:
+    """Sound effects decoded to the mixer's own sample format, memory mapped
+
+    Samples are only handed out for the mixer settings they were decoded
+    for and while the source hash matches, so changing either one makes
+    the audio manager decode the source again and rewrite the cache.
+    """
+
+    def __init__(self, settings, path=SOUND_CACHE):
+        self.entries = {}
+        try:
+            with open(path, 'rb') as f:
+                self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return
+
+        header_size = struct.calcsize(HEADER_FORMAT)
+        try:
+            magic, version, *cached_settings, manifest_length = struct.unpack_from(HEADER_FORMAT, self.map)
+        except struct.error:
+            return
+        if (magic != SOUND_CACHE_MAGIC or version != SOUND_CACHE_VERSION
+                or cached_settings != list(settings)):
+            return
+        try:
+            self.entries = json.loads(self.map[header_size:header_size + manifest_length])
+        except ValueError:
+            return
+        self.data_offset = header_size + manifest_length
+
+    def digest(self, name, signature):
+        """The cached source hash of a sound while its size and mtime match, else None"""
+        entry = self.entries.get(name)
+        if entry is None or signature is None or entry.get('source') != list(signature):
+            return None
+        return entry['sha256']
+
+    def samples(self, name, digest):
+        """Raw samples of a sound as a view into the mapping, None if missing or stale"""
+        entry = self.entries.get(name)
+        if entry is None or entry['sha256'] != digest:
+            return None
+        start = self.data_offset + entry['offset']
+        return memoryview(self.map)[start:start + entry['length']]
@@ -1,36 +1,28 @@
+import json
 import os
 from models.game import Game
-from config import PROJECT_ROOT
+from config import DATA_DIR, ensure_directories
+from models.log import configure_logging, get_logger
 
-def check_directory_structure():
-    """Create basic directory structure if it doesn't exist"""
-    base_dirs = [
-        'assets',
-        'assets/images',
-        'assets/images/menu',
-        'assets/images/battle',
-        'assets/images/battle/states',
-        'assets/sounds',
-        'assets/fonts',
-        'data',
-        'data/sprites',
-        'data/pokedex'
-    ]
-    
-    for directory in base_dirs:
-        dir_path = os.path.join(PROJECT_ROOT, directory)
-        os.makedirs(dir_path, exist_ok=True)
-        print(f"Checked directory: {directory}")
+log = get_logger('data')
 
 def clean_pokemon_data():
-    """Remove old Pokemon data to force regeneration with relative paths"""
-    pokemon_json = os.path.join(PROJECT_ROOT, 'data', 'pokemons.json')
-    if os.path.exists(pokemon_json):
+    """Remove Pokemon data saved with absolute sprite paths to force regeneration with relative paths"""
+    pokemon_json = os.path.join(DATA_DIR, 'pokemons.json')
+    try:
+        with open(pokemon_json, 'r') as f:
+            pokemons = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return
+    # Windows absolute paths are not absolute on other platforms, hence the drive check
+    sprite_paths = [p.get('sprite_path') or '' for p in pokemons]
+    if any(os.path.isabs(path) or ':' in path for path in sprite_paths):
         os.remove(pokemon_json)
-        print("Removed old Pokemon data")
+        log.info("Removed Pokemon data with absolute sprite paths")
 
 if __name__ == "__main__":
-    check_directory_structure()
+    configure_logging()
+    ensure_directories()
     clean_pokemon_data()
     game = Game()
-    game.run() 
\ No newline at end of file
+    game.run() 
@@ -0,0 +1,154 @@
+import os
+import weakref
+import pygame
+from config import *
+from data.asset_baker import bake_attack_frames, read_attack_frames, source_signature
+from data.asset_bundle import get_asset_bundle
+from models.log import get_logger
+
+log = get_logger('assets')
+
+_attack_frames = None
+# Loaded images and fonts, keyed by (path, size). Images may be filled in
+# from the preloader threads, dict assignment keeps that safe without a lock.
+_images = {}
+_fonts = {}
+# Scaled and mirrored copies per source image, dropped along with the source
+_scaled = weakref.WeakKeyDictionary()
+# Pokemon sprites cropped to their opaque pixels: path -> (surface, anchor, frame size)
+_sprites = {}
+
+
+def asset_file(path):
+    """An asset as pygame loaders take it: a file object over its bundled bytes, or its path"""
+    return get_asset_bundle().open(path) or path
+
+
+def decode_image(path):
+    """Wrap the pre-decoded pixels of a bundled image without copying them, or decode the file"""
+    bundle = get_asset_bundle()
+    entry = bundle.entry(path)
+    if entry is not None and entry['kind'] == 'pixels':
+        return pygame.image.frombuffer(bundle.read(entry), tuple(entry['size']), entry['format'])
+    return pygame.image.load(path)
+
+
+def load_image(path, size=None):
+    """Load an image once, optionally scaled, and share it between every caller"""
+    key = (path, size)
+    image = _images.get(key)
+    if image is None:
+        image = decode_image(path)
+        if size:
+            image = pygame.transform.scale(image, size)
+        _images[key] = image
+    return image
+
+
+def load_sprite(path, anchor=None, frame=None):
+    """Load a Pokemon sprite cropped to its opaque pixels, RLE accelerated in display format
+
+    Returns the surface, the anchor (the offset of the crop in the original
+    frame) and the size of the original frame. Sprites trimmed when they were
+    downloaded pass the anchor and frame stored in the species data.
+    """
+    sprite = _sprites.get(path)
+    if sprite is None:
+        image = load_image(path)
+        # Untrimmed sprites are cropped here, a trimmed one crops to itself
+        bounds = image.get_bounding_rect()
+        trimmed = pygame.Surface(bounds.size, pygame.SRCALPHA)
+        trimmed.blit(image, (0, 0), bounds)
+        # Display format needs a window, headless tools keep the plain surface
+        if pygame.display.get_surface() is not None:
+            trimmed = trimmed.convert_alpha()
+            trimmed.set_alpha(255, pygame.RLEACCEL)
+        sprite = _sprites[path] = (trimmed, bounds.topleft, image.get_size())
+    if anchor is not None:
+        return sprite[0], tuple(anchor), tuple(frame or sprite[2])
+    return sprite
+
+
+def scaled_image(image, scale, flip=False):
+    """A copy of an image scaled by a factor and optionally mirrored, made once and reused every frame"""
+    copies = _scaled.get(image)
+    if copies is None:
+        copies = _scaled[image] = {}
+    key = (scale, flip)
+    copy = copies.get(key)
+    if copy is None:
+        copy = pygame.transform.scale(image, (int(image.get_width() * scale), int(image.get_height() * scale)))
+        if flip:
+            copy = pygame.transform.flip(copy, True, False)
+        # RLEACCELOK marks a surface asked for RLE, it is only encoded on its first blit
+        if image.get_flags() & (pygame.RLEACCEL | pygame.RLEACCELOK):
+            copy.set_alpha(255, pygame.RLEACCEL)
+        copies[key] = copy
+    return copy
+
+
+def load_font(size, filename="pokemonsolid.ttf"):
+    """Load a font once per size, falling back to the default font"""
+    key = (filename, size)
+    font = _fonts.get(key)
+    if font is None:
+        try:
+            font = pygame.font.Font(asset_file(os.path.join(FONTS_DIR, filename)) if filename else None, size)
+        except (OSError, pygame.error):
+            font = pygame.font.Font(None, size)
+        _fonts[key] = font
+    return font
+
+
+def _cache_is_fresh(animations, size):
+    if size != ATTACK_FRAME_SIZE or set(animations) != set(ATTACK_TYPES):
+        return False
+    for attack_type, (_, signature) in animations.items():
+        gif_path = os.path.join(BATTLE_ATTACKS_DIR, f'{attack_type}.gif')
+        # Bundled frames were already checked against their GIF by the bundle
+        if signature is not None and os.path.exists(gif_path) and source_signature(gif_path) != signature:
+            return False
+    return True
+
+
+def _bundled_attack_frames():
+    """The attack frame strips from the asset bundle, None unless every one is bundled and fresh"""
+    bundle = get_asset_bundle()
+    animations = {}
+    for attack_type in ATTACK_TYPES:
+        entry = bundle.entry(os.path.join(BATTLE_ATTACKS_DIR, f'{attack_type}.gif'))
+        if entry is None or entry['kind'] != 'frames' or entry['size'] != [ATTACK_FRAME_SIZE] * 2:
+            return None
+        animations[attack_type] = (bundle.frames(entry), None)
+    return ATTACK_FRAME_SIZE, animations
+
+
+def load_attack_frames():
+    """Load the baked attack animation frames as display-format surfaces
+
+    They come from the asset bundle when it has them, otherwise the frame
+    cache is baked on first use (or when a source GIF changes) if PIL is
+    installed, and animations are left empty without it.
+    """
+    global _attack_frames
+    if _attack_frames is not None:
+        return _attack_frames
+
+    cache = _bundled_attack_frames() or read_attack_frames()
+    if cache is None or not _cache_is_fresh(cache[1], cache[0]):
+        try:
+            bake_attack_frames()
+            cache = read_attack_frames()
+        except ImportError:
+            log.warning("PIL is not installed, run `python -m data.asset_baker` to bake attack animations")
+            cache = None
+
+    _attack_frames = {attack_type: [] for attack_type in ATTACK_TYPES}
+    if cache:
+        size, animations = cache
+        for attack_type, (frames, _) in animations.items():
+            _attack_frames[attack_type] = [
+                pygame.image.frombuffer(frame, (size, size), 'RGBA').convert_alpha()
+                for frame in frames
+            ]
+    return _attack_frames
@@ -0,0 +1,184 @@
+import os
+import pygame
+from config import *
+from data.asset_baker import source_signature
+from data.asset_bundle import asset_hash
+from data.sound_cache import SoundCache, write_sound_cache
+from models.assets import asset_file
+from models.log import get_logger
+
+log = get_logger('audio')
+
+# Sound effects decoded once into the sound cache and shared by every scene: name -> (file, volume)
+SOUND_EFFECTS = {
+    'hover': ('hover.mp3', 1.0),
+    'click': ('click.mp3', 1.0),
+    'typing': ('typing.mp3', 1.0),
+    'attack_normal': (os.path.join('attacks', 'normal.mp3'), 0.3),
+    'attack_fire': (os.path.join('attacks', 'fire.mp3'), 0.3),
+    'attack_water': (os.path.join('attacks', 'water.mp3'), 0.3),
+    'attack_electric': (os.path.join('attacks', 'electric.mp3'), 0.3),
+    'impact': (os.path.join('attacks', 'impact.mp3'), 0.4),
+}
+
+# Music is streamed from disk rather than decoded into memory
+MUSIC_TRACKS = {
+    'menu': os.path.join('menu', 'menu.mp3'),
+    'battle': os.path.join('battle', 'battle.mp3'),
+}
+
+# Reserved mixer channels per group, so effects of one group never cut another
+CHANNEL_POOLS = {
+    'ui': 2,
+    'attack': 2,
+    'impact': 1,
+}
+
+_audio = None
+
+
+class NullAudio:
+    """Silent backend used when sound is disabled or no audio device is available"""
+
+    def play(self, name, pool='ui'):
+        pass
+
+    def play_music(self, track):
+        pass
+
+    def stop_music(self):
+        pass
+
+    def update(self):
+        pass
+
+
+class AudioManager:
+    """Shared sound bank, per-group channel pools and streamed music"""
+
+    def __init__(self):
+        self.sounds = {}
+        self.load_sounds()
+
+        # The first channels are reserved for the pools, the rest stay free
+        # for anything played without a pool
+        reserved = sum(CHANNEL_POOLS.values())
+        pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), reserved + 4))
+        pygame.mixer.set_reserved(reserved)
+        self.pools = {}
+        first = 0
+        for pool, size in CHANNEL_POOLS.items():
+            self.pools[pool] = [pygame.mixer.Channel(i) for i in range(first, first + size)]
+            first += size
+        self.next_channel = dict.fromkeys(self.pools, 0)
+
+        self.current_track = None
+        self.pending_track = None
+        self.music_file = None
+
+    def load_sounds(self):
+        """Load the effects from the sound cache, decoding and caching the ones it lacks"""
+        settings = pygame.mixer.get_init()
+        cache = SoundCache(settings)
+        loaded = {}
+        stale = False
+        for name, (filename, volume) in SOUND_EFFECTS.items():
+            path = os.path.join(SOUNDS_DIR, filename)
+            try:
+                try:
+                    signature = source_signature(path)
+                except FileNotFoundError:
+                    # Only in the asset bundle, its manifest has the hash
+                    signature = None
+                # The source is only hashed again when its size or mtime changed
+                cached_digest = cache.digest(filename, signature)
+                digest = cached_digest or asset_hash(path)
+                samples = cache.samples(filename, digest)
+                if samples is None:
+                    sound = pygame.mixer.Sound(asset_file(path))
+                    stale = True
+                else:
+                    sound = pygame.mixer.Sound(buffer=samples)
+                    # Touched but unchanged, record the new signature so it is not hashed again
+                    if cached_digest is None and signature is not None:
+                        stale = True
+            except (pygame.error, FileNotFoundError) as e:
+                log.warning("Could not load sound %s: %s", filename, e)
+                continue
+            sound.set_volume(volume)
+            self.sounds[name] = sound
+            loaded[filename] = (digest, signature, sound)
+
+        if stale:
+            try:
+                write_sound_cache({filename: (digest, signature, sound.get_raw())
+                                   for filename, (digest, signature, sound) in loaded.items()}, settings)
+            except OSError as e:
+                log.warning("Could not write the sound cache: %s", e)
+
+    def play(self, name, pool='ui'):
+        sound = self.sounds.get(name)
+        if sound is None:
+            return
+        channels = self.pools[pool]
+        for channel in channels:
+            if not channel.get_busy():
+                channel.play(sound)
+                return
+        # Every channel is busy, replace the oldest sound in the pool
+        index = self.next_channel[pool]
+        channels[index].play(sound)
+        self.next_channel[pool] = (index + 1) % len(channels)
+
+    def play_music(self, track):
+        """Crossfade to a looping music track, does nothing if it is already playing"""
+        if track == self.current_track:
+            self.pending_track = None
+            return
+        self.current_track = track
+        if pygame.mixer.music.get_busy():
+            # The new track starts from update() once the fade out is done
+            self.pending_track = track
+            pygame.mixer.music.fadeout(MUSIC_FADE_MS)
+        else:
+            self.start_music(track)
+
+    def start_music(self, track):
+        self.pending_track = None
+        try:
+            # The mixer streams from the file object, it has to outlive the track
+            filename = MUSIC_TRACKS[track]
+            self.music_file = asset_file(os.path.join(SOUNDS_DIR, filename))
+            pygame.mixer.music.load(self.music_file, os.path.splitext(filename)[1][1:])
+            pygame.mixer.music.play(-1, fade_ms=MUSIC_FADE_MS)
+        except pygame.error as e:
+            log.warning("Could not play %s music: %s", track, e)
+
+    def stop_music(self):
+        self.current_track = None
+        self.pending_track = None
+        pygame.mixer.music.fadeout(MUSIC_FADE_MS)
+
+    def update(self):
+        if self.pending_track and not pygame.mixer.music.get_busy():
+            self.start_music(self.pending_track)
+
+
+def init_audio():
+    """Create the audio backend, falling back to silence if the mixer is unavailable"""
+    global _audio
+    _audio = NullAudio()
+    if SOUND_ENABLED:
+        try:
+            pygame.mixer.init()
+            _audio = AudioManager()
+        except pygame.error as e:
+            log.warning("Audio disabled: %s", e)
+    return _audio
+
+
+def get_audio():
+    global _audio
+    if _audio is None:
+        _audio = NullAudio()
+    return _audio
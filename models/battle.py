@@ -2,144 +2,172 @@ import pygame
 import random
 import os
 import math
+import time
 from config import *
-from models.menu import Button
-from PIL import Image
+from models.ui import Button, WidgetLayer
+from data.item_db import get_item_registry, starting_inventory
+from data.move_db import get_move_database
+from models.battle_rules import BattleState, apply_attack, apply_state_effects, roll_attack, use_item
+from models.enemy_ai import EnemyAI
+from models.timeline import Timeline, ease_out
+from models.assets import load_attack_frames, load_font, load_image, scaled_image
+from models.audio import get_audio
+from models.log import get_logger
+from models.memory import track
+from models.particles import Emitter, create_particle_system
+from models.replay import ATTACK, ENEMY_ATTACK, ITEM, RUN, SWITCH, Replay
+
+log = get_logger('battle')
+
+# Attack animation timings in seconds, before the timeline speed multiplier
+PROJECTILE_DURATION = 0.6
+SHAKE_DURATION = 0.17
+HP_DRAIN_DURATION = 0.5
+PROJECTILE_SIZE = ATTACK_FRAME_SIZE
+PROJECTILE_TRAIL = 4
+
+# Arena background for the enemy's first type, grass for anything else
+BATTLE_BACKGROUNDS = {
+    'ground': 'cave.png',
+    'rock': 'cave.png',
+    'fighting': 'cave.png',
+    'grass': 'grass.png',
+    'bug': 'grass.png',
+    'normal': 'grass.png',
+    'water': 'water.png',
+    'ice': 'water.png',
+    'dragon': 'gym.png',
+    'psychic': 'gym.png',
+    'electric': 'gym.png',
+    'fire': 'gym.png',
+    'fairy': 'gym.png',
+    'ghost': 'gym.png',
+    'dark': 'gym.png',
+    'steel': 'gym.png',
+    'poison': 'gym.png',
+    'flying': 'grass.png'
+}
+BAG_IMAGE_SIZE = (32, 32)
+
+
+def battle_background_path(pokemon_types):
+    return os.path.join(BATTLE_IMAGES_DIR, BATTLE_BACKGROUNDS.get(pokemon_types[0], 'grass.png'))
+
+
+def bag_image_path(item):
+    return os.path.join(BATTLE_IMAGES_DIR, 'bag', item['image'])
+
+
+class PokemonSwitchButton(Button):
+    """Party member button of the switch menu, the Pokemon's sprite next to its HP"""
+    sprite_size = 40
+    
+    def __init__(self, x, y, width, height, pokemon):
+        super().__init__(x, y, width, height, "", BLUE, (150, 150, 255), font=load_font(16))
+        self.pokemon = pokemon
+        # The cropped sprite is fitted into the icon box, keeping its shape
+        sprite = pokemon.sprite
+        self.sprite = scaled_image(sprite, self.sprite_size / max(sprite.get_width(), sprite.get_height(), 1))
+        
+    def render(self, state):
+        surface = self.render_frame(state)
+        icon_box = pygame.Rect(5, (self.rect.height - self.sprite_size) // 2, self.sprite_size, self.sprite_size)
+        surface.blit(self.sprite, self.sprite.get_rect(center=icon_box.center))
+        
+        color = BRIGHT_YELLOW if state != 'disabled' else (150, 150, 150)
+        text_surface = self.font.render(self.text, True, color)
+        text_rect = text_surface.get_rect()
+        text_rect.centerx = self.rect.width // 2 + self.sprite_size // 2 
+        text_rect.centery = self.rect.height // 2
+        surface.blit(text_surface, text_rect)
+        return surface
+
 
 class BattleSystem:
-    # Class variable to store bag items across all battles
-    bag_items = [
-        {'name': 'Alarm', 'quantity': 1, 'description': 'Cancels asleep state', 'image': 'alarm.png'},
-        {'name': 'Antidote', 'quantity': 2, 'description': 'Cancels poison state', 'image': 'antidote.png'},
-        {'name': 'Heater', 'quantity': 1, 'description': 'Cancels freeze state', 'image': 'heater.png'},
-        {'name': 'Pokeball', 'quantity': 3, 'description': 'Allows to catch a wild Pokemon', 'image': 'pokeball.png'},
-        {'name': 'Potion', 'quantity': 2, 'description': 'Allows to restore HP', 'image': 'potion.png'},
-        {'name': 'Suncream', 'quantity': 2, 'description': 'Allows to cure sun burn', 'image': 'suncream.png'}
-    ]
+    """Battle presenter, created once and re-armed with reset() for every battle
+
+    Buttons, fonts, the particle system and the enemy AI worker are kept
+    between battles. reset() only reloads what the new combatants change.
+    """
 
-    def __init__(self, screen, player_pokemon, enemy_pokemon):
+    def __init__(self, screen, player_pokemon=None, enemy_pokemon=None, seed=None, inventory=None):
         self.screen = screen
-        self.player_pokemon = player_pokemon
-        self.enemy_pokemon = enemy_pokemon
-        self.current_turn = 'player'  
-        self.battle_state = 'main'  
-        self.message_log = []
-        self.all_player_pokemon = []  
-        self.battle_started = False 
-        
-        # Load and set background based on enemy Pokemon type
-        self.background = self.select_background()
-        self.background = pygame.transform.scale(self.background, (WINDOW_WIDTH, WINDOW_HEIGHT))
+        self.enemy_ai = EnemyAI(ENEMY_AI_DIFFICULTY)
+        self.items = get_item_registry()
+        self.bag_overlay = None
+        self.bag_rows = {}
+        self.background = None
+        self.background_path = None
+        self.move_buttons = {}
+        self.move_button_pool = {}
+        self.pokemon_switch_buttons = {}
+        self.switch_button_pool = {}
         
         self.setup_battle_ui()
         
         # Add animation variables
-        self.animation_time = 0
         self.animation_speed = 1.2  
         self.float_amplitude = 5  
         
         self.load_attack_animations()
         
+        # Attack animation tracks are scheduled on the timeline
+        self.timeline = Timeline(BATTLE_ANIMATION_SPEED)
+        # Projectile trails and impact bursts, when NumPy is available
+        self.particles = create_particle_system()
+        self.audio = get_audio()
+        
+        self.moves = get_move_database()
+        track(self, 'BattleSystem')
+        
+        if player_pokemon and enemy_pokemon:
+            self.reset(player_pokemon, enemy_pokemon, seed, inventory)
+        
+    def reset(self, player_pokemon, enemy_pokemon, seed=None, inventory=None, party=None):
+        """Start a new battle between the given Pokemon"""
+        self.player_pokemon = player_pokemon
+        self.enemy_pokemon = enemy_pokemon
+        self.all_player_pokemon = party if party is not None else []
+        self.current_turn = 'player'  
+        self.battle_state = 'main'  
+        self.message_log = []
+        self.battle_started = False 
+        # Every roll of the battle comes from its own seeded RNG so it can be replayed
+        self.seed = random.getrandbits(63) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        self.replay = None
+        self.enemy_move_future = None
+        # The player's bag, quantities change in place so the game saves them
+        self.bag_items = inventory if inventory is not None else starting_inventory()
+        self.bag_selection = 0
+        
+        # Background based on enemy Pokemon type, usually preloaded by the game
+        self.select_background()
+        self.setup_move_buttons()
+        
+        self.animation_time = 0
+        self.timeline.clear()
+        self.timeline.speed = BATTLE_ANIMATION_SPEED
+        self.particles.clear()
+        self.projectile = None
+        self.trail = None
+        self.display_hp = {}
+        self.pending_result = None
+        self.after_animation = None
+        
         # Shake and flash variables
         self.shake_offset = 0
-        self.is_shaking = False
-        self.shake_frames = 0
         self.shake_target = None
         self.flash_alpha = 0
         
-        # Attack sounds
-        self.attack_sounds = {
-            'normal': pygame.mixer.Sound(os.path.join(SOUNDS_DIR, 'attacks/normal.mp3')),
-            'fire': pygame.mixer.Sound(os.path.join(SOUNDS_DIR, 'attacks/fire.mp3')),
-            'water': pygame.mixer.Sound(os.path.join(SOUNDS_DIR, 'attacks/water.mp3')),
-            'electric': pygame.mixer.Sound(os.path.join(SOUNDS_DIR, 'attacks/electric.mp3'))
-        }
-        
-        # Impact sound
-        self.impact_sound = pygame.mixer.Sound(os.path.join(SOUNDS_DIR, 'attacks/impact.mp3'))
-        
-        for sound in self.attack_sounds.values():
-            sound.set_volume(0.3)
-        self.impact_sound.set_volume(0.4)  
-        
-        # State effect definitions
-        self.state_effects = {
-            'poison': {
-                'damage_per_turn': lambda pokemon: pokemon.stats['hp'] // 8,
-                'duration': None,  
-                'can_attack': True,
-                'message': '{pokemon} is hurt by poison!'
-            },
-            'burn': {
-                'damage_per_turn': lambda pokemon: pokemon.stats['hp'] // 16,
-                'duration': None,  
-                'can_attack': True,
-                'message': '{pokemon} is hurt by its burn!'
-            },
-            'freeze': {
-                'duration': 3,
-                'can_attack': False,
-                'message': '{pokemon} is frozen solid!'
-            },
-            'asleep': {
-                'duration': 3,
-                'can_attack': False,
-                'message': '{pokemon} is fast asleep!'
-            }
-        }
-        
-        # Add state chances to move types
-        self.move_state_effects = {
-            'tackle': {'state': 'burn', 'chance': 0.95},      # 95% chance to burn
-            'scratch': {'state': 'poison', 'chance': 0.95},   # 95% chance to poison
-            'pound': {'state': 'freeze', 'chance': 0.95},     # 95% chance to freeze
-            'quick attack': {'state': 'asleep', 'chance': 0.95}, # 95% chance to sleep
-            
-            'ember': {'state': 'burn', 'chance': 0.1},
-            'flamethrower': {'state': 'burn', 'chance': 0.3},
-            'fire blast': {'state': 'burn', 'chance': 0.4},
-            
-            'toxic': {'state': 'poison', 'chance': 0.75},
-            'poison sting': {'state': 'poison', 'chance': 0.2},
-            
-            'ice beam': {'state': 'freeze', 'chance': 0.1},
-            'blizzard': {'state': 'freeze', 'chance': 0.2},
-            
-            'hypnosis': {'state': 'asleep', 'chance': 0.6},
-            'sleep powder': {'state': 'asleep', 'chance': 0.7},
-        }
+        for layer in self.layers.values():
+            layer.clear_hover()
         
     def select_background(self):
-        # Get enemy Pokemon's first type
-        pokemon_type = self.enemy_pokemon.types[0]
-        
-        # Map Pokemon types to backgrounds
-        background_mapping = {
-            'ground': 'cave.png',
-            'rock': 'cave.png',
-            'fighting': 'cave.png',
-            'grass': 'grass.png',
-            'bug': 'grass.png',
-            'normal': 'grass.png',
-            'water': 'water.png',
-            'ice': 'water.png',
-            'dragon': 'gym.png',
-            'psychic': 'gym.png',
-            'electric': 'gym.png',
-            'fire': 'gym.png',
-            'fairy': 'gym.png',
-            'ghost': 'gym.png',
-            'dark': 'gym.png',
-            'steel': 'gym.png',
-            'poison': 'gym.png',
-            'flying': 'grass.png'  
-        }
-        
-        # Default to grass background
-        bg_file = background_mapping.get(pokemon_type, 'grass.png')
-        
-        # Load and return background image
-        return pygame.image.load(os.path.join(BATTLE_IMAGES_DIR, bg_file))
+        path = battle_background_path(self.enemy_pokemon.types)
+        if path != self.background_path:
+            self.background = load_image(path, (WINDOW_WIDTH, WINDOW_HEIGHT))
+            self.background_path = path
         
     def setup_battle_ui(self):
         # Battle command buttons 
@@ -160,23 +188,37 @@ class BattleSystem:
         }
         
         for button in self.command_buttons.values():
-            try:
-                button.font = pygame.font.Font(os.path.join(FONTS_DIR, "pokemonsolid.ttf"), 20) 
-            except:
-                button.font = pygame.font.Font(None, 20)
+            button.font = load_font(20)
+        
+        # Only the widgets of the current menu are hit tested
+        self.layers = {
+            'main': WidgetLayer(self.command_buttons.values()),
+            'fight': WidgetLayer(),
+            'pokemon': WidgetLayer()
+        }
+        self.active_layer = None
+        
+    def setup_move_buttons(self):
+        # Move buttons follow the active Pokemon, keyed by slot, a button is made once per slot and move
+        button_width = int(WINDOW_WIDTH * 0.45 / 2) - 15  
+        button_height = 50
+        button_y = WINDOW_HEIGHT - button_height - 10
+        button_x_start = WINDOW_WIDTH - (WINDOW_WIDTH * 0.45) + 10  
         
         self.move_buttons = {}
-        for i, move in enumerate(self.player_pokemon.moves):
-            x = button_x_start if i < 2 else button_x_start + button_width + 10
-            y = button_y if i % 2 == 0 else button_y - button_height - 5
-            self.move_buttons[move] = Button(x, y, button_width, button_height,
-                                           move.capitalize(), BLUE, (150, 150, 255))
-            try:
-                self.move_buttons[move].font = pygame.font.Font(os.path.join(FONTS_DIR, "pokemonsolid.ttf"), 20)
-            except:
-                self.move_buttons[move].font = pygame.font.Font(None, 20)
+        for i, (move, move_id) in enumerate(zip(self.player_pokemon.moves, self.player_pokemon.move_ids)):
+            button = self.move_button_pool.get((i, move_id))
+            if button is None:
+                x = button_x_start if i < 2 else button_x_start + button_width + 10
+                y = button_y if i % 2 == 0 else button_y - button_height - 5
+                button = Button(x, y, button_width, button_height, move.capitalize(), BLUE, (150, 150, 255),
+                                font=load_font(20))
+                self.move_button_pool[(i, move_id)] = button
+            self.move_buttons[i] = button
+        self.layers['fight'].set_widgets(self.move_buttons.values())
     
     def setup_pokemon_switch_ui(self):
+        # Buttons and scaled sprites are kept per party member, only their HP label is refreshed
         button_width = WINDOW_WIDTH // 3
         button_height = 50
         self.pokemon_switch_buttons = {}
@@ -184,44 +226,22 @@ class BattleSystem:
         for i, pokemon in enumerate(self.all_player_pokemon):
             x = (WINDOW_WIDTH - button_width) // 2
             y = 200 + i * (button_height + 10)
+            text = f"{pokemon.name} (HP: {pokemon.current_hp}/{pokemon.stats['hp']})"
             
-            button = Button(x, y, button_width, button_height,
-                f"{pokemon.name} (HP: {pokemon.current_hp}/{pokemon.stats['hp']})",
-                BLUE, (150, 150, 255)
-            )
-            
-            try:
-                button.font = pygame.font.Font(os.path.join(FONTS_DIR, "pokemonsolid.ttf"), 16)  # Reduced font size
-            except:
-                button.font = pygame.font.Font(None, 16)
-            
-
-            sprite_size = button_height - 10  
-            button.pokemon_sprite = pygame.transform.scale(pokemon.sprite, (sprite_size, sprite_size))
-            
-            def custom_draw(button, screen):
-                button_surface = pygame.Surface((button.rect.width, button.rect.height), pygame.SRCALPHA)
-                pygame.draw.rect(button_surface, BUTTON_BLACK, button_surface.get_rect(), border_radius=15)
-                screen.blit(button_surface, button.rect)
-                
-                border_color = BRIGHT_YELLOW if button.is_hovered else BLACK
-                border_width = 3 if button.is_hovered else 2
-                pygame.draw.rect(screen, border_color, button.rect, border_width, border_radius=15)
-                
-
-                sprite_x = button.rect.x + 5
-                sprite_y = button.rect.y + (button.rect.height - sprite_size) // 2
-                screen.blit(button.pokemon_sprite, (sprite_x, sprite_y))
-                
-                text_surface = button.font.render(button.text, True, BRIGHT_YELLOW)
-                text_rect = text_surface.get_rect()
-                text_rect.centerx = button.rect.centerx + sprite_size//2 
-                text_rect.centery = button.rect.centery
-                screen.blit(text_surface, text_rect)
-            
-            button.custom_draw = lambda screen, btn=button: custom_draw(btn, screen)
-            
+            button = self.switch_button_pool.get(pokemon)
+            if button is None:
+                button = self.switch_button_pool[pokemon] = PokemonSwitchButton(x, y, button_width, button_height,
+                                                                                pokemon)
+            button.rect.x, button.rect.y = x, y
+            button.text = text
+            button.enabled = pokemon != self.player_pokemon and not pokemon.is_fainted()
             self.pokemon_switch_buttons[pokemon] = button
+        self.layers['pokemon'].set_widgets(self.pokemon_switch_buttons.values())
+        
+        # Forget Pokemon that left the party
+        for pokemon in list(self.switch_button_pool):
+            if pokemon not in self.pokemon_switch_buttons:
+                del self.switch_button_pool[pokemon]
     
     def draw_hp_box(self, pokemon, x, y, is_player):
         box_width = 200
@@ -231,7 +251,7 @@ class BattleSystem:
         pygame.draw.rect(hp_surface, (200, 200, 200, 180), hp_surface.get_rect(), border_radius=15)  
         self.screen.blit(hp_surface, (x, y))
         
-        font = pygame.font.Font(None, 24)
+        font = load_font(24, None)
         
         name_text = font.render(pokemon.name, True, BLACK)
         self.screen.blit(name_text, (x + 10, y + 5))
@@ -239,7 +259,8 @@ class BattleSystem:
         level_text = font.render(f"Lv.{pokemon.level}", True, BLACK)
         self.screen.blit(level_text, (x + box_width - 60, y + 5))
         
-        hp_percent = pokemon.current_hp / pokemon.stats['hp']
+        shown_hp = self.display_hp.get(pokemon, pokemon.current_hp)
+        hp_percent = shown_hp / pokemon.stats['hp']
         bar_width = 180
         bar_height = 10
         bar_x = x + 10
@@ -250,12 +271,12 @@ class BattleSystem:
         pygame.draw.rect(self.screen, hp_color,
                         (bar_x + 1, bar_y + 1, int(bar_width * hp_percent), bar_height - 2))
         
-        hp_text = font.render(f"{pokemon.current_hp}/{pokemon.stats['hp']}", True, BLACK)
+        hp_text = font.render(f"{round(shown_hp)}/{pokemon.stats['hp']}", True, BLACK)
         self.screen.blit(hp_text, (x + 10, y + 45))
         
         # Experience (only for player's Pokemon)
         if is_player:
-            exp_text = font.render(f"EXP: {pokemon.experience}/{pokemon.level * 100}", True, BLACK)
+            exp_text = font.render(f"EXP: {pokemon.experience}/{pokemon.experience_needed()}", True, BLACK)
             self.screen.blit(exp_text, (x + 10, y + 65))
         
         # Draw state icon if Pokemon has a state
@@ -275,7 +296,7 @@ class BattleSystem:
         pygame.draw.rect(log_surface, (255, 255, 255, 255), log_surface.get_rect(), border_radius=15)
         self.screen.blit(log_surface, (log_x, log_y))
         
-        font = pygame.font.Font(None, 24)
+        font = load_font(24, None)
         for i, message in enumerate(self.message_log[-4:]): 
             text = font.render(message, True, BLACK)
             self.screen.blit(text, (log_x + 10, log_y + 10 + i * 25))
@@ -283,263 +304,264 @@ class BattleSystem:
     def add_message(self, message):
         self.message_log.append(message)
         
-    def calculate_damage(self, attacker, defender, move):
-        base_damage = attacker.stats['attack'] // 5
-        damage = random.randint(base_damage - 5, base_damage + 5)
-        return max(1, damage)
-        
     def load_attack_animations(self):
-        # Debug: Print current directory and full path
-        print(f"Current working directory: {os.getcwd()}")
-        print(f"BATTLE_ATTACKS_DIR: {BATTLE_ATTACKS_DIR}")
-        print(f"Directory exists: {os.path.exists(BATTLE_ATTACKS_DIR)}")
-        print(f"Directory contents: {os.listdir(BATTLE_ATTACKS_DIR) if os.path.exists(BATTLE_ATTACKS_DIR) else 'Directory not found'}")
-        
-        self.attack_frames = {}
-        attack_types = ['normal', 'fire', 'water', 'electric']
-        
-        for attack_type in attack_types:
-            gif_path = os.path.join(BATTLE_ATTACKS_DIR, f'{attack_type}.gif')
-            print(f"Trying to load: {gif_path}")
-            print(f"File exists: {os.path.exists(gif_path)}")
-            try:
-                frames = []
-                with Image.open(gif_path) as gif:
-                    for frame_idx in range(gif.n_frames):
-                        gif.seek(frame_idx)
-                        frame_str = gif.convert('RGBA').tobytes()
-                        frame_surf = pygame.image.fromstring(
-                            frame_str, gif.size, 'RGBA')
-                        frames.append(frame_surf)
-                self.attack_frames[attack_type] = frames
-            except Exception as e:
-                print(f"Error loading {attack_type}.gif: {e}")
-                print(f"Tried to load from: {gif_path}")
-                self.attack_frames[attack_type] = []
+        # Frames are baked and loaded once at startup, shared by every battle
+        self.attack_frames = load_attack_frames()
                 
-    def get_move_type(self, move):
-        # Convert move name to lowercase and replace hyphens with spaces
-        move = move.lower().strip().replace('-', ' ')
-        
-        move_types = {
-            # Normal moves
-            'tackle': 'normal',
-            'scratch': 'normal',
-            'pound': 'normal',
-            'quick attack': 'normal',
-            'slam': 'normal',
-            'cut': 'normal',
-            'double kick': 'normal',
-            
-            # Fire moves
-            'ember': 'fire',
-            'flamethrower': 'fire',
-            'fire blast': 'fire',
-            'fire punch': 'fire',
-            'flame wheel': 'fire',
-            
-            # Water moves
-            'water gun': 'water',
-            'bubble': 'water',
-            'hydro pump': 'water',
-            'surf': 'water',
-            'waterfall': 'water',
-            'aqua jet': 'water',
-            
-            # Electric moves
-            'thundershock': 'electric',
-            'thunderbolt': 'electric',
-            'thunder': 'electric',
-            'thunder punch': 'electric',  
-            'spark': 'electric',
-            'thunder wave': 'electric',
-            'volt tackle': 'electric'
-        }
-        
-        move_type = move_types.get(move, 'normal')
-        print(f"Move: '{move}' (original: '{move}'), Type: {move_type}")  
-        
-        # Verify animation exists
-        if move_type in self.attack_frames:
-            if not self.attack_frames[move_type]:
-                print(f"Warning: No frames loaded for {move_type} type")
-                return 'normal'
-        else:
-            print(f"Warning: No animation found for {move_type} type")
+    def get_move_type(self, move_id):
+        # Animation type comes straight from the compiled move table
+        move_type = self.moves.animations[move_id]
+        if not self.attack_frames.get(move_type):
             return 'normal'
-            
         return move_type
         
     def apply_state_effects(self, pokemon):
-        if not pokemon.state:
-            return True
-            
-        effect = self.state_effects[pokemon.state]
-        
-        # Apply damage for poison/burn
-        if 'damage_per_turn' in effect:
-            damage = effect['damage_per_turn'](pokemon)
-            pokemon.take_damage(damage)
-            self.add_message(effect['message'].format(pokemon=pokemon.name))
-        
-        # Handle duration-based states
-        if effect['duration']:
-            pokemon.state_duration += 1
-            if pokemon.state_duration >= effect['duration']:
-                pokemon.state = None
-                pokemon.state_duration = 0
-                self.add_message(f"{pokemon.name} recovered from {pokemon.state}!")
-        
-        return effect['can_attack']
+        return apply_state_effects(pokemon, self.message_log)
 
-    def handle_attack(self, attacker, defender, move):
+    def handle_attack(self, attacker, defender, move_id):
+        """Resolve an attack and schedule its animation, returns whether the defender fainted"""
+        start_hp = {attacker: attacker.current_hp, defender: defender.current_hp}
+        messages = []
+        
         # Check if Pokemon can attack based on state
-        if not self.apply_state_effects(attacker):
-            self.add_message(self.state_effects[attacker.state]['message'].format(
-                pokemon=attacker.name))
+        if not apply_state_effects(attacker, messages):
+            self.reveal_attack(messages, start_hp)
             return False
-            
-        attack_type = self.get_move_type(move)
-        print(f"Executing attack animation for type: {attack_type}")
         
-        if attack_type in self.attack_frames and self.attack_frames[attack_type]:
-            frames = self.attack_frames[attack_type]
-            
-            # Store current music channel state
-            current_music = pygame.mixer.Channel(0).get_busy()
-            
-            if attack_type in self.attack_sounds:
-                try:
-                    # Use a different channel for attack sounds
-                    attack_channel = pygame.mixer.Channel(1)
-                    attack_channel.play(self.attack_sounds[attack_type])
-                    print(f"Playing {attack_type} sound")
-                except Exception as e:
-                    print(f"Error playing sound: {e}")
+        # Roll and apply damage, then check for state effects
+        damage, inflict = roll_attack(attacker, move_id, self.rng)
+        log.debug("%s used %s: %d damage, ailment %s", attacker.name, self.moves.names[move_id], damage, inflict)
+        fainted = apply_attack(attacker, defender, move_id, damage, inflict, messages)
+        
+        # Keep showing the old HP until the attack lands
+        for pokemon, hp in start_hp.items():
+            if pokemon.current_hp != hp:
+                self.display_hp[pokemon] = hp
+        
+        impact_delay = self.schedule_projectile(attacker, move_id)
+        self.timeline.call(lambda: self.on_attack_impact(attacker != self.player_pokemon, messages, start_hp),
+                           delay=impact_delay)
+        return fainted
+        
+    def schedule_projectile(self, attacker, move_id):
+        """Schedule the projectile track, returns the delay until it hits"""
+        attack_type = self.get_move_type(move_id)
+        frames = self.attack_frames.get(attack_type)
+        if not frames:
+            return 0.0
+        
+        self.audio.play(f'attack_{attack_type}', pool='attack')
+        
+        if attacker == self.player_pokemon:
+            start = (180, WINDOW_HEIGHT//2 + 30)
+            end = (WINDOW_WIDTH - 280, WINDOW_HEIGHT//4 + 30)
+        else:
+            start = (WINDOW_WIDTH - 280, WINDOW_HEIGHT//4 + 30)
+            end = (180, WINDOW_HEIGHT//2 + 30)
+        
+        self.projectile = {'frames': frames, 'start': start, 'end': end, 'progress': 0.0}
+        if self.particles.enabled:
+            self.trail = Emitter(self.particles, attack_type, start)
+        
+        def update_projectile(progress):
+            self.projectile['progress'] = progress
+            if self.trail:
+                self.trail.position = self.projectile_position(progress)
+        
+        def end_projectile():
+            self.projectile = None
+            self.trail = None
+            self.particles.emit(attack_type, end)
+        
+        self.timeline.add(PROJECTILE_DURATION, update_projectile, end_projectile)
+        return PROJECTILE_DURATION
+        
+    def on_attack_impact(self, is_defender_player, messages, start_hp):
+        self.shake_and_flash_pokemon(is_defender_player)
+        self.reveal_attack(messages, start_hp)
+        
+    def reveal_attack(self, messages, start_hp):
+        """Show an attack's messages and drain the HP bars of the Pokemon it hurt"""
+        self.message_log.extend(messages)
+        for pokemon, hp in start_hp.items():
+            if pokemon.current_hp == hp:
+                continue
             
-            if attacker == self.player_pokemon:
-                start_x = 180
-                start_y = WINDOW_HEIGHT//2 + 30
-                end_x = WINDOW_WIDTH - 280
-                end_y = WINDOW_HEIGHT//4 + 30
-                is_defender_player = False
-            else:
-                start_x = WINDOW_WIDTH - 280
-                start_y = WINDOW_HEIGHT//4 + 30
-                end_x = 180
-                end_y = WINDOW_HEIGHT//2 + 30
-                is_defender_player = True
+            def drain(progress, pokemon=pokemon, hp=hp):
+                self.display_hp[pokemon] = hp + (pokemon.current_hp - hp) * progress
             
-            for frame_idx in range(len(frames)):
-                self.draw()
-                
-                for element in range(5):
-                    element_progress = (frame_idx / (len(frames) - 1)) - (element * 0.15)
-                    if 0 <= element_progress <= 1:
-                        frame = frames[frame_idx % len(frames)]
-                        size = 70
-                        scaled_frame = pygame.transform.scale(frame, (size, size))
-                        
-                        x = start_x + (end_x - start_x) * element_progress
-                        y = start_y + (end_y - start_y) * element_progress
-                        
-                        self.screen.blit(scaled_frame, (x - size//2, y - size//2))
-                
-                pygame.display.flip()
-                pygame.time.Clock().tick(300)
+            self.display_hp[pokemon] = hp
+            self.timeline.add(HP_DRAIN_DURATION, drain,
+                              lambda pokemon=pokemon: self.display_hp.pop(pokemon, None), ease=ease_out)
+        
+    def begin_enemy_turn(self):
+        # The enemy AI searches on its worker thread while the battle keeps rendering
+        self.battle_state = 'enemy_turn'
+        state = BattleState.from_pokemon(self.player_pokemon, self.enemy_pokemon)
+        self.enemy_move_future = self.enemy_ai.request_move(state)
+        
+    def handle_enemy_turn(self, slot):
+        self.enemy_move_future = None
+        self.record(ENEMY_ATTACK, slot)
+        self.battle_state = 'animating'
+        if self.handle_attack(self.enemy_pokemon, self.player_pokemon, self.enemy_pokemon.move_ids[slot]):
+            self.pending_result = 'defeat'
+        else:
+            self.after_animation = self.end_turn
+        
+    def end_turn(self):
+        self.battle_state = 'main'
+        
+    # Player commands, recorded in order when a replay is being recorded
+    
+    def start_recording(self):
+        self.replay = Replay.from_battle(self.seed, self.all_player_pokemon, self.player_pokemon,
+                                         self.enemy_pokemon, self.bag_items)
+        
+    def record(self, command, argument=0):
+        if self.replay:
+            self.replay.record(command, argument)
             
-            # Add shake and flash effect when attack hits
-            self.shake_and_flash_pokemon(is_defender_player)
-        
-        # Calculate and apply damage
-        damage = self.calculate_damage(attacker, defender, move)
-        defender.take_damage(damage)
-        self.add_message(f"{attacker.name} used {move}!")
-        self.add_message(f"{defender.name} took {damage} damage!")
-        
-        # Check for state effects
-        move_lower = move.lower().strip().replace('-', ' ')
-        if move_lower in self.move_state_effects:
-            effect = self.move_state_effects[move_lower]
-            if random.random() < effect['chance']:
-                defender.state = effect['state']
-                defender.state_duration = 0
-                self.add_message(f"{defender.name} was {effect['state']}!")
-        
-        if defender.is_fainted():
-            self.add_message(f"{defender.name} fainted!")
-            return True
-        return False
-        
-    def handle_enemy_turn(self):
-        move = random.choice(self.enemy_pokemon.moves)
-        return self.handle_attack(self.enemy_pokemon, self.player_pokemon, move)
+    def save_replay(self, result):
+        if not self.replay:
+            return None
+        self.replay.finish(result, self.all_player_pokemon, self.enemy_pokemon)
+        os.makedirs(REPLAY_DIR, exist_ok=True)
+        path = os.path.join(REPLAY_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{self.seed:016x}.rpl")
+        self.replay.save(path)
+        return path
+        
+    def command_attack(self, slot):
+        self.record(ATTACK, slot)
+        self.battle_started = True
+        self.battle_state = 'animating'
+        if self.handle_attack(self.player_pokemon, self.enemy_pokemon, self.player_pokemon.move_ids[slot]):
+            self.pending_result = 'victory'
+        else:
+            self.after_animation = self.begin_enemy_turn
+        return 'continue'
+        
+    def command_item(self, index):
+        self.record(ITEM, index)
+        return self.handle_bag(self.bag_items[index])
+        
+    def command_switch(self, pokemon):
+        self.record(SWITCH, self.all_player_pokemon.index(pokemon))
+        self.player_pokemon = pokemon
+        self.setup_move_buttons()
+        self.battle_state = 'main'
+        self.add_message(f"Go, {pokemon.name}!")
+        self.battle_started = True  
+        
+        # Enemy gets a free attack when switching
+        self.begin_enemy_turn()
+        return 'continue'
+        
+    def command_run(self):
+        self.record(RUN)
+        if not self.battle_started:
+            self.add_message(f"{self.player_pokemon.name} chose to run away!")
+            return 'run'
+        self.add_message(f"Too late. {self.player_pokemon.name} cannot run!")
+        return 'continue'
+        
+    def update(self, dt):
+        self.timeline.update(dt)
+        self.animation_time += dt * 6
+        if self.trail:
+            self.trail.update(dt * self.timeline.speed)
+        self.particles.update(dt * self.timeline.speed)
+        
+        # Turn flow waits for scheduled animations to finish
+        if self.timeline.busy:
+            return 'continue'
+        if self.pending_result:
+            return self.pending_result
+        if self.after_animation:
+            after_animation, self.after_animation = self.after_animation, None
+            after_animation()
+        if self.battle_state == 'enemy_turn' and self.enemy_move_future.done():
+            self.handle_enemy_turn(self.enemy_move_future.result())
+        return 'continue'
         
     def shake_and_flash_pokemon(self, is_player):
-        self.shake_frames = 10
         self.shake_target = 'player' if is_player else 'enemy'
-        self.is_shaking = True
-        self.flash_alpha = 180
         
-        try:
-            impact_channel = pygame.mixer.Channel(1) 
-            impact_channel.play(self.impact_sound)
-        except Exception as e:
-            print(f"Error playing impact sound: {e}")
+        def shake(progress):
+            self.shake_offset = 10 if int(progress * 10) % 2 == 0 else -10
+            self.flash_alpha = int(180 * (1 - progress))
+        
+        def stop_shake():
+            self.shake_target = None
+            self.shake_offset = 0
+            self.flash_alpha = 0
+        
+        self.timeline.add(SHAKE_DURATION, shake, stop_shake)
+        self.audio.play('impact', pool='impact')
+
+    def projectile_position(self, progress):
+        (start_x, start_y), (end_x, end_y) = self.projectile['start'], self.projectile['end']
+        return start_x + (end_x - start_x) * progress, start_y + (end_y - start_y) * progress
+
+    def draw_projectile(self):
+        frames = self.projectile['frames']
+        frame = frames[min(int(self.projectile['progress'] * len(frames)), len(frames) - 1)]
+        if self.particles.enabled:
+            # The particle trail follows the head
+            x, y = self.projectile_position(self.projectile['progress'])
+            self.screen.blit(frame, (x - PROJECTILE_SIZE//2, y - PROJECTILE_SIZE//2))
+            return
+        
+        # Without particles the head travels the full path and four trailing copies follow behind it
+        head_progress = self.projectile['progress'] * (1 + PROJECTILE_TRAIL * 0.15)
+        for element in range(PROJECTILE_TRAIL + 1):
+            element_progress = head_progress - element * 0.15
+            if 0 <= element_progress <= 1:
+                x, y = self.projectile_position(element_progress)
+                self.screen.blit(frame, (x - PROJECTILE_SIZE//2, y - PROJECTILE_SIZE//2))
 
     def draw(self):
         # Draw background
         self.screen.blit(self.background, (0, 0))
         
-        # Update animation time
-        self.animation_time += 0.1
-        
         # Calculate floating offset 
         float_offset = self.float_amplitude * math.sin(self.animation_time * self.animation_speed)
         
-        # Update shake animation if active
-        if self.is_shaking:
-            self.shake_offset = 10 if (self.shake_frames % 2) == 0 else -10
-            self.shake_frames -= 1
-            if self.shake_frames <= 0:
-                self.is_shaking = False
-                self.shake_offset = 0
-                self.flash_alpha = 0
-            
         # Draw Pokemon sprites with animation
         player_pos = (100, WINDOW_HEIGHT//2 + float_offset)
         enemy_pos = (WINDOW_WIDTH - 200, WINDOW_HEIGHT//4 - float_offset)
         
         # Apply shake offset if shaking
-        if self.is_shaking:
+        if self.shake_target:
             if self.shake_target == 'player':
                 player_pos = (player_pos[0] + self.shake_offset, player_pos[1])
             else:
                 enemy_pos = (enemy_pos[0] + self.shake_offset, enemy_pos[1])
         
-        scaled_player_sprite = pygame.transform.scale(self.player_pokemon.sprite, 
-            (int(self.player_pokemon.sprite.get_width() * 2.0), 
-             int(self.player_pokemon.sprite.get_height() * 2.0)))
-        flipped_sprite = pygame.transform.flip(scaled_player_sprite, True, False)
+        flipped_sprite = scaled_image(self.player_pokemon.sprite, 2, flip=True)
+        scaled_enemy_sprite = scaled_image(self.enemy_pokemon.sprite, 2)
+        # Positions are of the whole 2x frame, the cropped sprites sit at their anchor in it
+        offset_x, offset_y = self.player_pokemon.sprite_offset(2, flip=True)
+        player_sprite_pos = (player_pos[0] + offset_x, player_pos[1] + offset_y)
+        offset_x, offset_y = self.enemy_pokemon.sprite_offset(2)
+        enemy_sprite_pos = (enemy_pos[0] + offset_x, enemy_pos[1] + offset_y)
         
-        scaled_enemy_sprite = pygame.transform.scale(self.enemy_pokemon.sprite,
-            (int(self.enemy_pokemon.sprite.get_width() * 2.0),
-             int(self.enemy_pokemon.sprite.get_height() * 2.0)))
+        self.screen.blit(flipped_sprite, player_sprite_pos)
+        self.screen.blit(scaled_enemy_sprite, enemy_sprite_pos)
         
-        # Apply red tint to the hit Pokemon
-        if self.is_shaking and self.flash_alpha > 0:
+        # Fade a red tinted copy over the hit Pokemon as the flash wears off
+        if self.flash_alpha > 0:
             if self.shake_target == 'player':
-                tinted_sprite = flipped_sprite.copy()
-                tinted_sprite.fill((255, 0, 0, self.flash_alpha), special_flags=pygame.BLEND_RGBA_MULT)
-                self.screen.blit(tinted_sprite, player_pos)
+                tinted_sprite, tinted_pos = flipped_sprite.copy(), player_sprite_pos
             else:
-                tinted_sprite = scaled_enemy_sprite.copy()
-                tinted_sprite.fill((255, 0, 0, self.flash_alpha), special_flags=pygame.BLEND_RGBA_MULT)
-                self.screen.blit(tinted_sprite, enemy_pos)
-            self.flash_alpha = max(0, self.flash_alpha - 20)  # Fade out the flash
-        else:
-            self.screen.blit(flipped_sprite, player_pos)
-            self.screen.blit(scaled_enemy_sprite, enemy_pos)
+                tinted_sprite, tinted_pos = scaled_enemy_sprite.copy(), enemy_sprite_pos
+            tinted_sprite.fill((255, 0, 0), special_flags=pygame.BLEND_RGB_MULT)
+            tinted_sprite.set_alpha(self.flash_alpha)
+            self.screen.blit(tinted_sprite, tinted_pos)
+        
+        self.particles.draw(self.screen)
+        if self.projectile:
+            self.draw_projectile()
         
         self.draw_hp_box(self.player_pokemon, player_pos[0], player_pos[1] - 120, True)
         self.draw_hp_box(self.enemy_pokemon, enemy_pos[0] - 25, enemy_pos[1] - 120, False)
@@ -547,235 +569,130 @@ class BattleSystem:
         self.draw_message_log()
         
         # Draw buttons based on battle state
-        if self.battle_state == 'main':
-            for button in self.command_buttons.values():
-                button.draw(self.screen)
-        elif self.battle_state == 'fight':
-            for button in self.move_buttons.values():
-                button.draw(self.screen)
-        elif self.battle_state == 'pokemon':
-            for button in self.pokemon_switch_buttons.values():
-                button.draw(self.screen)
-        
-        pygame.display.flip()
+        if self.battle_state in self.layers:
+            self.layers[self.battle_state].draw(self.screen)
+        elif self.battle_state == 'bag':
+            self.draw_bag_menu()
         
     def handle_events(self, event):
     
-        if event.type == pygame.MOUSEMOTION:
-            # Update hover state for all buttons
-            for button in self.command_buttons.values():
-                button.handle_event(event)
-            for button in self.move_buttons.values():
-                button.handle_event(event)
-            if self.battle_state == 'pokemon':
-                for button in self.pokemon_switch_buttons.values():
-                    button.handle_event(event)
-                    
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            if self.battle_state == 'main':
-                for action, button in self.command_buttons.items():
-                    if button.rect.collidepoint(event.pos):
-                        if action == 'fight':
-                            self.battle_started = True  
-                            self.battle_state = 'fight'
-                            return 'continue'
-                        elif action == 'bag':
-                            self.battle_state = 'bag'
-                            return self.handle_bag()
-                        elif action == 'pokemon':
-                            self.battle_state = 'pokemon'
-                            self.setup_pokemon_switch_ui()
-                            return 'continue'
-                        elif action == 'run':
-                            if not self.battle_started:
-                                self.add_message(f"{self.player_pokemon.name} chose to run away!")
-                                return 'run'
-                            else:
-                                self.add_message(f"Too late. {self.player_pokemon.name} cannot run!")
-                                return 'continue'
-                            
-            elif self.battle_state == 'fight':
-                for move, button in self.move_buttons.items():
-                    if button.rect.collidepoint(event.pos):
-                        if self.handle_attack(self.player_pokemon, self.enemy_pokemon, move):
-                            return 'victory'
-                            
-                        if self.handle_enemy_turn():
-                            return 'defeat'
-                            
-                        self.battle_state = 'main'
-                        return 'continue'
-            
-            elif self.battle_state == 'pokemon':
-                for pokemon, button in self.pokemon_switch_buttons.items():
-                    if button.rect.collidepoint(event.pos):
-                        if pokemon != self.player_pokemon and not pokemon.is_fainted():
-                            self.player_pokemon = pokemon
-                            self.battle_state = 'main'
-                            self.add_message(f"Go, {pokemon.name}!")
-                            self.battle_started = True  
-                            
-                            # Enemy gets a free attack when switching
-                            if self.handle_enemy_turn():
-                                return 'defeat'
-                            
-                            return 'continue'
+        # Hold space to fast-forward battle animations
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+            self.timeline.speed = BATTLE_ANIMATION_SPEED * BATTLE_FAST_FORWARD
+        elif event.type == pygame.KEYUP and event.key == pygame.K_SPACE:
+            self.timeline.speed = BATTLE_ANIMATION_SPEED
+        
+        if self.battle_state == 'bag':
+            return self.handle_bag_event(event)
+        
+        layer = self.layers.get(self.battle_state)
+        if layer is not self.active_layer:
+            # Hover highlights do not carry over to the next menu
+            if self.active_layer:
+                self.active_layer.clear_hover()
+            self.active_layer = layer
+        if layer is None:
+            return 'continue'
+        clicked = layer.handle_event(event)
+        if clicked is None:
+            return 'continue'
         
-        return 'continue'
+        if self.battle_state == 'main':
+            if clicked is self.command_buttons['fight']:
+                self.battle_started = True  
+                self.battle_state = 'fight'
+            elif clicked is self.command_buttons['bag']:
+                self.battle_state = 'bag'
+                self.bag_selection = 0
+            elif clicked is self.command_buttons['pokemon']:
+                self.battle_state = 'pokemon'
+                self.setup_pokemon_switch_ui()
+            elif clicked is self.command_buttons['run']:
+                return self.command_run()
         
-    def run(self):
-        self.add_message(f"A wild {self.enemy_pokemon.name} appeared! What {self.player_pokemon.name} will do?")
+        elif self.battle_state == 'fight':
+            for slot, button in self.move_buttons.items():
+                if button is clicked:
+                    return self.command_attack(slot)
         
-        running = True
-        while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    return 'quit'
-                
-                result = self.handle_events(event)
-                if result != 'continue':
-                    return result
-            
-            self.draw()
-            pygame.time.Clock().tick(FPS)
-
-    def show_bag_menu(self):
-        running = True
-        selected_index = 0
+        elif self.battle_state == 'pokemon':
+            # Fainted and active Pokemon are disabled, so never clicked
+            return self.command_switch(clicked.pokemon)
         
-        # Create a static background by taking a snapshot of the current battle scene
-        background = self.screen.copy()
+        return 'continue'
         
-        while running:
-            # Use the static background instead of continuously drawing the battle scene
-            self.screen.blit(background, (0, 0))
-            
-            menu_surface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
-            pygame.draw.rect(menu_surface, (0, 0, 0, 128), menu_surface.get_rect())
-            self.screen.blit(menu_surface, (0, 0))
-            
-            mouse_pos = pygame.mouse.get_pos()
-            
-            for i, item in enumerate(self.bag_items):
-                box_x = 50
-                box_y = 50 + i * 70
-                box_width = WINDOW_WIDTH - 100
-                box_height = 60
-                
-                item_rect = pygame.Rect(box_x, box_y, box_width, box_height)
-                if item_rect.collidepoint(mouse_pos):
-                    selected_index = i
-                
-                # Draw box with list of items
-                box_surface = pygame.Surface((box_width, box_height), pygame.SRCALPHA)
-                color = (255, 255, 255, 230) if i == selected_index else (200, 200, 200, 200)
-                pygame.draw.rect(box_surface, color, box_surface.get_rect(), border_radius=10)
-                self.screen.blit(box_surface, (box_x, box_y))
-                
-                # Draw item image
-                try:
-                    item_image = pygame.image.load(os.path.join(BATTLE_IMAGES_DIR, 'bag', item['image']))
-                    item_image = pygame.transform.scale(item_image, (32, 32))
-                    self.screen.blit(item_image, (box_x + 10, box_y + 14))
-                except:
-                    print(f"Could not load image: {item['image']}")
-                
-                # Draw item name and quantity with Pokemon font
-                try:
-                    font = pygame.font.Font(os.path.join(FONTS_DIR, "pokemonsolid.ttf"), 20)
-                except:
-                    font = pygame.font.Font(None, 24)
-                name_text = font.render(f"{item['name']} x{item['quantity']}", True, BLACK)
-                self.screen.blit(name_text, (box_x + 50, box_y + 10))
-                
-                # Draw description
-                desc_font = pygame.font.Font(None, 20)
-                desc_text = desc_font.render(item['description'], True, BLACK)
-                self.screen.blit(desc_text, (box_x + 50, box_y + 35))
-            
-            hint_font = pygame.font.Font(None, 24)
-            hint_text = hint_font.render("Press ENTER to use item, ESC to cancel", True, WHITE)
-            hint_rect = hint_text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT - 30))
-            self.screen.blit(hint_text, hint_rect)
-            
-            pygame.display.flip()
-            
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    return None
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        self.battle_state = 'main'
-                        return None
-                    elif event.key == pygame.K_RETURN:
-                        selected_item = self.bag_items[selected_index]
-                        if selected_item['quantity'] > 0:
-                            return selected_item
-                    elif event.key == pygame.K_UP:
-                        selected_index = (selected_index - 1) % len(self.bag_items)
-                    elif event.key == pygame.K_DOWN:
-                        selected_index = (selected_index + 1) % len(self.bag_items)
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    if event.button == 1:  # Left click
-                        selected_item = self.bag_items[selected_index]
-                        if selected_item['quantity'] > 0:
-                            return selected_item
-            
-            pygame.time.Clock().tick(60)
+    def bag_item_rect(self, index):
+        return pygame.Rect(50, 50 + index * 70, WINDOW_WIDTH - 100, 60)
+
+    def render_bag_overlay(self):
+        overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 128))
+        hint_text = load_font(24, None).render("Press ENTER to use item, ESC to cancel", True, WHITE)
+        overlay.blit(hint_text, hint_text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT - 30)))
+        return overlay
+
+    def render_bag_row(self, item, selected):
+        record = self.items[item['name']]
+        row = pygame.Surface(self.bag_item_rect(0).size, pygame.SRCALPHA)
+        color = (255, 255, 255, 230) if selected else (200, 200, 200, 200)
+        pygame.draw.rect(row, color, row.get_rect(), border_radius=10)
         
-        return None
+        try:
+            row.blit(load_image(bag_image_path(record), BAG_IMAGE_SIZE), (10, 14))
+        except:
+            log.warning("Could not load image: %s", record['image'])
+        
+        # Item name and quantity with Pokemon font, description below
+        row.blit(load_font(20).render(f"{item['name']} x{item['quantity']}", True, BLACK), (50, 10))
+        row.blit(load_font(20, None).render(record['description'], True, BLACK), (50, 35))
+        return row
+
+    def draw_bag_menu(self):
+        if self.bag_overlay is None:
+            self.bag_overlay = self.render_bag_overlay()
+        self.screen.blit(self.bag_overlay, (0, 0))
+        
+        # Rows are kept across battles and re-rendered only when their item, quantity or selection changes
+        for i, item in enumerate(self.bag_items):
+            key = (item['name'], item['quantity'], i == self.bag_selection)
+            cached = self.bag_rows.get(i)
+            if cached is None or cached[0] != key:
+                cached = self.bag_rows[i] = (key, self.render_bag_row(item, key[2]))
+            self.screen.blit(cached[1], self.bag_item_rect(i))
 
-    def handle_bag(self):
-        selected_item = self.show_bag_menu()
+    def handle_bag_event(self, event):
+        if not self.bag_items:
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                self.battle_state = 'main'
+            return 'continue'
+        selected_item = None
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                self.battle_state = 'main'
+            elif event.key == pygame.K_RETURN:
+                selected_item = self.bag_items[self.bag_selection]
+            elif event.key == pygame.K_UP:
+                self.bag_selection = (self.bag_selection - 1) % len(self.bag_items)
+            elif event.key == pygame.K_DOWN:
+                self.bag_selection = (self.bag_selection + 1) % len(self.bag_items)
+        elif event.type == pygame.MOUSEMOTION:
+            for i in range(len(self.bag_items)):
+                if self.bag_item_rect(i).collidepoint(event.pos):
+                    self.bag_selection = i
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            if event.button == 1:  # Left click
+                selected_item = self.bag_items[self.bag_selection]
+        
+        if selected_item and selected_item['quantity'] > 0:
+            return self.command_item(self.bag_items.index(selected_item))
+        return 'continue'
+
+    def handle_bag(self, selected_item):
         if selected_item:
-            if selected_item['name'] == 'Alarm':
-                if self.player_pokemon.state == 'asleep':
-                    self.player_pokemon.state = None
-                    self.player_pokemon.state_duration = 0
-                    self.add_message(f"{self.player_pokemon.name} woke up!")
-                else:
-                    self.add_message(f"{self.player_pokemon.name} is not asleep!")
-                selected_item['quantity'] -= 1
-            elif selected_item['name'] == 'Antidote':
-                if self.player_pokemon.state == 'poison':
-                    self.player_pokemon.state = None
-                    self.player_pokemon.state_duration = 0
-                    self.add_message(f"{self.player_pokemon.name} was cured of poison!")
-                else:
-                    self.add_message(f"{self.player_pokemon.name} is not poisoned!")
-                selected_item['quantity'] -= 1
-            elif selected_item['name'] == 'Heater':
-                if self.player_pokemon.state == 'freeze':
-                    self.player_pokemon.state = None
-                    self.player_pokemon.state_duration = 0
-                    self.add_message(f"{self.player_pokemon.name} was thawed out!")
-                else:
-                    self.add_message(f"{self.player_pokemon.name} is not frozen!")
-                selected_item['quantity'] -= 1
-            elif selected_item['name'] == 'Suncream':
-                if self.player_pokemon.state == 'burn':
-                    self.player_pokemon.state = None
-                    self.player_pokemon.state_duration = 0
-                    self.add_message(f"{self.player_pokemon.name} was cured of burn!")
-                else:
-                    self.add_message(f"{self.player_pokemon.name} is not burnt!")
-                selected_item['quantity'] -= 1
-            elif selected_item['name'] == 'Potion':
-                self.player_pokemon.current_hp = self.player_pokemon.stats['hp']  
-                self.add_message(f"{self.player_pokemon.name}'s health was restored!")
-                selected_item['quantity'] -= 1
-            elif selected_item['name'] == 'Pokeball':
-                selected_item['quantity'] -= 1
-                if random.random() < 0.25:  # 25% chance of success
-                    self.enemy_pokemon.current_hp = 0
-                    self.add_message(f"Gotcha! {self.enemy_pokemon.name} was caught!")
-                    return 'victory'
-                else:
-                    self.player_pokemon.current_hp = 0
-                    self.add_message(f"Oh no! {self.enemy_pokemon.name} broke free!")
-                    return 'defeat'
-            else:
-                self.add_message(f"Used {selected_item['name']}!")
-                selected_item['quantity'] -= 1
+            selected_item['quantity'] -= 1
+            result = use_item(selected_item['name'], self.player_pokemon, self.enemy_pokemon,
+                              self.rng, self.message_log)
+            if result:
+                return result
         self.battle_state = 'main'
-        return 'continue' 
\ No newline at end of file
+        return 'continue'
@@ -0,0 +1,285 @@
+import random
+from data.item_db import get_item_registry
+from data.move_db import get_move_database
+
+# State effect definitions
+STATE_EFFECTS = {
+    'poison': {
+        'damage_divisor': 8,
+        'duration': None,
+        'can_attack': True,
+        'message': '{pokemon} is hurt by poison!'
+    },
+    'burn': {
+        'damage_divisor': 16,
+        'duration': None,
+        'can_attack': True,
+        'message': '{pokemon} is hurt by its burn!'
+    },
+    'freeze': {
+        'duration': 3,
+        'can_attack': False,
+        'message': '{pokemon} is frozen solid!'
+    },
+    'asleep': {
+        'duration': 3,
+        'can_attack': False,
+        'message': '{pokemon} is fast asleep!'
+    }
+}
+
+DAMAGE_SPREAD = 5
+
+
+def damage_range(attacker):
+    """Lowest and highest damage an attacker can roll"""
+    base_damage = attacker.stats['attack'] // 5
+    return max(1, base_damage - DAMAGE_SPREAD), max(1, base_damage + DAMAGE_SPREAD)
+
+
+def roll_damage(attacker, rng=random):
+    base_damage = attacker.stats['attack'] // 5
+    damage = rng.randint(base_damage - DAMAGE_SPREAD, base_damage + DAMAGE_SPREAD)
+    return max(1, damage)
+
+
+def roll_attack(attacker, move_id, rng=random):
+    """Roll damage and ailment for an attack, in the order the battle consumes the RNG"""
+    moves = get_move_database()
+    damage = roll_damage(attacker, rng)
+    inflict = bool(moves.ailments[move_id]) and rng.random() < moves.ailment_chances[move_id]
+    return damage, inflict
+
+
+def apply_state_effects(pokemon, messages=None):
+    """Apply start of turn state effects, returns whether the Pokemon can attack"""
+    if not pokemon.state:
+        return True
+
+    effect = STATE_EFFECTS[pokemon.state]
+
+    # Apply damage for poison/burn
+    if 'damage_divisor' in effect:
+        damage = pokemon.stats['hp'] // effect['damage_divisor']
+        pokemon.current_hp = max(0, pokemon.current_hp - damage)
+        if messages is not None:
+            messages.append(effect['message'].format(pokemon=pokemon.name))
+
+    # Handle duration-based states
+    if effect['duration']:
+        pokemon.state_duration += 1
+        if pokemon.state_duration >= effect['duration']:
+            if messages is not None:
+                messages.append(f"{pokemon.name} recovered from {pokemon.state}!")
+            pokemon.state = None
+            pokemon.state_duration = 0
+            return True
+
+    if not effect['can_attack'] and messages is not None:
+        messages.append(effect['message'].format(pokemon=pokemon.name))
+    return effect['can_attack']
+
+
+def apply_attack(attacker, defender, move_id, damage, inflict, messages=None):
+    """Apply a rolled attack to the defender, returns whether it fainted"""
+    moves = get_move_database()
+    defender.current_hp = max(0, defender.current_hp - damage)
+    if messages is not None:
+        messages.append(f"{attacker.name} used {moves.names[move_id]}!")
+        messages.append(f"{defender.name} took {damage} damage!")
+
+    if inflict:
+        defender.state = moves.ailments[move_id]
+        defender.state_duration = 0
+        if messages is not None:
+            messages.append(f"{defender.name} was {defender.state}!")
+
+    if defender.current_hp <= 0:
+        if messages is not None:
+            messages.append(f"{defender.name} fainted!")
+        return True
+    return False
+
+
+# 'cure' items clear their 'state', 'message' and 'no_effect' say whether it worked, {pokemon} is the target
+def cure_item(item, pokemon, enemy, rng, messages):
+    if pokemon.state == item['state']:
+        pokemon.state = None
+        pokemon.state_duration = 0
+        messages.append(item['message'].format(pokemon=pokemon.name))
+    else:
+        messages.append(item['no_effect'].format(pokemon=pokemon.name))
+    return None
+
+
+def heal_item(item, pokemon, enemy, rng, messages):
+    # Items without an amount restore full health
+    amount = item.get('amount') or pokemon.stats['hp']
+    pokemon.current_hp = min(pokemon.stats['hp'], pokemon.current_hp + amount)
+    messages.append(f"{pokemon.name}'s health was restored!")
+    return None
+
+
+def catch_item(item, pokemon, enemy, rng, messages):
+    if rng.random() < item['chance']:
+        enemy.current_hp = 0
+        messages.append(f"Gotcha! {enemy.name} was caught!")
+        return 'victory'
+    pokemon.current_hp = 0
+    messages.append(f"Oh no! {enemy.name} broke free!")
+    return 'defeat'
+
+
+# Item effects by the 'effect' field of data/items.json
+ITEM_EFFECTS = {
+    'cure': cure_item,
+    'heal': heal_item,
+    'catch': catch_item
+}
+
+
+def use_item(item_name, pokemon, enemy, rng=random, messages=None):
+    """Apply a bag item for the active Pokemon, returns 'victory' or 'defeat' if it ends the battle"""
+    if messages is None:
+        messages = []
+
+    item = get_item_registry().get(item_name)
+    effect = ITEM_EFFECTS.get(item['effect']) if item else None
+    if effect is None:
+        messages.append(f"Used {item_name}!")
+        return None
+    return effect(item, pokemon, enemy, rng, messages)
+
+
+class Combatant:
+    """Minimal battle-relevant copy of a Pokemon"""
+    __slots__ = ('name', 'stats', 'current_hp', 'state', 'state_duration', 'move_ids')
+
+    def __init__(self, name, stats, current_hp, state, state_duration, move_ids):
+        self.name = name
+        self.stats = stats
+        self.current_hp = current_hp
+        self.state = state
+        self.state_duration = state_duration
+        self.move_ids = move_ids
+
+    @classmethod
+    def from_pokemon(cls, pokemon):
+        return cls(pokemon.name, pokemon.stats, pokemon.current_hp,
+                   pokemon.state, pokemon.state_duration, tuple(pokemon.move_ids))
+
+    def copy(self):
+        return Combatant(self.name, self.stats, self.current_hp,
+                         self.state, self.state_duration, self.move_ids)
+
+    def is_fainted(self):
+        return self.current_hp <= 0
+
+
+class BattleState:
+    """Two active combatants with cheap copy and snapshot/restore for search"""
+    __slots__ = ('player', 'enemy')
+
+    def __init__(self, player, enemy):
+        self.player = player
+        self.enemy = enemy
+
+    @classmethod
+    def from_pokemon(cls, player_pokemon, enemy_pokemon):
+        return cls(Combatant.from_pokemon(player_pokemon), Combatant.from_pokemon(enemy_pokemon))
+
+    def copy(self):
+        return BattleState(self.player.copy(), self.enemy.copy())
+
+    def snapshot(self):
+        player, enemy = self.player, self.enemy
+        return (player.current_hp, player.state, player.state_duration,
+                enemy.current_hp, enemy.state, enemy.state_duration)
+
+    def restore(self, snapshot):
+        player, enemy = self.player, self.enemy
+        (player.current_hp, player.state, player.state_duration,
+         enemy.current_hp, enemy.state, enemy.state_duration) = snapshot
+
+    def is_terminal(self):
+        return self.player.current_hp <= 0 or self.enemy.current_hp <= 0
+
+    def step(self, enemy_attacks, move_id, damage, inflict):
+        """Play one attack turn with the given rolls, returns whether the defender fainted"""
+        if enemy_attacks:
+            attacker, defender = self.enemy, self.player
+        else:
+            attacker, defender = self.player, self.enemy
+        if not apply_state_effects(attacker):
+            return False
+        return apply_attack(attacker, defender, move_id, damage, inflict)
+
+    def attack_outcomes(self, enemy_attacks, move_id, damage_buckets=3):
+        """Chance outcomes of an attack as (probability, damage, inflict) tuples"""
+        attacker = self.enemy if enemy_attacks else self.player
+        low, high = damage_range(attacker)
+        damages = sorted({low + round((high - low) * (2 * i + 1) / (2 * damage_buckets))
+                          for i in range(damage_buckets)})
+        moves = get_move_database()
+        chance = moves.ailment_chances[move_id] if moves.ailments[move_id] else 0.0
+        ailments = [(chance, True), (1.0 - chance, False)] if chance > 0 else [(1.0, False)]
+        weight = 1.0 / len(damages)
+        return [(weight * p, damage, inflict)
+                for damage in damages for p, inflict in ailments if p > 0]
+
+
+class HeadlessBattle:
+    """A battle between a party and a wild Pokemon driven by commands, without pygame
+
+    Commands follow the rules of the battle screen and consume the RNG in
+    the same order, so replays and the battle server play the same game.
+    Each command returns 'victory', 'defeat', 'run' or None while the
+    battle goes on.
+    """
+    __slots__ = ('party', 'active', 'enemy', 'bag', 'rng', 'started', 'result', 'messages')
+
+    def __init__(self, party, enemy, bag, rng, active=0, messages=None):
+        self.party = party
+        self.active = active
+        self.enemy = enemy
+        self.bag = bag  # [name, quantity] pairs
+        self.rng = rng
+        self.started = False
+        self.result = None
+        self.messages = messages
+
+    @property
+    def player(self):
+        return self.party[self.active]
+
+    def finish(self, result):
+        if result:
+            self.result = result
+        return result
+
+    def attack(self, slot, enemy_attacks=False):
+        self.started = True
+        attacker, defender = (self.enemy, self.player) if enemy_attacks else (self.player, self.enemy)
+        if not apply_state_effects(attacker, self.messages):
+            return None
+        move_id = attacker.move_ids[slot]
+        damage, inflict = roll_attack(attacker, move_id, self.rng)
+        if apply_attack(attacker, defender, move_id, damage, inflict, self.messages):
+            return self.finish('defeat' if enemy_attacks else 'victory')
+        return None
+
+    def use_item(self, index):
+        item = self.bag[index]
+        item[1] -= 1
+        return self.finish(use_item(item[0], self.player, self.enemy, self.rng, self.messages))
+
+    def switch(self, index):
+        self.active = index
+        self.started = True
+        return None
+
+    def run(self):
+        # Running away is only possible before the first attack or switch
+        if self.started:
+            return None
+        return self.finish('run')
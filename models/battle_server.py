@@ -0,0 +1,239 @@
+"""Headless battle server speaking line-delimited JSON, one object per line each way
+
+    {"id": 1, "op": "start", "party": [1, 4], "enemy": 7, "seed": 42}
+    {"id": 2, "op": "attack", "battle": 1, "move": 0}
+    {"id": 3, "op": "item", "battle": 1, "item": 4}
+    {"id": 4, "op": "switch", "battle": 1, "pokemon": 1}
+    {"id": 5, "op": "run", "battle": 1}
+    {"id": 6, "op": "end", "battle": 1}
+
+Every reply echoes the request id and carries the battle state, or an
+"error". After an attack or a switch the enemy answers within the same
+reply, unless the battle ended. "messages": true on start adds the battle log
+lines of each turn to the replies. Finished battles are dropped.
+"""
+import asyncio
+import json
+import random
+import os
+from config import DATA_DIR, SERVER_AI_DIFFICULTY, SERVER_MAX_LINE
+from data.item_db import starting_inventory
+from data.move_db import get_move_database
+from models.battle_rules import BattleState, Combatant, HeadlessBattle
+from models.enemy_ai import DIFFICULTY_LEVELS, EnemyAI
+from models.log import get_logger
+
+log = get_logger('server')
+
+DEFAULT_MOVES = ['tackle']
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def load_pokemon_records():
+    # data_loader builds pygame Pokemon, the server only needs the records
+    with open(os.path.join(DATA_DIR, 'pokemons.json'), 'r') as f:
+        return json.load(f)
+
+
+def combatant_from_data(pokemon_data):
+    moves = get_move_database()
+    return Combatant(pokemon_data['name'].capitalize(), pokemon_data['stats'], pokemon_data['stats']['hp'],
+                     None, 0, tuple(moves.intern(move) for move in pokemon_data['moves'] or DEFAULT_MOVES))
+
+
+def battle_state(battle):
+    """Compact state of a battle for a reply"""
+    return {
+        'active': battle.active,
+        'party': [[p.current_hp, p.state] for p in battle.party],
+        'enemy': [battle.enemy.current_hp, battle.enemy.state],
+        'bag': [quantity for _, quantity in battle.bag],
+        'result': battle.result
+    }
+
+
+class Session:
+    """Battles of one client connection and their enemy AIs, keyed by the ids handed out on start"""
+    __slots__ = ('server', 'battles', 'ais', 'next_id')
+
+    def __init__(self, server):
+        self.server = server
+        self.battles = {}
+        self.ais = {}
+        self.next_id = 1
+
+    def get(self, request):
+        battle = self.battles.get(request.get('battle'))
+        if battle is None:
+            raise ProtocolError("unknown battle")
+        return battle
+
+    async def handle(self, request):
+        op = request.get('op')
+        if op == 'start':
+            battle, ai = self.server.new_battle(request)
+            battle_id, self.next_id = self.next_id, self.next_id + 1
+            self.battles[battle_id] = battle
+            self.ais[battle_id] = ai
+            return {'battle': battle_id, 'state': battle_state(battle)}
+        if op == 'end':
+            self.battles.pop(request.get('battle'), None)
+            self.ais.pop(request.get('battle'), None)
+            return {}
+
+        battle = self.get(request)
+        if battle.messages is not None:
+            battle.messages.clear()
+        try:
+            if op == 'attack':
+                result = battle.attack(self.index(request, 'move', battle.player.move_ids))
+            elif op == 'item':
+                index = self.index(request, 'item', battle.bag)
+                if battle.bag[index][1] <= 0:
+                    raise ProtocolError("item used up")
+                result = battle.use_item(index)
+            elif op == 'switch':
+                index = self.index(request, 'pokemon', battle.party)
+                if index == battle.active or battle.party[index].is_fainted():
+                    raise ProtocolError("cannot switch to that Pokemon")
+                result = battle.switch(index)
+            elif op == 'run':
+                result = battle.run()
+                if result is None and battle.messages is not None:
+                    battle.messages.append(f"Too late. {battle.player.name} cannot run!")
+            else:
+                raise ProtocolError(f"unknown op {op!r}")
+
+            # As on the battle screen, the enemy answers attacks and switches
+            if result is None and op in ('attack', 'switch'):
+                await self.server.enemy_turn(battle, self.ais[request.get('battle')])
+        finally:
+            if battle.result:
+                self.battles.pop(request.get('battle'), None)
+                self.ais.pop(request.get('battle'), None)
+        return self.reply(request, battle)
+
+    def reply(self, request, battle):
+        reply = {'battle': request.get('battle'), 'state': battle_state(battle)}
+        if battle.messages is not None:
+            reply['messages'] = list(battle.messages)
+        return reply
+
+    @staticmethod
+    def index(request, field, options):
+        index = request.get(field)
+        if not isinstance(index, int) or not 0 <= index < len(options):
+            raise ProtocolError(f"invalid {field}")
+        return index
+
+
+class BattleServer:
+    """Hosts headless battles for many clients from one asyncio loop
+
+    Battles use the game's battle rules and items through HeadlessBattle.
+    Random enemy moves are picked inline, searching difficulties run on the
+    default executor so a slow search never stalls other clients.
+    """
+
+    def __init__(self, pokemons_data=None, difficulty=SERVER_AI_DIFFICULTY):
+        if difficulty not in DIFFICULTY_LEVELS:
+            raise ValueError(f"Unknown AI difficulty: {difficulty}")
+        self.difficulty = difficulty
+        pokemons_data = pokemons_data if pokemons_data is not None else load_pokemon_records()
+        self.pokemons = {data['id']: data for data in pokemons_data}
+        self.bag_template = [(item['name'], item['quantity']) for item in starting_inventory()]
+        self.connections = 0
+        self.requests = 0
+        self.server = None
+
+    def pokemon(self, pokemon_id):
+        data = self.pokemons.get(pokemon_id)
+        if data is None:
+            raise ProtocolError(f"unknown Pokemon {pokemon_id!r}")
+        return combatant_from_data(data)
+
+    def new_battle(self, request):
+        party_ids = request.get('party')
+        if not isinstance(party_ids, list) or not party_ids:
+            raise ProtocolError("party must be a non-empty list of Pokemon ids")
+        party = [self.pokemon(pokemon_id) for pokemon_id in party_ids]
+        enemy_id = request.get('enemy')
+        if enemy_id is None:
+            enemy_id = random.choice(list(self.pokemons))
+        seed = request.get('seed')
+        if seed is None:
+            seed = random.getrandbits(63)
+        battle = HeadlessBattle(party, self.pokemon(enemy_id), [list(item) for item in self.bag_template],
+                                random.Random(seed), messages=[] if request.get('messages') else None)
+        # The search draws a time dependent number of times, it must not touch
+        # the battle's RNG or the rule rolls would stop following the seed
+        return battle, EnemyAI(self.difficulty, rng=random.Random(f"ai-{seed}"))
+
+    async def enemy_turn(self, battle, ai):
+        state = BattleState(battle.player, battle.enemy)
+        if self.difficulty == 'easy':
+            slot = ai.choose_slot(state)
+        else:
+            slot = await asyncio.get_running_loop().run_in_executor(None, ai.choose_slot, state.copy())
+        battle.attack(slot, enemy_attacks=True)
+
+    async def handle_client(self, reader, writer):
+        self.connections += 1
+        session = Session(self)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Line longer than the stream limit
+                    await self.send(writer, {'error': "request too long"})
+                    break
+                if not line:
+                    break
+                self.requests += 1
+                reply = await self.dispatch(session, line)
+                writer.write(json.dumps(reply, separators=(',', ':')).encode() + b'\n')
+                # Only wait on the socket when the client stops reading
+                if writer.transport.get_write_buffer_size() > SERVER_MAX_LINE:
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def dispatch(self, session, line):
+        request_id = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ProtocolError("request must be a JSON object")
+            request_id = request.get('id')
+            reply = await session.handle(request)
+        except (ProtocolError, ValueError) as e:
+            reply = {'error': str(e)}
+        except Exception:
+            log.exception("Failed to handle request %r", line[:200])
+            reply = {'error': "internal error"}
+        reply['id'] = request_id
+        return reply
+
+    async def send(self, writer, message):
+        writer.write(json.dumps(message).encode() + b'\n')
+        await writer.drain()
+
+    async def start(self, host=None, port=None, path=None):
+        if path:
+            self.server = await asyncio.start_unix_server(self.handle_client, path, limit=SERVER_MAX_LINE)
+        else:
+            self.server = await asyncio.start_server(self.handle_client, host, port, limit=SERVER_MAX_LINE,
+                                                     backlog=1024)
+        return self.server
+
+    async def serve_forever(self, host=None, port=None, path=None):
+        server = await self.start(host, port, path)
+        async with server:
+            await server.serve_forever()
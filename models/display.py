@@ -0,0 +1,76 @@
+import pygame
+from config import *
+from models.log import get_logger
+
+log = get_logger('display')
+
+DISPLAY_MODES = ('native', 'scaled', 'integer')
+
+_display = None
+
+
+class Display:
+    """The window and the WINDOW_WIDTH x WINDOW_HEIGHT framebuffer scenes draw into
+
+    'native' draws straight into an unscaled window. 'scaled' lets SDL
+    upscale the framebuffer on the GPU with nearest neighbour filtering,
+    to the biggest integer factor the desktop fits, and is the only mode
+    where vsync is available. 'integer' scales it in software by
+    DISPLAY_SCALE into a window of that size and maps the mouse back.
+    """
+
+    def __init__(self, mode=DISPLAY_MODE, scale=DISPLAY_SCALE, vsync=DISPLAY_VSYNC):
+        if mode not in DISPLAY_MODES:
+            log.warning("Unknown display mode %r, using 'native'", mode)
+            mode = 'native'
+        size = (WINDOW_WIDTH, WINDOW_HEIGHT)
+        self.mode = mode
+        self.scale = 1
+
+        if mode == 'scaled':
+            self.window = self.framebuffer = self.open_scaled(size, vsync)
+            if self.window is None:
+                self.mode = mode = 'native'
+
+        if mode == 'integer':
+            self.scale = max(1, int(scale))
+            if vsync:
+                log.warning("Vsync is only available in the 'scaled' display mode")
+            self.window = pygame.display.set_mode((WINDOW_WIDTH * self.scale, WINDOW_HEIGHT * self.scale))
+            self.framebuffer = pygame.Surface(size).convert()
+        elif mode == 'native':
+            self.window = self.framebuffer = pygame.display.set_mode(size)
+
+    def open_scaled(self, size, vsync):
+        """A SCALED window, without vsync if the renderer refuses it, None if scaling is unavailable"""
+        for sync in ([1, 0] if vsync else [0]):
+            try:
+                return pygame.display.set_mode(size, pygame.SCALED, vsync=sync)
+            except pygame.error as e:
+                log.warning("Could not open a scaled window%s (%s)", " with vsync" if sync else "", e)
+        return None
+
+    def present(self):
+        """Upscale the framebuffer into the window if needed and show the frame"""
+        if self.framebuffer is not self.window:
+            pygame.transform.scale(self.framebuffer, self.window.get_size(), self.window)
+        pygame.display.flip()
+
+    def map_event(self, event):
+        """Move mouse positions from window to framebuffer coordinates"""
+        if self.scale > 1 and hasattr(event, 'pos'):
+            event.pos = (event.pos[0] // self.scale, event.pos[1] // self.scale)
+            if hasattr(event, 'rel'):
+                event.rel = (event.rel[0] // self.scale, event.rel[1] // self.scale)
+        return event
+
+
+def init_display(mode=DISPLAY_MODE, scale=DISPLAY_SCALE, vsync=DISPLAY_VSYNC):
+    global _display
+    _display = Display(mode, scale, vsync)
+    return _display
+
+
+def get_framebuffer():
+    """The surface scenes draw into, None before the display is created"""
+    return _display.framebuffer if _display is not None else None
@@ -0,0 +1,204 @@
+import math
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from models.battle_rules import roll_attack
+from models.log import get_logger
+
+log = get_logger('ai')
+
+# Search algorithm and per-turn compute budget (seconds) for each difficulty
+DIFFICULTY_LEVELS = {
+    'easy': {'search': 'random', 'budget': 0.0},
+    'normal': {'search': 'expectimax', 'budget': 0.05, 'max_depth': 2},
+    'hard': {'search': 'expectimax', 'budget': 0.15, 'max_depth': 8},
+    'expert': {'search': 'mcts', 'budget': 0.25}
+}
+
+WIN_SCORE = 1.0
+STATE_PENALTY = 0.05
+MCTS_EXPLORATION = 1.4
+MCTS_ROLLOUT_DEPTH = 12
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='enemy-ai')
+    return _executor
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def evaluate(state):
+    """Score a battle state from the enemy's point of view, in [-1, 1]"""
+    player, enemy = state.player, state.enemy
+    if player.current_hp <= 0:
+        return WIN_SCORE
+    if enemy.current_hp <= 0:
+        return -WIN_SCORE
+    score = enemy.current_hp / enemy.stats['hp'] - player.current_hp / player.stats['hp']
+    if player.state:
+        score += STATE_PENALTY
+    if enemy.state:
+        score -= STATE_PENALTY
+    return score * 0.5
+
+
+class EnemyAI:
+    """Chooses enemy moves by searching over the battle rules within a time budget"""
+
+    def __init__(self, difficulty='normal', rng=None):
+        if difficulty not in DIFFICULTY_LEVELS:
+            raise ValueError(f"Unknown AI difficulty: {difficulty}")
+        self.difficulty = difficulty
+        self.settings = DIFFICULTY_LEVELS[difficulty]
+        self.rng = rng or random.Random()
+        self.nodes = 0
+        self.deadline = 0.0
+
+    def request_move(self, state):
+        """Search for a move on the AI worker thread, returns a Future of the move slot"""
+        return _get_executor().submit(self.choose_slot, state.copy())
+
+    def choose_slot(self, state):
+        """Search for the enemy's best move, never running past the turn budget, and return its slot
+
+        A random pick picks a slot. The searches compare moves, a move known
+        twice is played from its first slot.
+        """
+        moves = state.enemy.move_ids
+        search = self.settings['search']
+        if search == 'random' or len(moves) == 1:
+            return self.rng.randrange(len(moves))
+
+        self.nodes = 0
+        self.deadline = time.perf_counter() + self.settings['budget']
+        if search == 'mcts':
+            return moves.index(self.monte_carlo(state))
+        return moves.index(self.iterative_expectimax(state))
+
+    def check_deadline(self):
+        self.nodes += 1
+        if self.nodes & 63 == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+    # Expectimax
+
+    def iterative_expectimax(self, state):
+        best_move, completed = state.enemy.move_ids[0], 0
+        for depth in range(1, self.settings['max_depth'] + 1):
+            try:
+                best_move = self.expectimax_root(state, depth)
+            except SearchTimeout:
+                break
+            completed = depth
+        log.debug("expectimax searched %d nodes, completed depth %d", self.nodes, completed)
+        return best_move
+
+    def expectimax_root(self, state, depth):
+        best_move, best_value = None, -math.inf
+        for move_id in state.enemy.move_ids:
+            value = self.chance_value(state, True, move_id, depth)
+            if value > best_value:
+                best_move, best_value = move_id, value
+        return best_move
+
+    def chance_value(self, state, enemy_attacks, move_id, depth):
+        snapshot = state.snapshot()
+        value = 0.0
+        for probability, damage, inflict in state.attack_outcomes(enemy_attacks, move_id):
+            self.check_deadline()
+            state.step(enemy_attacks, move_id, damage, inflict)
+            if state.is_terminal() or depth <= 1:
+                value += probability * evaluate(state)
+            else:
+                value += probability * self.turn_value(state, not enemy_attacks, depth - 1)
+            state.restore(snapshot)
+        return value
+
+    def turn_value(self, state, enemy_turn, depth):
+        # The enemy maximises the score and assumes the player minimises it
+        values = [self.chance_value(state, enemy_turn, move_id, depth)
+                  for move_id in (state.enemy if enemy_turn else state.player).move_ids]
+        return max(values) if enemy_turn else min(values)
+
+    # Monte Carlo tree search
+
+    def monte_carlo(self, state):
+        root = _Node()
+        snapshot = state.snapshot()
+        try:
+            while True:
+                self.check_deadline()
+                self.mcts_iteration(state, root)
+                state.restore(snapshot)
+        except SearchTimeout:
+            state.restore(snapshot)
+        log.debug("mcts ran %d iterations", root.visits)
+        if not root.children:
+            return self.rng.choice(state.enemy.move_ids)
+        return max(root.children.items(), key=lambda item: item[1].visits)[0]
+
+    def mcts_iteration(self, state, root):
+        node, enemy_turn, path = root, True, [root]
+        rng = self.rng
+
+        # Selection and expansion, sampling chance outcomes along the way
+        while not state.is_terminal():
+            move_ids = (state.enemy if enemy_turn else state.player).move_ids
+            untried = [move_id for move_id in move_ids if move_id not in node.children]
+            if untried:
+                move_id = rng.choice(untried)
+                node.children[move_id] = child = _Node()
+                self.sampled_step(state, enemy_turn, move_id)
+                path.append(child)
+                enemy_turn = not enemy_turn
+                break
+            move_id, node = node.select(enemy_turn)
+            self.sampled_step(state, enemy_turn, move_id)
+            path.append(node)
+            enemy_turn = not enemy_turn
+
+        # Random rollout
+        for _ in range(MCTS_ROLLOUT_DEPTH):
+            if state.is_terminal():
+                break
+            move_ids = (state.enemy if enemy_turn else state.player).move_ids
+            self.sampled_step(state, enemy_turn, rng.choice(move_ids))
+            enemy_turn = not enemy_turn
+
+        value = evaluate(state)
+        for visited in path:
+            visited.visits += 1
+            visited.value += value
+
+    def sampled_step(self, state, enemy_attacks, move_id):
+        attacker = state.enemy if enemy_attacks else state.player
+        damage, inflict = roll_attack(attacker, move_id, self.rng)
+        state.step(enemy_attacks, move_id, damage, inflict)
+
+
+class _Node:
+    __slots__ = ('children', 'visits', 'value')
+
+    def __init__(self):
+        self.children = {}
+        self.visits = 0
+        self.value = 0.0
+
+    def select(self, enemy_turn):
+        """Pick the child with the best UCB1 score for the side to move"""
+        log_visits = math.log(self.visits)
+        sign = 1.0 if enemy_turn else -1.0
+        best, best_score = None, -math.inf
+        for move_id, child in self.children.items():
+            score = (sign * child.value / child.visits
+                     + MCTS_EXPLORATION * math.sqrt(log_visits / child.visits))
+            if score > best_score:
+                best, best_score = (move_id, child), score
+        return best
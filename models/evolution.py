@@ -1,75 +1,114 @@
+import math
 import pygame
-import time
 from config import *
+from models.assets import load_font
+from models.particles import Emitter, create_particle_system
+from models.scene import Scene
 
-class Evolution:
-    def __init__(self, screen, pokemon, evolved_form):
-        self.screen = screen
-        self.pokemon = pokemon
-        self.evolved_form = evolved_form
+SPARKLE_COUNT = 20
+SPARKLE_COLOR = (255, 255, 0)
+# Cosine and sine for every whole degree, sparkles look their angles up
+COS_TABLE = [math.cos(math.radians(angle)) for angle in range(360)]
+SIN_TABLE = [math.sin(math.radians(angle)) for angle in range(360)]
+
+class Evolution(Scene):
+    """Plays queued evolutions one after another
+
+    Enter, Space or a click skips the current animation and Escape skips
+    every remaining one. on_evolved(pokemon, evolved_form) runs as each
+    evolution finishes, on_complete() once the queue is empty.
+    """
+    memory_subsystem = 'Evolution'
+
+    animation_duration = 3.0  
+    
+    def __init__(self, game, evolutions, on_evolved, on_complete):
+        super().__init__(game)
+        self.queue = list(evolutions)
+        self.on_evolved = on_evolved
+        self.on_complete = on_complete
         self.animation_done = False
-        self.start_time = time.time()
-        self.font = pygame.font.Font(None, 48)
         
-    def draw_evolution_animation(self):
-        current_time = time.time() - self.start_time
-        animation_duration = 3.0  
+        self.font = load_font(48, None)
+        self.text = self.font.render("Evolution in progress...", True, BLACK)
+        self.text_rect = self.text.get_rect(center=(WINDOW_WIDTH//2, 50))
+        # Sparkles are particles emitted around the ring, or plain circles without NumPy
+        self.particles = create_particle_system()
+        self.sparkles = Emitter(self.particles, 'sparkle')
+        self.sparkle_index = 0
+        self.start_next()
         
-        if current_time >= animation_duration:
-            self.animation_done = True
+    def start_next(self):
+        self.pokemon, self.evolved_form = self.queue.pop(0)
+        self.elapsed = 0.0
+        
+        # Crossfade copies are made once, only their alpha changes per frame
+        self.original_sprite = self.pokemon.sprite.copy()
+        self.evolved_sprite = self.evolved_form.sprite.copy()
+        center = (WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2)
+        self.original_rect = self.original_sprite.get_rect(center=center)
+        self.evolved_rect = self.evolved_sprite.get_rect(center=center)
+        
+    def finish_current(self):
+        if self.animation_done:
             return
-            
-        self.screen.fill(WHITE)
+        self.on_evolved(self.pokemon, self.evolved_form)
+        if self.queue:
+            self.start_next()
+        else:
+            self.animation_done = True
+            self.on_complete()
         
-        # Calculate progress of animation
-        progress = min(current_time / animation_duration, 1.0)
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            while not self.animation_done:
+                self.finish_current()
+        elif (event.type == pygame.KEYDOWN and event.key in (pygame.K_RETURN, pygame.K_SPACE)
+              or event.type == pygame.MOUSEBUTTONDOWN):
+            self.finish_current()
         
-        # Draw original Pokemon sprite with fade out
-        alpha = int(255 * (1 - progress))
-        original_sprite = self.pokemon.sprite.copy()
-        original_sprite.set_alpha(alpha)
+    def update(self, dt):
+        self.elapsed += dt
+        self.particles.update(dt)
+        if self.particles.enabled:
+            # The emitter hops between the ring points, one per frame
+            progress = min(self.elapsed / self.animation_duration, 1.0)
+            self.sparkle_index = (self.sparkle_index + 1) % SPARKLE_COUNT
+            self.sparkles.position = self.sparkle_position(self.sparkle_index, progress)
+            self.sparkles.update(dt)
+        if self.elapsed >= self.animation_duration:
+            self.finish_current()
         
-        # Draw evolved form sprite with fade in
-        evolved_sprite = self.evolved_form.sprite.copy()
-        evolved_sprite.set_alpha(int(255 * progress))
+    def draw(self):
+        self.screen.fill(WHITE)
         
-        sprite_x = WINDOW_WIDTH // 2 - self.pokemon.sprite.get_width() // 2
-        sprite_y = WINDOW_HEIGHT // 2 - self.pokemon.sprite.get_height() // 2
+        # Calculate progress of animation
+        progress = min(self.elapsed / self.animation_duration, 1.0)
         
-        self.screen.blit(original_sprite, (sprite_x, sprite_y))
-        self.screen.blit(evolved_sprite, (sprite_x, sprite_y))
+        # Original Pokemon fades out while the evolved form fades in
+        self.original_sprite.set_alpha(int(255 * (1 - progress)))
+        self.evolved_sprite.set_alpha(int(255 * progress))
+        self.screen.blit(self.original_sprite, self.original_rect)
+        self.screen.blit(self.evolved_sprite, self.evolved_rect)
         
-        text = self.font.render("Evolution in progress...", True, BLACK)
-        text_rect = text.get_rect(center=(WINDOW_WIDTH//2, 50))
-        self.screen.blit(text, text_rect)
+        self.screen.blit(self.text, self.text_rect)
         
-        self.draw_sparkles(progress)
+        if self.particles.enabled:
+            self.particles.draw(self.screen)
+        else:
+            self.draw_sparkles(progress)
         
-        pygame.display.flip()
+    def sparkle_position(self, index, progress):
+        radius = 100 + progress * 50  # Expand radius during animation
+        rotation = int(progress * 720)  # Rotate twice during animation
+        angle = (index * 360 // SPARKLE_COUNT + rotation) % 360
+        return WINDOW_WIDTH // 2 + radius * COS_TABLE[angle], WINDOW_HEIGHT // 2 + radius * SIN_TABLE[angle]
         
     def draw_sparkles(self, progress):
-        center_x = WINDOW_WIDTH // 2
-        center_y = WINDOW_HEIGHT // 2
-        
-        for i in range(20):
-            angle = (i / 20) * 360 + (progress * 720)  # Rotate twice during animation
-            radius = 100 + progress * 50  # Expand radius during animation
-            
-            x = center_x + radius * pygame.math.Vector2().from_polar((1, angle))[0]
-            y = center_y + radius * pygame.math.Vector2().from_polar((1, angle))[1]
-            
+        size = int(5 * (1 - abs(progress - 0.5) * 2)) 
+        if size <= 0:
+            return
         
-            color = (255, 255, 0)  
-            size = int(5 * (1 - abs(progress - 0.5) * 2)) 
-            pygame.draw.circle(self.screen, color, (int(x), int(y)), size)
-            
-    def run(self):
-        while not self.animation_done:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    return None
-                    
-            self.draw_evolution_animation()
-            pygame.time.Clock().tick(60)
-            
-        return self.evolved_form 
\ No newline at end of file
+        for i in range(SPARKLE_COUNT):
+            x, y = self.sparkle_position(i, progress)
+            pygame.draw.circle(self.screen, SPARKLE_COLOR, (int(x), int(y)), size)
@@ -4,353 +4,483 @@ import random
 import math
 import os
 from config import *
-from data.api_handler import fetch_pokemon_data, fetch_pokemon_species, initialize_pokemon_database
-from data.data_loader import load_pokemons, get_pokemon_by_id, save_player_pokedex, load_player_pokedex
-from models.menu import Menu
-from models.battle import BattleSystem
+from data.api_handler import (fetch_pokemon_data, fetch_pokemon_species, initialize_move_database,
+                              initialize_pokemon_database)
+from data.data_loader import (load_pokemons, get_pokemon_by_id, save_player_pokedex, load_player_pokedex,
+                              load_player_inventory)
+from data.item_db import get_item_registry, starting_inventory
+from data.move_db import MOVES_FILE, get_move_database
+from data.profile_index import get_profile_index
+from models.menu import MainMenuScene, PokemonSelectScene
+from models.assets import load_attack_frames, load_font, load_image, load_sprite, scaled_image
+from models.audio import init_audio
+from models.display import init_display
+from models.log import configure_logging, get_logger
+from models.memory import battle_finished, enable_memory_tracking
+from models.battle import BattleSystem, BATTLE_BACKGROUNDS, BAG_IMAGE_SIZE, bag_image_path, battle_background_path
+from models.pokemon import STATES, STATE_ICON_SIZE, sprite_path, state_icon_path
+from models.preloader import AssetPreloader
 from models.evolution import Evolution
+from models.scene import Scene, SceneManager
+
+log = get_logger('game')
 
 class Game:
     def __init__(self):
+        configure_logging()
+        if MEMORY_TRACKING:
+            enable_memory_tracking()
         pygame.init()
-        pygame.mixer.init()  # Initialize the mixer
-        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+        self.audio = init_audio()
+        self.display = init_display()
+        # Scenes draw into the framebuffer, the display upscales it once per frame
+        self.screen = self.display.framebuffer
+        pygame.display.set_caption("Pokemon Battle Game")
+        load_attack_frames()
         self.pokemons_data = load_pokemons()  # Load Pokemon data once
-        self.menu = Menu(self, self.pokemons_data)  # Pass self (game instance) and pokemons_data
+        self.scenes = SceneManager()
         self.clock = pygame.time.Clock()
         self.player_name = None
         self.player_pokemon = []
+        self.inventory = []
         self.current_pokemon = None
-        
-        # Load and set up music
-        self.menu_music = pygame.mixer.Sound(os.path.join(SOUNDS_DIR, "menu", "menu.mp3"))
-        self.battle_music = pygame.mixer.Sound(os.path.join(SOUNDS_DIR, "battle", "battle.mp3"))
-        self.current_music = None
+        self.preloader = AssetPreloader()
+        self.next_enemy_data = None
+        self.battle = None
+        self.move_fetch = None
         self.play_menu_music()
-        
+
     def initialize_game_data(self):
         if not self.pokemons_data:
             initialize_pokemon_database(INITIAL_POKEMON_COUNT)
             self.pokemons_data = load_pokemons()
-            
+            get_move_database(reload=True)
+        elif not os.path.exists(MOVES_FILE):
+            # Installs that already had pokemons.json never fetched their move data,
+            # it downloads in the background and the first battle waits for it
+            self.move_fetch = self.preloader.submit(MOVES_FILE, self.fetch_move_data)
+
+    def fetch_move_data(self):
+        """Download moves.json on a preload worker, returns the move records to add"""
+        try:
+            move_list = initialize_move_database(self.pokemons_data)
+        except (ImportError, OSError, ValueError) as e:
+            log.warning("Could not fetch move data, using the built-in moves: %s", e)
+            return []
+        if move_list is None:
+            log.warning("Could not fetch every move, using the built-in moves until the next start")
+            return []
+        return move_list
+
+    def add_fetched_moves(self):
+        # Added in place on the main thread, the Pokemon already built keep their move ids
+        if self.move_fetch is not None and self.move_fetch.done():
+            move_db = get_move_database()
+            for record in self.move_fetch.result():
+                move_db.add(record)
+            self.move_fetch = None
+
     def check_evolution(self, pokemon):
         if pokemon.level >= pokemon.evolution_level and pokemon.evolution_level > 0:
-            print(f"Checking evolution for {pokemon.name} (Level {pokemon.level}, Evolution Level {pokemon.evolution_level})")
+            log.debug("Checking evolution for %s (level %d, evolution level %d)",
+                      pokemon.name, pokemon.level, pokemon.evolution_level)
             species_data = fetch_pokemon_species(pokemon.id)
             if species_data and species_data.get('evolves_to'):
                 evolved_id = species_data['evolves_to'][0]['species']['url'].split('/')[-2]
-                print(f"{pokemon.name} can evolve into Pokemon #{evolved_id}!")
+                log.info("%s can evolve into Pokemon #%s", pokemon.name, evolved_id)
                 return get_pokemon_by_id(self.pokemons_data, int(evolved_id))
         return None
 
+    def start_session(self, action, player_name):
+        """Continue from the name entry screen with a new or saved game"""
+        self.player_name = player_name
+
+        if action == 'new_game':
+            available_pokemon = [get_pokemon_by_id(self.pokemons_data, i)
+                              for i in range(1, INITIAL_POKEMON_COUNT + 1)]
+            self.scenes.replace(PokemonSelectScene(self, available_pokemon,
+                                                   on_select=self.start_new_game,
+                                                   on_cancel=self.scenes.pop_to_root))
+
+        elif action == 'continue':
+            # The profile index answers without loading the save and its Pokemon
+            if not get_profile_index().can_continue(player_name):
+                log.info("No saved game for %s", player_name)
+                self.scenes.pop()
+                return
+            self.player_pokemon = load_player_pokedex(player_name, self.pokemons_data)
+            self.inventory = load_player_inventory(player_name)
+            if self.player_pokemon:
+                self.current_pokemon = self.player_pokemon[0]
+                self.start_battle()
+            else:
+                self.scenes.pop()
+
+    def start_new_game(self, selected_pokemon):
+        self.player_pokemon = selected_pokemon
+        self.current_pokemon = selected_pokemon[0]
+        self.inventory = starting_inventory()
+        self.save_progress()
+        self.start_battle()
+
+    def save_progress(self):
+        save_player_pokedex(self.player_name, self.player_pokemon, self.inventory)
+
+    def select_battle_pokemon(self):
+        self.scenes.switch(PokemonSelectScene(self, self.player_pokemon,
+                                              on_select=self.choose_battle_pokemon,
+                                              on_cancel=self.show_game_over_screen,
+                                              is_battle_select=True))
+
+    def choose_battle_pokemon(self, pokemon):
+        self.current_pokemon = pokemon
+        self.save_progress()
+        self.start_battle()
+
     def handle_battle_result(self, result, enemy_pokemon):
+        # Load the next enemy while the result and selection screens are shown
+        self.prepare_next_battle(exclude=(enemy_pokemon.id,))
+
         if result == 'victory':
             exp_gain = enemy_pokemon.level * 50
-            leveled_up = self.current_pokemon.gain_experience(exp_gain)
-            self.show_result_screen("Victory!", 
+            self.current_pokemon.gain_experience(exp_gain)
+
+            def after_victory():
+                enemy_pokemon.current_hp = enemy_pokemon.stats['hp']
+                self.player_pokemon.append(enemy_pokemon)
+
+                evolutions = []
+                for pokemon in self.player_pokemon:
+                    evolved_form = self.check_evolution(pokemon)
+                    if evolved_form:
+                        evolutions.append((pokemon, evolved_form))
+
+                self.save_progress()
+                self.handle_evolutions(evolutions, self.select_battle_pokemon)
+
+            self.show_result_screen("Victory!",
                 f"{enemy_pokemon.name} has been added to your Pokedex!\n"
                 f"{self.current_pokemon.name} gained {exp_gain} experience!",
                 pokemon=enemy_pokemon,
-                is_victory=True)
-            
-            enemy_pokemon.current_hp = enemy_pokemon.stats['hp']
-            self.player_pokemon.append(enemy_pokemon)
-            
-            for pokemon in self.player_pokemon:
-                evolved_form = self.check_evolution(pokemon)
-                if evolved_form:
-                    self.handle_evolution(pokemon, evolved_form)
-            
-            save_player_pokedex(self.player_name, self.player_pokemon)
-            
-            selected_pokemon = self.menu.select_battle_pokemon(self.player_pokemon)
-            if selected_pokemon:
-                self.current_pokemon = selected_pokemon
-                return self.start_battle()
-            return False
-                
+                is_victory=True,
+                on_continue=after_victory)
+
         elif result == 'defeat':
             self.current_pokemon.current_hp = 0
-            save_player_pokedex(self.player_name, self.player_pokemon)
-            
-            self.show_result_screen("Defeat!", 
+            self.save_progress()
+
+            def after_defeat():
+                available_pokemon = [p for p in self.player_pokemon if not p.is_fainted()]
+                if not available_pokemon:
+                    self.player_pokemon = []
+                    self.save_progress()
+                    self.show_game_over_screen()
+                else:
+                    self.select_battle_pokemon()
+
+            self.show_result_screen("Defeat!",
                 f"{self.current_pokemon.name} has fainted!",
                 pokemon=self.current_pokemon,
-                is_victory=False)
-            
-            available_pokemon = [p for p in self.player_pokemon if not p.is_fainted()]
-            if not available_pokemon:
-                self.show_game_over_screen()
-                self.player_pokemon = []  
-                save_player_pokedex(self.player_name, self.player_pokemon)
-                return False
-            
-            selected_pokemon = self.menu.select_battle_pokemon(self.player_pokemon)
-            if selected_pokemon and not selected_pokemon.is_fainted():
-                self.current_pokemon = selected_pokemon
-                return self.start_battle()
-            return False
-                
+                is_victory=False,
+                on_continue=after_defeat)
+
         elif result == 'run':
-            selected_pokemon = self.menu.select_battle_pokemon(self.player_pokemon)
-            if selected_pokemon:
-                self.current_pokemon = selected_pokemon
-                save_player_pokedex(self.player_name, self.player_pokemon)
-                return self.start_battle()  
-            return False
-                
-        return True
-
-    def show_result_screen(self, title, message, pokemon=None, is_victory=True):
-        running = True
-        animation_time = 0
-        float_amplitude = 10
-        
-        try:
-            title_font = pygame.font.Font(os.path.join(FONTS_DIR, "pokemonsolid.ttf"), 64)
-            message_font = pygame.font.Font(os.path.join(FONTS_DIR, "pokemonsolid.ttf"), 32)
-        except:
-            title_font = pygame.font.Font(None, 64)
-            message_font = pygame.font.Font(None, 32)
-        
-        while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                if event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
-                    running = False
-            
-            self.screen.fill(BLACK)
-            
-            animation_time += 0.1
-            float_offset = float_amplitude * math.sin(animation_time)
-            
-            shadow_offset = 3
-            title_shadow = title_font.render(title, True, BLACK)
-            title_text = title_font.render(title, True, BRIGHT_YELLOW)
-            
-            title_rect = title_text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT//4))
-            shadow_rect = title_shadow.get_rect(center=(WINDOW_WIDTH//2 + shadow_offset, 
-                                                      WINDOW_HEIGHT//4 + shadow_offset))
-            
-            self.screen.blit(title_shadow, shadow_rect)
-            self.screen.blit(title_text, title_rect)
-            
-            if pokemon:
-                scaled_sprite = pygame.transform.scale(pokemon.sprite, 
-                    (pokemon.sprite.get_width() * 3, pokemon.sprite.get_height() * 3))
-                
-                sprite_rect = scaled_sprite.get_rect(center=(WINDOW_WIDTH//2, 
-                                                           WINDOW_HEIGHT//2 + float_offset))
-                
-                if not is_victory and pokemon.is_fainted():
-                    tinted_sprite = scaled_sprite.copy()
-                    tinted_sprite.fill((255, 0, 0, 128), special_flags=pygame.BLEND_RGBA_MULT)
-                    self.screen.blit(tinted_sprite, sprite_rect)
-                else:
-                    self.screen.blit(scaled_sprite, sprite_rect)
-            
-            message_shadow = message_font.render(message, True, BLACK)
-            message_text = message_font.render(message, True, BRIGHT_YELLOW)
-            
-            msg_rect = message_text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT*3//4))
-            shadow_msg_rect = message_shadow.get_rect(center=(WINDOW_WIDTH//2 + shadow_offset, 
-                                                            WINDOW_HEIGHT*3//4 + shadow_offset))
-            
-            self.screen.blit(message_shadow, shadow_msg_rect)
-            self.screen.blit(message_text, msg_rect)
-            
-            prompt_shadow = message_font.render("Press any key to continue...", True, BLACK)
-            prompt_text = message_font.render("Press any key to continue...", True, BRIGHT_YELLOW)
-            
-            prompt_rect = prompt_text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT - 50))
-            shadow_prompt_rect = prompt_shadow.get_rect(center=(WINDOW_WIDTH//2 + shadow_offset, 
-                                                              WINDOW_HEIGHT - 50 + shadow_offset))
-            
-            self.screen.blit(prompt_shadow, shadow_prompt_rect)
-            self.screen.blit(prompt_text, prompt_rect)
-            
-            pygame.display.flip()
-            self.clock.tick(60)
-            
+            # Items may have been used before running away
+            self.save_progress()
+            self.select_battle_pokemon()
+
+    def show_result_screen(self, title, message, pokemon=None, is_victory=True, on_continue=None):
+        self.scenes.switch(ResultScene(self, title, message, pokemon, is_victory, on_continue))
+
     def show_game_over_screen(self):
-        running = True
-        animation_time = 0
-        float_amplitude = 10
-        
-        try:
-            title_font = pygame.font.Font(os.path.join(FONTS_DIR, "pokemonsolid.ttf"), 86)
-            message_font = pygame.font.Font(os.path.join(FONTS_DIR, "pokemonsolid.ttf"), 23)  
-        except:
-            title_font = pygame.font.Font(None, 86)
-            message_font = pygame.font.Font(None, 23)  
-            
-        background = pygame.image.load(os.path.join(MENU_IMAGES_DIR, "menu1.png"))
-        background = pygame.transform.scale(background, (WINDOW_WIDTH, WINDOW_HEIGHT))
-        
-        try:
-            pikachu_sprite = pygame.image.load(os.path.join(DATA_DIR, 'sprites', '25.png'))  
-            pikachu_sprite = pygame.transform.scale(pikachu_sprite, 
-                (pikachu_sprite.get_width() * 4, pikachu_sprite.get_height() * 4))  
-        except:
-            pikachu_sprite = None
-        
-        while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_RETURN:
-                        running = False
-                        menu_result = self.menu.run()
-                        if isinstance(menu_result, tuple):
-                            action, player_name = menu_result
-                            self.player_name = player_name
-                            
-                            if action == 'new_game':
-                                available_pokemon = [get_pokemon_by_id(self.pokemons_data, i) 
-                                                  for i in range(1, INITIAL_POKEMON_COUNT + 1)]
-                                selected_pokemon = self.menu.pokemon_selection_menu(available_pokemon)
-                                if selected_pokemon:
-                                    self.player_pokemon = selected_pokemon
-                                    self.current_pokemon = selected_pokemon[0]
-                                    save_player_pokedex(player_name, selected_pokemon)
-                                    self.start_battle()
-                                    
-                            elif action == 'continue':
-                                self.player_pokemon = load_player_pokedex(player_name, self.pokemons_data)
-                                if self.player_pokemon:
-                                    self.current_pokemon = self.player_pokemon[0]
-                                    self.start_battle()
-                        
-                        pygame.quit()
-                        sys.exit()
-                    else:
-                        pygame.quit() 
-                        sys.exit()
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    pygame.quit()
-                    sys.exit()
-            
-            self.screen.blit(background, (0, 0))
-            
-            animation_time += 0.1
-            float_offset = float_amplitude * math.sin(animation_time)
-            
-            shadow_offset = 3
-            title_shadow = title_font.render("GAME OVER", True, BLACK)
-            title_text = title_font.render("GAME OVER", True, RED)
-            
-            title_rect = title_text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT//4 + 25)) 
-            shadow_rect = title_shadow.get_rect(center=(WINDOW_WIDTH//2 + shadow_offset, 
-                                                      WINDOW_HEIGHT//4 + 25 + shadow_offset))  
-            
-            self.screen.blit(title_shadow, shadow_rect)
-            self.screen.blit(title_text, title_rect)
-            
-            if pikachu_sprite:
-                sprite_rect = pikachu_sprite.get_rect(center=(WINDOW_WIDTH//2, 
-                                                             WINDOW_HEIGHT//2 + float_offset))
-                self.screen.blit(pikachu_sprite, sprite_rect)  
-            
-            prompt = "Press any key to quit, press Enter to return to Main Menu..."
-            prompt_shadow = message_font.render(prompt, True, BLACK)
-            prompt_text = message_font.render(prompt, True, BRIGHT_YELLOW)
-            
-            prompt_rect = prompt_text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT - 50))
-            shadow_prompt_rect = prompt_shadow.get_rect(center=(WINDOW_WIDTH//2 + shadow_offset, 
-                                                              WINDOW_HEIGHT - 50 + shadow_offset))
-            
-            self.screen.blit(prompt_shadow, shadow_prompt_rect)
-            self.screen.blit(prompt_text, prompt_rect)
-            
-            pygame.display.flip()
-            self.clock.tick(60)
-            
-    def handle_evolution(self, pokemon, evolved_form):
-        evolution = Evolution(self.screen, pokemon, evolved_form)
-        evolved_pokemon = evolution.run()
-        
-        if evolved_pokemon:
-            for i, p in enumerate(self.player_pokemon):
-                if p.id == pokemon.id:
-                    self.player_pokemon[i] = evolved_pokemon
-                    break
-            save_player_pokedex(self.player_name, self.player_pokemon)
-            
+        self.scenes.switch(GameOverScene(self))
+
+    def handle_evolutions(self, evolutions, on_complete):
+        """Play the pending evolutions as one queued scene, then continue"""
+        if not evolutions:
+            on_complete()
+            return
+        self.scenes.switch(Evolution(self, evolutions, self.apply_evolution, on_complete))
+
+    def apply_evolution(self, pokemon, evolved_pokemon):
+        for i, p in enumerate(self.player_pokemon):
+            if p.id == pokemon.id:
+                self.player_pokemon[i] = evolved_pokemon
+                break
+        self.save_progress()
+
     def play_menu_music(self):
-        if self.current_music != self.menu_music:
-            pygame.mixer.stop()
-            self.menu_music.play(-1)  # -1 means loop indefinitely
-            self.current_music = self.menu_music
+        self.audio.play_music('menu')
 
     def play_battle_music(self):
-        if self.current_music != self.battle_music:
-            pygame.mixer.stop()
-            self.battle_music.play(-1)
-            self.current_music = self.battle_music
+        self.audio.play_music('battle')
+
+    def choose_next_enemy(self, exclude=()):
+        owned = {p.id for p in self.player_pokemon}.union(exclude)
+        candidates = [data for data in self.pokemons_data
+                      if data['id'] <= INITIAL_POKEMON_COUNT and data['id'] not in owned]
+        return random.choice(candidates) if candidates else None
+
+    def preload_battle_assets(self, enemy_data=None):
+        """Start loading the assets of a battle in the background, returns their futures"""
+        assets = [(state_icon_path(state), STATE_ICON_SIZE) for state in STATES]
+        assets += [(bag_image_path(item), BAG_IMAGE_SIZE) for item in get_item_registry().values()]
+        if enemy_data:
+            assets.append((sprite_path(enemy_data), None))
+            assets.append((battle_background_path(enemy_data['types']), (WINDOW_WIDTH, WINDOW_HEIGHT)))
+        else:
+            # The enemy is not known yet, warm every arena
+            assets += [(os.path.join(BATTLE_IMAGES_DIR, background), (WINDOW_WIDTH, WINDOW_HEIGHT))
+                       for background in set(BATTLE_BACKGROUNDS.values())]
+        return [self.preloader.submit(asset, load_image, *asset) for asset in assets]
+
+    def prepare_next_battle(self, exclude=()):
+        """Pick the next enemy early so its sprite and arena load in the background"""
+        self.next_enemy_data = self.choose_next_enemy(exclude)
+        if self.next_enemy_data:
+            self.preload_battle_assets(self.next_enemy_data)
 
     def start_battle(self):
         if self.current_pokemon.current_hp <= 0:
             self.current_pokemon.current_hp = self.current_pokemon.stats['hp']
-            
-        available_pokemon = [get_pokemon_by_id(self.pokemons_data, i) 
-                           for i in range(1, INITIAL_POKEMON_COUNT + 1)
-                           if get_pokemon_by_id(self.pokemons_data, i) not in self.player_pokemon]
-        
-        if not available_pokemon:
-            self.show_result_screen("Congratulations!", "You've caught all available Pokemon!")
-            return False
-            
-        enemy_pokemon = random.choice(available_pokemon)
+
+        enemy_data = self.next_enemy_data
+        self.next_enemy_data = None
+        if enemy_data is None or any(p.id == enemy_data['id'] for p in self.player_pokemon):
+            enemy_data = self.choose_next_enemy()
+
+        if not enemy_data:
+            self.show_result_screen("Congratulations!", "You've caught all available Pokemon!",
+                                    on_continue=self.scenes.quit)
+            return
+
+        futures = self.preload_battle_assets(enemy_data)
+        if self.move_fetch is not None:
+            futures.append(self.move_fetch)
+        if self.preloader.ready(futures):
+            self.begin_battle(enemy_data)
+        else:
+            self.scenes.switch(LoadingScene(self, futures, lambda: self.begin_battle(enemy_data)))
+
+    def begin_battle(self, enemy_data):
+        self.add_fetched_moves()
+        enemy_pokemon = get_pokemon_by_id(self.pokemons_data, enemy_data['id'])
         enemy_pokemon.current_hp = enemy_pokemon.stats['hp']
-        
-        self.play_battle_music() 
-        
-        battle = BattleSystem(self.screen, self.current_pokemon, enemy_pokemon)
-        battle.all_player_pokemon = self.player_pokemon
-        result = battle.run()
-        
-        # Only switch back to menu music after battle result is handled
-        if result in ['victory', 'defeat', 'quit']:
-            self.play_menu_music()  
-        
-        if result == 'quit':
-            return False
-            
-        return self.handle_battle_result(result, enemy_pokemon)
-        
+
+        # One battle presenter is kept for the session and re-armed for each battle
+        if self.battle is None:
+            self.battle = BattleSystem(self.screen)
+        self.battle.reset(self.current_pokemon, enemy_pokemon, inventory=self.inventory, party=self.player_pokemon)
+        if RECORD_REPLAYS:
+            self.battle.start_recording()
+        self.scenes.switch(BattleScene(self, self.battle))
+
     def run(self):
         self.initialize_game_data()
-        
-        while True:
-            menu_result = self.menu.run()
-            
-            if menu_result == 'quit':
-                break
-            elif isinstance(menu_result, tuple):
-                action, player_name = menu_result
-                self.player_name = player_name
-                
-                if action == 'new_game':
-                    available_pokemon = [get_pokemon_by_id(self.pokemons_data, i) 
-                                      for i in range(1, INITIAL_POKEMON_COUNT + 1)]
-                    selected_pokemon = self.menu.pokemon_selection_menu(available_pokemon)
-                    if selected_pokemon:
-                        self.player_pokemon = selected_pokemon
-                        self.current_pokemon = selected_pokemon[0]
-                        save_player_pokedex(player_name, selected_pokemon)
-                        if not self.start_battle():
-                            break
-                            
-                elif action == 'continue':
-                    self.player_pokemon = load_player_pokedex(player_name, self.pokemons_data)
-                    if self.player_pokemon:
-                        self.current_pokemon = self.player_pokemon[0]
-                        if not self.start_battle():
-                            break
-                            
+
+        # Every screen runs as a scene inside this single loop
+        self.scenes.push(MainMenuScene(self))
+        self.scenes.run(self.clock, FPS, self.display)
+
+        self.preloader.shutdown()
         pygame.quit()
-        sys.exit() 
\ No newline at end of file
+        sys.exit()
+
+
+class BattleScene(Scene):
+    def __init__(self, game, battle):
+        super().__init__(game)
+        self.battle = battle
+
+    def enter(self):
+        self.game.play_battle_music()
+        self.battle.add_message(f"A wild {self.battle.enemy_pokemon.name} appeared! "
+                                f"What {self.battle.player_pokemon.name} will do?")
+
+    def handle_event(self, event):
+        self.finish(self.battle.handle_events(event))
+
+    def update(self, dt):
+        self.finish(self.battle.update(dt))
+
+    def draw(self):
+        self.battle.draw()
+
+    def finish(self, result):
+        if result == 'continue':
+            return
+        self.battle.save_replay(result)
+        battle_finished()
+
+        # Only switch back to menu music after battle result is handled
+        if result in ['victory', 'defeat']:
+            self.game.play_menu_music()
+        self.game.handle_battle_result(result, self.battle.enemy_pokemon)
+
+
+class LoadingScene(Scene):
+    """Spinner shown while the preloader finishes the assets of the next scene"""
+
+    def __init__(self, game, futures, on_ready):
+        super().__init__(game)
+        self.futures = futures
+        self.on_ready = on_ready
+        self.angle = 0
+        self.font = load_font(32)
+
+    def update(self, dt):
+        self.angle += dt * 6
+        if self.game.preloader.ready(self.futures):
+            self.on_ready()
+
+    def draw(self):
+        self.screen.fill(BLACK)
+        spinner_rect = pygame.Rect(WINDOW_WIDTH//2 - 40, WINDOW_HEIGHT//2 - 40, 80, 80)
+        pygame.draw.arc(self.screen, BRIGHT_YELLOW, spinner_rect, self.angle, self.angle + math.pi * 1.5, 6)
+
+        progress = int(self.game.preloader.progress(self.futures) * 100)
+        text = self.font.render(f"Loading... {progress}%", True, BRIGHT_YELLOW)
+        self.screen.blit(text, text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT//2 + 80)))
+
+
+class ResultScene(Scene):
+    float_amplitude = 10
+
+    def __init__(self, game, title, message, pokemon=None, is_victory=True, on_continue=None):
+        super().__init__(game)
+        self.title = title
+        self.message = message
+        self.pokemon = pokemon
+        self.is_victory = is_victory
+        self.on_continue = on_continue
+        self.animation_time = 0
+
+        self.title_font = load_font(64)
+        self.message_font = load_font(32)
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
+            if self.on_continue:
+                self.on_continue()
+            else:
+                self.game.scenes.pop_to_root()
+
+    def update(self, dt):
+        self.animation_time += dt * 6
+
+    def draw(self):
+        title_font, message_font = self.title_font, self.message_font
+        title, message, pokemon = self.title, self.message, self.pokemon
+
+        self.screen.fill(BLACK)
+
+        float_offset = self.float_amplitude * math.sin(self.animation_time)
+
+        shadow_offset = 3
+        title_shadow = title_font.render(title, True, BLACK)
+        title_text = title_font.render(title, True, BRIGHT_YELLOW)
+
+        title_rect = title_text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT//4))
+        shadow_rect = title_shadow.get_rect(center=(WINDOW_WIDTH//2 + shadow_offset,
+                                                  WINDOW_HEIGHT//4 + shadow_offset))
+
+        self.screen.blit(title_shadow, shadow_rect)
+        self.screen.blit(title_text, title_rect)
+
+        if pokemon:
+            scaled_sprite = scaled_image(pokemon.sprite, 3)
+
+            sprite_rect = scaled_sprite.get_rect(center=(WINDOW_WIDTH//2,
+                                                       WINDOW_HEIGHT//2 + float_offset))
+
+            if not self.is_victory and pokemon.is_fainted():
+                tinted_sprite = scaled_sprite.copy()
+                tinted_sprite.fill((255, 0, 0), special_flags=pygame.BLEND_RGB_MULT)
+                self.screen.blit(tinted_sprite, sprite_rect)
+            else:
+                self.screen.blit(scaled_sprite, sprite_rect)
+
+        message_shadow = message_font.render(message, True, BLACK)
+        message_text = message_font.render(message, True, BRIGHT_YELLOW)
+
+        msg_rect = message_text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT*3//4))
+        shadow_msg_rect = message_shadow.get_rect(center=(WINDOW_WIDTH//2 + shadow_offset,
+                                                        WINDOW_HEIGHT*3//4 + shadow_offset))
+
+        self.screen.blit(message_shadow, shadow_msg_rect)
+        self.screen.blit(message_text, msg_rect)
+
+        prompt_shadow = message_font.render("Press any key to continue...", True, BLACK)
+        prompt_text = message_font.render("Press any key to continue...", True, BRIGHT_YELLOW)
+
+        prompt_rect = prompt_text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT - 50))
+        shadow_prompt_rect = prompt_shadow.get_rect(center=(WINDOW_WIDTH//2 + shadow_offset,
+                                                          WINDOW_HEIGHT - 50 + shadow_offset))
+
+        self.screen.blit(prompt_shadow, shadow_prompt_rect)
+        self.screen.blit(prompt_text, prompt_rect)
+
+
+class GameOverScene(Scene):
+    float_amplitude = 10
+
+    def __init__(self, game):
+        super().__init__(game)
+        self.animation_time = 0
+
+        self.title_font = load_font(86)
+        self.message_font = load_font(23)
+        self.background = load_image(os.path.join(MENU_IMAGES_DIR, "menu1.png"), (WINDOW_WIDTH, WINDOW_HEIGHT))
+
+        try:
+            pikachu_sprite, _, _ = load_sprite(os.path.join(DATA_DIR, 'sprites', '25.png'))
+            self.pikachu_sprite = scaled_image(pikachu_sprite, 4)
+        except:
+            self.pikachu_sprite = None
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_RETURN:
+                # Back to the main menu for a new or saved game
+                self.game.scenes.pop_to_root()
+            else:
+                self.game.scenes.quit()
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            self.game.scenes.quit()
+
+    def update(self, dt):
+        self.animation_time += dt * 6
+
+    def draw(self):
+        title_font, message_font = self.title_font, self.message_font
+
+        self.screen.blit(self.background, (0, 0))
+
+        float_offset = self.float_amplitude * math.sin(self.animation_time)
+
+        shadow_offset = 3
+        title_shadow = title_font.render("GAME OVER", True, BLACK)
+        title_text = title_font.render("GAME OVER", True, RED)
+
+        title_rect = title_text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT//4 + 25))
+        shadow_rect = title_shadow.get_rect(center=(WINDOW_WIDTH//2 + shadow_offset,
+                                                  WINDOW_HEIGHT//4 + 25 + shadow_offset))
+
+        self.screen.blit(title_shadow, shadow_rect)
+        self.screen.blit(title_text, title_rect)
+
+        if self.pikachu_sprite:
+            sprite_rect = self.pikachu_sprite.get_rect(center=(WINDOW_WIDTH//2,
+                                                         WINDOW_HEIGHT//2 + float_offset))
+            self.screen.blit(self.pikachu_sprite, sprite_rect)
+
+        prompt = "Press any key to quit, press Enter to return to Main Menu..."
+        prompt_shadow = message_font.render(prompt, True, BLACK)
+        prompt_text = message_font.render(prompt, True, BRIGHT_YELLOW)
+
+        prompt_rect = prompt_text.get_rect(center=(WINDOW_WIDTH//2, WINDOW_HEIGHT - 50))
+        shadow_prompt_rect = prompt_shadow.get_rect(center=(WINDOW_WIDTH//2 + shadow_offset,
+                                                          WINDOW_HEIGHT - 50 + shadow_offset))
+
+        self.screen.blit(prompt_shadow, shadow_prompt_rect)
+        self.screen.blit(prompt_text, prompt_rect)
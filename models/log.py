@@ -0,0 +1,121 @@
+import json
+import logging
+import os
+import sys
+import time
+from config import LOG_FILE, LOG_LEVELS, LOG_RATE_INTERVAL, LOG_RATE_LIMIT
+
+ROOT_LOGGER = 'pokemon'
+
+
+def get_logger(subsystem):
+    """Logger of a subsystem ('game', 'battle', 'ai', 'assets', 'audio', 'data', 'menu')
+
+    Messages take %-style arguments so they are only formatted when the
+    level is enabled: log.debug("%s took %d damage", name, damage)
+    """
+    logger = logging.getLogger(f'{ROOT_LOGGER}.{subsystem}')
+    # Logger filters only see their own records, every subsystem gets the shared one
+    logger.addFilter(rate_limit)
+    return logger
+
+
+class RateLimitFilter(logging.Filter):
+    """Drops repeats of the same message beyond a limit per time window
+
+    Reports logged with extra={'rate_limit': False} are never dropped. The
+    first message of a new window carries the count dropped from the last
+    one as record.suppressed, the formatters add it to the output.
+    """
+
+    def __init__(self, limit=LOG_RATE_LIMIT, interval=LOG_RATE_INTERVAL):
+        super().__init__()
+        self.limit = limit
+        self.interval = interval
+        self.windows = {}
+
+    def filter(self, record):
+        if not getattr(record, 'rate_limit', True):
+            return True
+        # Keyed on the unformatted message so every call site is limited on its own
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        window_start, count = self.windows.get(key, (now, 0))
+        if now - window_start >= self.interval:
+            if count > self.limit:
+                record.suppressed = count - self.limit
+            window_start, count = now, 0
+        self.windows[key] = (window_start, count + 1)
+        return count < self.limit
+
+
+rate_limit = RateLimitFilter()
+
+
+class ConsoleFormatter(logging.Formatter):
+    def format(self, record):
+        text = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            text += f" ({suppressed} similar messages suppressed)"
+        return text
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            'time': record.created,
+            'level': record.levelname,
+            'subsystem': record.name.partition('.')[2] or record.name,
+            'message': record.getMessage()
+        }
+        if getattr(record, 'suppressed', 0):
+            entry['suppressed'] = record.suppressed
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+def parse_levels(spec):
+    """Parse "battle=DEBUG,ai=INFO" (a bare level sets the default) into a level dict"""
+    levels = {}
+    for part in filter(None, (part.strip() for part in spec.split(','))):
+        subsystem, _, level = part.rpartition('=')
+        levels[subsystem or 'default'] = level.upper()
+    return levels
+
+
+def configure_logging(levels=LOG_LEVELS, log_file=LOG_FILE):
+    """Set up the game's loggers, with levels=None every log call is a no-op"""
+    root = logging.getLogger(ROOT_LOGGER)
+    root.propagate = False
+    root.addFilter(rate_limit)
+    rate_limit.windows.clear()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+    if os.environ.get('POKEMON_LOG'):
+        levels = dict(levels or {}, **parse_levels(os.environ['POKEMON_LOG']))
+    if not levels:
+        # Above every level, so log calls return before building a record
+        root.setLevel(logging.CRITICAL + 1)
+        root.addHandler(logging.NullHandler())
+        return root
+
+    root.setLevel(levels.get('default', 'WARNING'))
+    for subsystem, level in levels.items():
+        if subsystem != 'default':
+            get_logger(subsystem).setLevel(level)
+
+    console = logging.StreamHandler(sys.stderr)
+    console.setFormatter(ConsoleFormatter('%(levelname)s %(name)s: %(message)s'))
+    handlers = [console]
+    if log_file:
+        file_handler = logging.FileHandler(log_file, encoding='utf-8')
+        file_handler.setFormatter(JsonLinesFormatter())
+        handlers.append(file_handler)
+
+    for handler in handlers:
+        root.addHandler(handler)
+    return root
@@ -0,0 +1,165 @@
+import gc
+import logging
+import tracemalloc
+import weakref
+import pygame
+from config import MEMORY_GROWTH_BATTLES, MEMORY_GROWTH_LIMIT_MB
+from models import assets, audio
+from models.display import get_framebuffer
+from models.log import get_logger
+
+log = get_logger('memory')
+
+_tracker = None
+
+
+def surface_bytes(surface):
+    return surface.get_pitch() * surface.get_height()
+
+
+def sound_bytes(sound):
+    frequency, size, channels = pygame.mixer.get_init() or (44100, -16, 2)
+    return int(sound.get_length() * frequency) * (abs(size) // 8) * channels
+
+
+def _collect_media(value, found, depth=2):
+    """Find surfaces and sounds in an attribute value, looking into nested containers"""
+    if isinstance(value, pygame.Surface) or isinstance(value, pygame.mixer.Sound):
+        found.append(value)
+    elif depth and isinstance(value, dict):
+        for item in value.values():
+            _collect_media(item, found, depth - 1)
+    elif depth and isinstance(value, (list, tuple)):
+        for item in value:
+            _collect_media(item, found, depth - 1)
+
+
+class MemoryTracker:
+    """Accounts surface and sound bytes per owning subsystem and diffs tracemalloc snapshots
+
+    Owners are held through weak references, so tracking never keeps an
+    object alive. Media shared by several owners is counted once, under the
+    first owner it is found in, with the shared asset caches checked first.
+    """
+
+    def __init__(self, growth_battles=MEMORY_GROWTH_BATTLES, growth_limit_mb=MEMORY_GROWTH_LIMIT_MB):
+        self.owners = {}
+        self.growth_battles = growth_battles
+        self.growth_limit = growth_limit_mb * 1024 * 1024
+        self.battles = 0
+        self.baseline = None
+        # One frame per trace is enough for per-line diffs and keeps snapshots cheap
+        tracemalloc.start(1)
+        self.last_snapshot = tracemalloc.take_snapshot()
+
+    def track(self, owner, subsystem):
+        self.owners.setdefault(subsystem, weakref.WeakSet()).add(owner)
+
+    def shared_media(self):
+        caches = {'assets': [assets._images, assets._sprites, assets._attack_frames or {},
+                             list(assets._scaled.values())]}
+        sounds = getattr(audio.get_audio(), 'sounds', None)
+        if sounds:
+            caches['audio'] = [sounds]
+        return caches
+
+    def usage(self):
+        """Live objects, surface bytes and sound bytes per subsystem"""
+        gc.collect()
+        # The display surface and framebuffer are shared by every scene, leave them out
+        seen = {id(surface) for surface in (pygame.display.get_surface(), get_framebuffer())
+                if surface is not None}
+        usage = {}
+
+        def account(subsystem, values, objects):
+            found = []
+            for value in values:
+                _collect_media(value, found)
+            surfaces = sounds = 0
+            for media in found:
+                if id(media) in seen:
+                    continue
+                seen.add(id(media))
+                if isinstance(media, pygame.Surface):
+                    surfaces += surface_bytes(media)
+                else:
+                    sounds += sound_bytes(media)
+            objects_, surfaces_, sounds_ = usage.get(subsystem, (0, 0, 0))
+            usage[subsystem] = (objects_ + objects, surfaces_ + surfaces, sounds_ + sounds)
+
+        for subsystem, caches in self.shared_media().items():
+            account(subsystem, caches, 0)
+        for subsystem, owners in self.owners.items():
+            live = list(owners)
+            account(subsystem, [vars(owner) for owner in live], len(live))
+        return usage
+
+    def total_bytes(self, usage=None):
+        usage = usage if usage is not None else self.usage()
+        traced, _ = tracemalloc.get_traced_memory()
+        return traced + sum(surfaces + sounds for _, surfaces, sounds in usage.values())
+
+    def scene_changed(self, scene_name):
+        """Log the media usage and the biggest allocation changes since the last scene"""
+        if not log.isEnabledFor(logging.INFO):
+            return
+        usage = self.usage()
+        snapshot = tracemalloc.take_snapshot()
+        diff = snapshot.compare_to(self.last_snapshot, 'lineno')
+        self.last_snapshot = snapshot
+
+        traced, peak = tracemalloc.get_traced_memory()
+        lines = [f"scene {scene_name}: python heap {traced / 2**20:.1f} MB (peak {peak / 2**20:.1f} MB)"]
+        for subsystem, (objects, surfaces, sounds) in sorted(usage.items()):
+            lines.append(f"  {subsystem:<12} {objects:4d} live, surfaces {surfaces / 1024:8.1f} KB, "
+                         f"sounds {sounds / 1024:8.1f} KB")
+        for stat in diff[:5]:
+            if stat.size_diff:
+                lines.append(f"  {stat.size_diff / 1024:+9.1f} KB {stat.traceback[0]}")
+        log.info("%s", "\n".join(lines), extra={'rate_limit': False})
+
+    def battle_finished(self):
+        """Warn when memory grew more than the limit over the last battles"""
+        total = self.total_bytes()
+        if self.baseline is None:
+            # The first battle warms the caches, growth is measured from there
+            self.baseline = total
+            return
+        self.battles += 1
+        if self.battles >= self.growth_battles:
+            growth = total - self.baseline
+            if growth > self.growth_limit:
+                log.warning("Memory grew by %.1f MB over %d battles (limit %.1f MB)",
+                            growth / 2**20, self.growth_battles, self.growth_limit / 2**20)
+            else:
+                log.info("Memory grew by %.1f MB over %d battles", growth / 2**20, self.growth_battles)
+            self.baseline = total
+            self.battles = 0
+
+
+def enable_memory_tracking(growth_battles=MEMORY_GROWTH_BATTLES, growth_limit_mb=MEMORY_GROWTH_LIMIT_MB):
+    global _tracker
+    if _tracker is None:
+        _tracker = MemoryTracker(growth_battles, growth_limit_mb)
+    return _tracker
+
+
+def get_memory_tracker():
+    """The active tracker, or None when memory tracking is off"""
+    return _tracker
+
+
+def track(owner, subsystem):
+    """Attribute an object's surfaces and sounds to a subsystem, a no-op unless tracking"""
+    if _tracker is not None:
+        _tracker.track(owner, subsystem)
+
+
+def scene_changed(scene_name):
+    if _tracker is not None:
+        _tracker.scene_changed(scene_name)
+
+
+def battle_finished():
+    if _tracker is not None:
+        _tracker.battle_finished()
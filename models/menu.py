@@ -1,86 +1,30 @@
 import pygame
 import os
+import time
 from config import *
-from data.data_loader import load_player_pokedex
+from data.profile_index import get_profile_index
+from models.assets import load_font, load_image, scaled_image
+from models.audio import get_audio
+from models.log import get_logger
+from models.scene import Scene
+from models.ui import Button, Widget, WidgetLayer
 
-class Button:
-    def __init__(self, x, y, width, height, text, color, hover_color):
-        self.rect = pygame.Rect(x, y, width, height)
-        self.text = text
-        self.color = color
-        self.hover_color = hover_color
-        self.is_hovered = False
-        
-        try:
-            self.font = pygame.font.Font(os.path.join(FONTS_DIR, "pokemonsolid.ttf"), 32)  
-        except:
-            self.font = pygame.font.Font(None, 32)
+log = get_logger('menu')
 
-        # Load sounds with error handling
-        try:
-            self.hover_sound = pygame.mixer.Sound(os.path.join(SOUNDS_DIR, "hover.mp3"))
-            self.select_sound = pygame.mixer.Sound(os.path.join(SOUNDS_DIR, "click.mp3"))
-        except:
-            print("Warning: Could not load button sound effects")
-            self.hover_sound = None
-            self.select_sound = None
-            
-        self.hover_sound_played = False
-        
-    def draw(self, screen):
-        if hasattr(self, 'custom_draw'):
-            self.custom_draw(screen)
-        else:
-            button_surface = pygame.Surface((self.rect.width, self.rect.height), pygame.SRCALPHA)
-            pygame.draw.rect(button_surface, BUTTON_BLACK, button_surface.get_rect(), border_radius=15)
-            screen.blit(button_surface, self.rect)
-            
-            border_color = BRIGHT_YELLOW if self.is_hovered else BLACK
-            border_width = 3 if self.is_hovered else 2
-            pygame.draw.rect(screen, border_color, self.rect, border_width, border_radius=15)
-            
-            text_surface = self.font.render(self.text, True, BRIGHT_YELLOW)
-            text_rect = text_surface.get_rect()
-            text_rect.centerx = self.rect.centerx
-            text_rect.centery = self.rect.centery + 11
-            screen.blit(text_surface, text_rect)
-        
-    def handle_event(self, event):
-        if event.type == pygame.MOUSEMOTION:
-            was_hovered = self.is_hovered
-            self.is_hovered = self.rect.collidepoint(event.pos)
-            if self.is_hovered and not was_hovered and self.hover_sound:
-                self.hover_sound.play()
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            if self.is_hovered:
-                if self.select_sound:
-                    self.select_sound.play()
-                return True
-        return False
+class MainMenuScene(Scene):
+    memory_subsystem = 'Menu'
 
-class Menu:
-    def __init__(self, game, pokemons_data):
-        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-        pygame.display.set_caption("Pokemon Battle Game")
-        self.clock = pygame.time.Clock()
-        self.game = game
-        self.pokemons_data = pokemons_data
-        
-        # Load font with fallback
-        try:
-            self.font = pygame.font.Font(os.path.join(FONTS_DIR, "pokemonsolid.ttf"), 32)
-        except:
-            print("Warning: Could not load Pokemon font, using default")
-            self.font = pygame.font.Font(None, 32)
-            
+    def __init__(self, game):
+        super().__init__(game)
+        
+        self.font = load_font(32)
         self.setup_buttons()
         
         # Load background with fallback
         try:
-            self.background = pygame.image.load(os.path.join(MENU_IMAGES_DIR, "menu1.png"))
-            self.background = pygame.transform.scale(self.background, (WINDOW_WIDTH, WINDOW_HEIGHT))
+            self.background = load_image(os.path.join(MENU_IMAGES_DIR, "menu1.png"), (WINDOW_WIDTH, WINDOW_HEIGHT))
         except:
-            print("Warning: Could not load menu background, using solid color")
+            log.warning("Could not load menu background, using solid color")
             self.background = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
             self.background.fill((50, 50, 50))  # Dark gray background as fallback
         
@@ -97,335 +41,386 @@ class Menu:
             'quit': Button(center_x, 460, button_width, button_height,
                           "Quit", BUTTON_BLACK, BUTTON_BLACK)
         }
+        self.widgets = WidgetLayer(self.buttons.values())
+        
+    def enter(self):
+        self.game.play_menu_music()
+        # Nothing to continue until a game was saved
+        self.buttons['continue'].enabled = bool(get_profile_index().list_profiles())
+        
+    def handle_event(self, event):
+        clicked = self.widgets.handle_event(event)
+        for button_name, button in self.buttons.items():
+            if button is clicked:
+                if button_name == 'quit':
+                    self.game.scenes.quit()
+                else:
+                    self.game.scenes.push(NameEntryScene(self.game, button_name))
+                return
         
     def draw(self):
         self.screen.blit(self.background, (0, 0))
+        self.widgets.draw(self.screen)
         
-        for button in self.buttons.values():
-            button.draw(self.screen)
-            
-        pygame.display.flip()
+
+class NameEntryScene(Scene):
+    memory_subsystem = 'Menu'
+
+    def __init__(self, game, action):
+        super().__init__(game)
+        self.action = action
+        self.input_text = ""
+        self.prompt_font = load_font(48)
+        self.input_font = load_font(32)
+        self.background = load_image(os.path.join(MENU_IMAGES_DIR, "menu2.png"), (WINDOW_WIDTH, WINDOW_HEIGHT))
+
+        # Continue lists the most recent profiles, picked with Up/Down or a click
+        self.profiles = []
+        if action == 'continue':
+            self.profiles = get_profile_index().list_profiles()[:PROFILE_PICKER_SIZE]
+        self.setup_profile_rows()
+
+    def setup_profile_rows(self):
+        font = load_font(22, None)
+        self.profile_rows = []
+        for i, profile in enumerate(self.profiles):
+            played = time.strftime('%d %b %H:%M', time.localtime(profile['last_played']))
+            label = f"{profile['name']}  -  {profile['party_size']} Pokemon  -  {played}"
+            normal = self.render_profile_row(font, label, WHITE, BLACK)
+            picked = self.render_profile_row(font, label, BRIGHT_YELLOW, BRIGHT_YELLOW)
+            rect = normal.get_rect(centerx=WINDOW_WIDTH // 2, top=WINDOW_HEIGHT // 2 + 100 + i * 36)
+            self.profile_rows.append((profile['name'], normal, picked, rect))
+
+    def render_profile_row(self, font, label, text_color, border_color):
+        text = font.render(label, True, text_color)
+        surface = pygame.Surface((400, text.get_height() + 12), pygame.SRCALPHA)
+        pygame.draw.rect(surface, BUTTON_BLACK, surface.get_rect(), border_radius=10)
+        pygame.draw.rect(surface, border_color, surface.get_rect(), 2, border_radius=10)
+        surface.blit(text, text.get_rect(center=surface.get_rect().center))
+        return surface
+
+    def pick_profile(self, step):
+        names = [profile['name'] for profile in self.profiles]
+        if not names:
+            return
+        current = self.input_text.strip()
+        index = names.index(current) + step if current in names else (0 if step > 0 else -1)
+        self.input_text = names[index % len(names)]
+        get_audio().play('hover')
+
+    def enter(self):
+        # A battle follows the name entry either way, warm its assets while the player types
+        self.game.preload_battle_assets()
         
-    def get_player_name(self):
-        input_text = ""
-        try:
-            prompt_font = pygame.font.Font(os.path.join(FONTS_DIR, "pokemonsolid.ttf"), 48)  
-            input_font = pygame.font.Font(os.path.join(FONTS_DIR, "pokemonsolid.ttf"), 32)  
-        except:
-            prompt_font = pygame.font.Font(None, 48)
-            input_font = pygame.font.Font(None, 32)
-            
-        typing_sound = pygame.mixer.Sound(os.path.join(SOUNDS_DIR, "typing.mp3"))
-        select_sound = pygame.mixer.Sound(os.path.join(SOUNDS_DIR, "click.mp3"))
-        
-        background = pygame.image.load(os.path.join(MENU_IMAGES_DIR, "menu2.png"))
-        background = pygame.transform.scale(background, (WINDOW_WIDTH, WINDOW_HEIGHT))
-        
-        while True:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    return None
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_RETURN and input_text.strip():
-                        select_sound.play()
-                        return input_text.strip()
-                    elif event.key == pygame.K_BACKSPACE:
-                        input_text = input_text[:-1]
-                        typing_sound.play()
-                    else:
-                        input_text += event.unicode
-                        typing_sound.play()
-                        
-            self.screen.blit(background, (0, 0))
-            
-            prompt = "Enter your name:"
-            shadow = prompt_font.render(prompt, True, BLACK)
-            text = prompt_font.render(prompt, True, BRIGHT_YELLOW)
-            
-            prompt_y = WINDOW_HEIGHT//2 - 80  
-            self.screen.blit(shadow, (WINDOW_WIDTH//2 - shadow.get_width()//2 + 2, prompt_y + 2))
-            self.screen.blit(text, (WINDOW_WIDTH//2 - text.get_width()//2, prompt_y))
-            
-            box_width = 400
-            box_height = 70
-            box_x = WINDOW_WIDTH//2 - box_width//2
-            box_y = WINDOW_HEIGHT//2 + 10
-            
-            input_surface = pygame.Surface((box_width, box_height), pygame.SRCALPHA)
-            pygame.draw.rect(input_surface, BUTTON_BLACK, input_surface.get_rect(), border_radius=15)
-            self.screen.blit(input_surface, (box_x, box_y))
-            
-            pygame.draw.rect(self.screen, BRIGHT_YELLOW, 
-                           (box_x, box_y, box_width, box_height), 2, border_radius=15)
-            
-            if input_text:
-                input_render = input_font.render(input_text, True, BRIGHT_YELLOW)
-                text_x = box_x + (box_width - input_render.get_width())//2
-                text_y = box_y + (box_height - input_render.get_height())//2 + 11
-                self.screen.blit(input_render, (text_x, text_y))
-            
-            if len(input_text) < 12 and pygame.time.get_ticks() % 1000 < 500:
-                cursor_x = box_x + (box_width - input_font.size(input_text)[0])//2 + input_font.size(input_text)[0]
-                pygame.draw.line(self.screen, BRIGHT_YELLOW,
-                               (cursor_x, box_y + 20),
-                               (cursor_x, box_y + box_height - 20), 2)
-            
-            pygame.display.flip()
-            self.clock.tick(FPS)
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                self.game.scenes.pop()
+            elif event.key == pygame.K_RETURN and self.input_text.strip():
+                get_audio().play('click')
+                self.game.start_session(self.action, self.input_text.strip())
+            elif event.key == pygame.K_BACKSPACE:
+                self.input_text = self.input_text[:-1]
+                get_audio().play('typing')
+            elif event.key in (pygame.K_UP, pygame.K_DOWN):
+                self.pick_profile(1 if event.key == pygame.K_DOWN else -1)
+            else:
+                self.input_text += event.unicode
+                get_audio().play('typing')
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            for name, _, _, rect in self.profile_rows:
+                if rect.collidepoint(event.pos):
+                    self.input_text = name
+                    get_audio().play('click')
+                
+    def draw(self):
+        input_text = self.input_text
+        self.screen.blit(self.background, (0, 0))
+        
+        prompt = "Enter your name:"
+        shadow = self.prompt_font.render(prompt, True, BLACK)
+        text = self.prompt_font.render(prompt, True, BRIGHT_YELLOW)
+        
+        prompt_y = WINDOW_HEIGHT//2 - 80  
+        self.screen.blit(shadow, (WINDOW_WIDTH//2 - shadow.get_width()//2 + 2, prompt_y + 2))
+        self.screen.blit(text, (WINDOW_WIDTH//2 - text.get_width()//2, prompt_y))
+        
+        box_width = 400
+        box_height = 70
+        box_x = WINDOW_WIDTH//2 - box_width//2
+        box_y = WINDOW_HEIGHT//2 + 10
+        
+        input_surface = pygame.Surface((box_width, box_height), pygame.SRCALPHA)
+        pygame.draw.rect(input_surface, BUTTON_BLACK, input_surface.get_rect(), border_radius=15)
+        self.screen.blit(input_surface, (box_x, box_y))
+        
+        pygame.draw.rect(self.screen, BRIGHT_YELLOW, 
+                       (box_x, box_y, box_width, box_height), 2, border_radius=15)
+        
+        if input_text:
+            input_render = self.input_font.render(input_text, True, BRIGHT_YELLOW)
+            text_x = box_x + (box_width - input_render.get_width())//2
+            text_y = box_y + (box_height - input_render.get_height())//2 + 11
+            self.screen.blit(input_render, (text_x, text_y))
+        
+        for name, normal, picked, rect in self.profile_rows:
+            self.screen.blit(picked if name == input_text.strip() else normal, rect)
+
+        if len(input_text) < 12 and pygame.time.get_ticks() % 1000 < 500:
+            cursor_x = box_x + (box_width - self.input_font.size(input_text)[0])//2 + self.input_font.size(input_text)[0]
+            pygame.draw.line(self.screen, BRIGHT_YELLOW,
+                           (cursor_x, box_y + 20),
+                           (cursor_x, box_y + box_height - 20), 2)
             
-    def pokemon_selection_menu(self, available_pokemon, is_pokedex=False, is_battle_select=False):
-        selected_pokemon = []
-        current_selection = 0
+
+class PokemonRow(Widget):
+    """One entry of the Pokemon list, its box and text cached per selection look"""
+    
+    def __init__(self, pokemon, width, height, font):
+        super().__init__((0, 0, width, height))
+        self.pokemon = pokemon
+        self.font = font
+        self.current = False
+        self.picked = False
+        # The sprite overhangs the box, so it is blitted on its own
+        self.sprite = scaled_image(pokemon.sprite, 1.3)
+        
+    @property
+    def state(self):
+        return (self.pokemon.is_fainted(), self.current, self.picked)
+        
+    def render(self, state):
+        fainted, current, picked = state
+        pokemon = self.pokemon
+        surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        
+        # Draw selection box (including fainted Pokemon)
+        if fainted:
+            box_color = (*BUTTON_BLACK[:3], 80)  # Greyed out for fainted Pokemon
+        elif current:
+            box_color = (*BUTTON_BLACK[:3], 180)
+        else:
+            box_color = (*BUTTON_BLACK[:3], 150 if picked else 100)
+        pygame.draw.rect(surface, box_color, surface.get_rect(), border_radius=15)
         
+        border_color = BRIGHT_YELLOW if picked or current else BLACK
+        border_width = 3 if current else 2
+        pygame.draw.rect(surface, border_color, surface.get_rect(), border_width, border_radius=15)
         
-        available_pokemon = list(dict.fromkeys(available_pokemon))  
+        # Draw Pokemon info 
+        info_x = 200
+        name = self.font.render(pokemon.name, True, BRIGHT_YELLOW)
+        
+        # Draw HP info with current/max values
+        hp_text = f"HP: {pokemon.current_hp}/{pokemon.stats['hp']}"
+        hp_color = (50, 205, 50) if pokemon.current_hp > 0 else (255, 0, 0)  # Green if alive, red if fainted
+        hp_info = self.font.render(hp_text, True, hp_color)
+        
+        # Draw attack info
+        atk_info = self.font.render(f"ATK: {pokemon.stats['attack']}", True, BRIGHT_YELLOW)
+        
+        surface.blit(name, (info_x, 20))
+        surface.blit(hp_info, (info_x, 45))
+        surface.blit(atk_info, (info_x + 200, 45))
+        
+        # Add FAINTED message 
+        if fainted:
+            fainted_text = self.font.render("FAINTED", True, (255, 0, 0))  
+            surface.blit(fainted_text, (info_x + 300, 35))
+        return surface
+        
+    def draw(self, screen):
+        super().draw(screen)
+        # Centered on the list slot, which is 10px taller than the box
+        sprite_rect = self.sprite.get_rect(center=(self.rect.x + 100, self.rect.y + (self.rect.height + 10)//2))
+        screen.blit(self.sprite, sprite_rect)
+
+
+class PokemonSelectScene(Scene):
+    """Pokemon list used for team selection, the pokedex and picking the next battler
+
+    on_select receives the chosen team (or the chosen Pokemon when
+    is_battle_select), on_cancel runs when the player presses Escape.
+    """
+    memory_subsystem = 'Menu'
+    
+    pokemon_height = 120
+    start_y = 180
+    visible_pokemon = 3
+    box_x_offset = 30
+    
+    def __init__(self, game, available_pokemon, on_select, on_cancel,
+                 is_pokedex=False, is_battle_select=False):
+        super().__init__(game)
+        self.on_select = on_select
+        self.on_cancel = on_cancel
+        self.is_pokedex = is_pokedex
+        self.is_battle_select = is_battle_select
+        self.selected_pokemon = []
+        self.current_selection = 0
+        self.scroll_offset = 0
+        self.box_width = int(WINDOW_WIDTH * 0.8)
+        
+        self.available_pokemon = list(dict.fromkeys(available_pokemon))  
         
         if is_battle_select:
-            for i, pokemon in enumerate(available_pokemon):
+            for i, pokemon in enumerate(self.available_pokemon):
                 if not pokemon.is_fainted():
-                    current_selection = i
+                    self.current_selection = i
                     break
         
-    
-        background = pygame.image.load(os.path.join(MENU_IMAGES_DIR, "pokeball.png"))
-        background = pygame.transform.scale(background, (WINDOW_WIDTH, WINDOW_HEIGHT))
+        self.background = load_image(os.path.join(MENU_IMAGES_DIR, "pokeball.png"), (WINDOW_WIDTH, WINDOW_HEIGHT))
+        self.title_font = load_font(48)
+        self.info_font = load_font(24)
         
-        try:
-            title_font = pygame.font.Font(os.path.join(FONTS_DIR, "pokemonsolid.ttf"), 48)
-            info_font = pygame.font.Font(os.path.join(FONTS_DIR, "pokemonsolid.ttf"), 24)
-        except:
-            title_font = pygame.font.Font(None, 48)
-            info_font = pygame.font.Font(None, 24)
-            
-        pokemon_height = 120
-        start_y = 180
-        visible_pokemon = 3
-        scroll_offset = 0
-        box_width = int(WINDOW_WIDTH * 0.8)
-        box_x_offset = 30
-        
-        select_sound = pygame.mixer.Sound(os.path.join(SOUNDS_DIR, "click.mp3"))
-        hover_sound = pygame.mixer.Sound(os.path.join(SOUNDS_DIR, "hover.mp3"))
-        
-        title = "Select Battle Pokemon" if is_battle_select else ("Your Pokedex" if is_pokedex else "Select Your Pokemon")
-        
-        while True:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    return None
+        self.title = "Select Battle Pokemon" if is_battle_select else ("Your Pokedex" if is_pokedex else "Select Your Pokemon")
+        
+        # Static text and list rows are rendered once, rows again only when their look changes
+        self.title_surface = self.title_font.render(self.title, True, BRIGHT_YELLOW)
+        esc_hint = "Press Esc to quit the game" if is_battle_select else "Press Esc to return to Main Menu"
+        self.esc_surface = self.info_font.render(esc_hint, True, BRIGHT_YELLOW)
+        self.rows = [PokemonRow(pokemon, self.box_width, self.pokemon_height - 10, self.info_font)
+                     for pokemon in self.available_pokemon]
+        
+    def choose(self, index):
+        pokemon = self.available_pokemon[index]
+        if self.is_battle_select:
+            if not pokemon.is_fainted():
+                get_audio().play('click')
+                self.on_select(pokemon)
+        elif not self.is_pokedex:
+            if pokemon not in self.selected_pokemon:
+                self.selected_pokemon.append(pokemon)
+                get_audio().play('click')
+                if len(self.selected_pokemon) >= MAX_PLAYER_POKEMON:
+                    self.on_select(self.selected_pokemon)
+        
+    def handle_event(self, event):
+        available_pokemon = self.available_pokemon
+        visible_pokemon = self.visible_pokemon
+        pokemon_height = self.pokemon_height
+        start_y = self.start_y
+        
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                self.on_cancel()
+            elif event.key == pygame.K_UP:
+                # Circular scrolling 
+                if self.current_selection > 0:
+                    next_selection = self.current_selection - 1
+                else:
+                    next_selection = len(available_pokemon) - 1
                     
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_ESCAPE:
-                        return None
-                    elif event.key == pygame.K_UP:
-                        # Circular scrolling 
-                        if current_selection > 0:
-                            next_selection = current_selection - 1
-                        else:
-                            next_selection = len(available_pokemon) - 1
-                            
-                        if is_battle_select:
-                            while next_selection != current_selection and available_pokemon[next_selection].is_fainted():
-                                next_selection = (next_selection - 1) if next_selection > 0 else len(available_pokemon) - 1
-                            if not available_pokemon[next_selection].is_fainted():
-                                current_selection = next_selection
-                        else:
-                            current_selection = next_selection
-                            
-                        # Adjust scroll offset for circular scrolling
-                        if current_selection >= len(available_pokemon) - visible_pokemon:
-                            scroll_offset = len(available_pokemon) - visible_pokemon
-                        elif current_selection < scroll_offset:
-                            scroll_offset = current_selection
-                        hover_sound.play()
-                            
-                    elif event.key == pygame.K_DOWN:
-                        # Circular scrolling down
-                        if current_selection < len(available_pokemon) - 1:
-                            next_selection = current_selection + 1
-                        else:
-                            next_selection = 0
-                            
-                        if is_battle_select:
-                            while next_selection != current_selection and available_pokemon[next_selection].is_fainted():
-                                next_selection = (next_selection + 1) % len(available_pokemon)
-                            if not available_pokemon[next_selection].is_fainted():
-                                current_selection = next_selection
-                        else:
-                            current_selection = next_selection
-                            
-                        if current_selection >= scroll_offset + visible_pokemon:
-                            scroll_offset = current_selection - visible_pokemon + 1
-                        elif current_selection < visible_pokemon:
-                            scroll_offset = 0
-                        hover_sound.play()
-                    elif event.key == pygame.K_RETURN:
-                        if is_battle_select:
-                            pokemon = available_pokemon[current_selection]
-                            if not pokemon.is_fainted():
-                                select_sound.play()
-                                return pokemon
-                        elif not is_pokedex:
-                            pokemon = available_pokemon[current_selection]
-                            if pokemon not in selected_pokemon:
-                                selected_pokemon.append(pokemon)
-                                select_sound.play()
-                                if len(selected_pokemon) >= MAX_PLAYER_POKEMON:
-                                    return selected_pokemon
-
-                elif event.type == pygame.MOUSEBUTTONDOWN:
-                    x, y = event.pos
-                    if y >= start_y and y < start_y + visible_pokemon * pokemon_height:
-                        index = (y - start_y) // pokemon_height + scroll_offset
-                        if index < len(available_pokemon):
-                            current_selection = index
-                            if is_battle_select:
-                                pokemon = available_pokemon[index]
-                                if not pokemon.is_fainted():
-                                    select_sound.play()
-                                    return pokemon
-                            elif not is_pokedex:
-                                pokemon = available_pokemon[index]
-                                if pokemon not in selected_pokemon:
-                                    selected_pokemon.append(pokemon)
-                                    select_sound.play()
-                                    if len(selected_pokemon) >= MAX_PLAYER_POKEMON:
-                                        return selected_pokemon
-                
-                elif event.type == pygame.MOUSEMOTION:
-                    x, y = event.pos
-                    if y >= start_y and y < start_y + visible_pokemon * pokemon_height:
-                        index = (y - start_y) // pokemon_height + scroll_offset
-                        if index < len(available_pokemon) and index != current_selection:
-                            current_selection = index
-                            hover_sound.play()
-                
-                elif event.type == pygame.MOUSEWHEEL:
-                    # Circular scrolling with mouse
-                    new_scroll = scroll_offset - event.y
-                    if new_scroll < 0:
-                        if scroll_offset == 0:  
-                            scroll_offset = max(0, len(available_pokemon) - visible_pokemon)
-                        else:
-                            scroll_offset = max(0, new_scroll)
-                    elif new_scroll > len(available_pokemon) - visible_pokemon:
-                        if scroll_offset == len(available_pokemon) - visible_pokemon:  
-                            scroll_offset = 0
-                        else:
-                            scroll_offset = min(new_scroll, len(available_pokemon) - visible_pokemon)
-                    else:
-                        scroll_offset = new_scroll
-            
-            self.screen.blit(background, (0, 0))
-            
-            title_surface = title_font.render(title, True, BRIGHT_YELLOW)
-            title_rect = title_surface.get_rect()
-            title_rect.centerx = (WINDOW_WIDTH//3) + 10
-            title_rect.centery = 65 
-            self.screen.blit(title_surface, title_rect)
-            
-            # Draw Pokemon list
-            for i in range(visible_pokemon):
-                index = i + scroll_offset
-                if index >= len(available_pokemon):
-                    break  
+                if self.is_battle_select:
+                    while next_selection != self.current_selection and available_pokemon[next_selection].is_fainted():
+                        next_selection = (next_selection - 1) if next_selection > 0 else len(available_pokemon) - 1
+                    if not available_pokemon[next_selection].is_fainted():
+                        self.current_selection = next_selection
+                else:
+                    self.current_selection = next_selection
                     
-                pokemon = available_pokemon[index]
-                y = start_y + i * pokemon_height
-                box_x = ((WINDOW_WIDTH - box_width) // 2) - box_x_offset
-                
-                # Draw selection box (including fainted Pokemon)
-                box_surface = pygame.Surface((box_width, pokemon_height - 10), pygame.SRCALPHA)
-                if pokemon.is_fainted():
-                    box_color = (*BUTTON_BLACK[:3], 80)  # Greyed out for fainted Pokemon
-                elif index == current_selection:
-                    box_color = (*BUTTON_BLACK[:3], 180)
+                # Adjust scroll offset for circular scrolling
+                if self.current_selection >= len(available_pokemon) - visible_pokemon:
+                    self.scroll_offset = len(available_pokemon) - visible_pokemon
+                elif self.current_selection < self.scroll_offset:
+                    self.scroll_offset = self.current_selection
+                get_audio().play('hover')
+                    
+            elif event.key == pygame.K_DOWN:
+                # Circular scrolling down
+                if self.current_selection < len(available_pokemon) - 1:
+                    next_selection = self.current_selection + 1
                 else:
-                    box_color = (*BUTTON_BLACK[:3], 150 if pokemon in selected_pokemon else 100)
-                pygame.draw.rect(box_surface, box_color, box_surface.get_rect(), border_radius=15)
-                self.screen.blit(box_surface, (box_x, y))
-                
-                border_color = BRIGHT_YELLOW if pokemon in selected_pokemon or index == current_selection else BLACK
-                border_width = 3 if index == current_selection else 2
-                pygame.draw.rect(self.screen, border_color, 
-                               (box_x, y, box_width, pokemon_height - 10), 
-                               border_width, border_radius=15)
-                
-                sprite = pygame.transform.scale(pokemon.sprite, 
-                    (int(pokemon.sprite.get_width() * 1.3), int(pokemon.sprite.get_height() * 1.3)))
-                sprite_rect = sprite.get_rect(
-                    center=(box_x + 100, y + pokemon_height//2))
-                self.screen.blit(sprite, sprite_rect)
-                
-                # Draw Pokemon info 
-                info_x = box_x + 200
-                name = info_font.render(pokemon.name, True, BRIGHT_YELLOW)
-                
-                # Draw HP info with current/max values
-                hp_text = f"HP: {pokemon.current_hp}/{pokemon.stats['hp']}"
-                hp_color = (50, 205, 50) if pokemon.current_hp > 0 else (255, 0, 0)  # Green if alive, red if fainted
-                hp_info = info_font.render(hp_text, True, hp_color)
-                
-                # Draw attack info
-                atk_info = info_font.render(f"ATK: {pokemon.stats['attack']}", True, BRIGHT_YELLOW)
-                
-                self.screen.blit(name, (info_x, y + 20))
-                self.screen.blit(hp_info, (info_x, y + 45))
-                self.screen.blit(atk_info, (info_x + 200, y + 45))
-                
-                # Add FAINTED message 
-                if pokemon.is_fainted():
-                    fainted_text = info_font.render("FAINTED", True, (255, 0, 0))  
-                    self.screen.blit(fainted_text, (info_x + 300, y + 35))
-            
-            if scroll_offset > 0:
-                pygame.draw.polygon(self.screen, BLACK,
-                                 [(WINDOW_WIDTH - 30, start_y + 27),  
-                                  (WINDOW_WIDTH - 20, start_y + 47),  
-                                  (WINDOW_WIDTH - 40, start_y + 47)])  
-            if scroll_offset < len(available_pokemon) - visible_pokemon:
-                end_y = start_y + (visible_pokemon * pokemon_height)
-                pygame.draw.polygon(self.screen, BLACK,
-                                 [(WINDOW_WIDTH - 30, end_y + 17),  
-                                  (WINDOW_WIDTH - 20, end_y - 3),   
-                                  (WINDOW_WIDTH - 40, end_y - 3)])  
-            
-            if is_battle_select:
-                esc_text = info_font.render("Press Esc to quit the game", True, BRIGHT_YELLOW)
-            else:
-                esc_text = info_font.render("Press Esc to return to Main Menu", True, BRIGHT_YELLOW)
-            esc_rect = esc_text.get_rect(center=(WINDOW_WIDTH//2 - 15, WINDOW_HEIGHT - 20))
-            self.screen.blit(esc_text, esc_rect)
-            
-            pygame.display.flip()
-            self.clock.tick(FPS)
-            
-    def select_battle_pokemon(self, available_pokemon):
-        selected = self.pokemon_selection_menu(available_pokemon, is_battle_select=True)
-        if selected is None:  
-            self.game.show_game_over_screen() 
-            return None
-        return selected
-        
-    def run(self):
-        running = True
-        while running:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    return 'quit'
+                    next_selection = 0
+                    
+                if self.is_battle_select:
+                    while next_selection != self.current_selection and available_pokemon[next_selection].is_fainted():
+                        next_selection = (next_selection + 1) % len(available_pokemon)
+                    if not available_pokemon[next_selection].is_fainted():
+                        self.current_selection = next_selection
+                else:
+                    self.current_selection = next_selection
                     
-                for button_name, button in self.buttons.items():
-                    if button.handle_event(event):
-                        if button_name == 'quit':
-                            return 'quit'
-                        elif button_name == 'new_game':
-                            player_name = self.get_player_name()
-                            if player_name:
-                                return ('new_game', player_name)
-                        elif button_name == 'continue':
-                            player_name = self.get_player_name()
-                            if player_name and load_player_pokedex(player_name, self.pokemons_data):
-                                return ('continue', player_name)
+                if self.current_selection >= self.scroll_offset + visible_pokemon:
+                    self.scroll_offset = self.current_selection - visible_pokemon + 1
+                elif self.current_selection < visible_pokemon:
+                    self.scroll_offset = 0
+                get_audio().play('hover')
+            elif event.key == pygame.K_RETURN:
+                self.choose(self.current_selection)
+
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            x, y = event.pos
+            if y >= start_y and y < start_y + visible_pokemon * pokemon_height:
+                index = (y - start_y) // pokemon_height + self.scroll_offset
+                if index < len(available_pokemon):
+                    self.current_selection = index
+                    self.choose(index)
+        
+        elif event.type == pygame.MOUSEMOTION:
+            x, y = event.pos
+            if y >= start_y and y < start_y + visible_pokemon * pokemon_height:
+                index = (y - start_y) // pokemon_height + self.scroll_offset
+                if index < len(available_pokemon) and index != self.current_selection:
+                    self.current_selection = index
+                    get_audio().play('hover')
+        
+        elif event.type == pygame.MOUSEWHEEL:
+            # Circular scrolling with mouse
+            scroll_offset = self.scroll_offset
+            new_scroll = scroll_offset - event.y
+            if new_scroll < 0:
+                if scroll_offset == 0:  
+                    scroll_offset = max(0, len(available_pokemon) - visible_pokemon)
+                else:
+                    scroll_offset = max(0, new_scroll)
+            elif new_scroll > len(available_pokemon) - visible_pokemon:
+                if scroll_offset == len(available_pokemon) - visible_pokemon:  
+                    scroll_offset = 0
+                else:
+                    scroll_offset = min(new_scroll, len(available_pokemon) - visible_pokemon)
+            else:
+                scroll_offset = new_scroll
+            self.scroll_offset = scroll_offset
             
-            self.draw()
-            self.clock.tick(FPS) 
\ No newline at end of file
+    def draw(self):
+        available_pokemon = self.available_pokemon
+        visible_pokemon = self.visible_pokemon
+        pokemon_height = self.pokemon_height
+        start_y = self.start_y
+        box_width = self.box_width
+        
+        self.screen.blit(self.background, (0, 0))
+        
+        title_rect = self.title_surface.get_rect()
+        title_rect.centerx = (WINDOW_WIDTH//3) + 10
+        title_rect.centery = 65 
+        self.screen.blit(self.title_surface, title_rect)
+        
+        # Draw Pokemon list
+        box_x = ((WINDOW_WIDTH - box_width) // 2) - self.box_x_offset
+        for i in range(visible_pokemon):
+            index = i + self.scroll_offset
+            if index >= len(available_pokemon):
+                break  
+                
+            row = self.rows[index]
+            row.current = index == self.current_selection
+            row.picked = row.pokemon in self.selected_pokemon
+            row.rect.x, row.rect.y = box_x, start_y + i * pokemon_height
+            row.draw(self.screen)
+        
+        if self.scroll_offset > 0:
+            pygame.draw.polygon(self.screen, BLACK,
+                             [(WINDOW_WIDTH - 30, start_y + 27),  
+                              (WINDOW_WIDTH - 20, start_y + 47),  
+                              (WINDOW_WIDTH - 40, start_y + 47)])  
+        if self.scroll_offset < len(available_pokemon) - visible_pokemon:
+            end_y = start_y + (visible_pokemon * pokemon_height)
+            pygame.draw.polygon(self.screen, BLACK,
+                             [(WINDOW_WIDTH - 30, end_y + 17),  
+                              (WINDOW_WIDTH - 20, end_y - 3),   
+                              (WINDOW_WIDTH - 40, end_y - 3)])  
+        
+        esc_rect = self.esc_surface.get_rect(center=(WINDOW_WIDTH//2 - 15, WINDOW_HEIGHT - 20))
+        self.screen.blit(self.esc_surface, esc_rect)
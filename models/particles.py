@@ -0,0 +1,219 @@
+import pygame
+from models.log import get_logger
+
+log = get_logger('particles')
+
+# Emitter presets: 'rate' is particles per second for continuous emitters and
+# 'burst' the count of a one-shot emit. Ranges are (min, max), spread is the
+# emission cone in degrees around 'direction', gravity is in px/s² downwards.
+PARTICLE_PRESETS = {
+    'normal': {'rate': 240, 'burst': 60, 'life': (0.25, 0.5), 'speed': (20, 70), 'direction': 0,
+               'spread': 360, 'size': (2, 4), 'gravity': 0, 'drag': 2.0,
+               'colors': [(235, 235, 235), (190, 190, 200)]},
+    'fire': {'rate': 420, 'burst': 120, 'life': (0.3, 0.6), 'speed': (30, 90), 'direction': -90,
+             'spread': 120, 'size': (3, 6), 'gravity': -160, 'drag': 1.5,
+             'colors': [(255, 220, 90), (255, 140, 30), (220, 60, 20)]},
+    'water': {'rate': 360, 'burst': 100, 'life': (0.3, 0.55), 'speed': (40, 110), 'direction': -90,
+              'spread': 160, 'size': (2, 5), 'gravity': 320, 'drag': 0.5,
+              'colors': [(120, 190, 255), (60, 130, 240), (220, 240, 255)]},
+    'electric': {'rate': 480, 'burst': 140, 'life': (0.1, 0.3), 'speed': (90, 200), 'direction': 0,
+                 'spread': 360, 'size': (1, 3), 'gravity': 0, 'drag': 4.0,
+                 'colors': [(255, 255, 120), (255, 240, 0), (255, 255, 255)]},
+    'sparkle': {'rate': 120, 'burst': 40, 'life': (0.5, 1.0), 'speed': (10, 45), 'direction': 0,
+                'spread': 360, 'size': (2, 5), 'gravity': -20, 'drag': 1.0,
+                'colors': [(255, 255, 0), (255, 255, 200), (255, 255, 255)]},
+}
+
+MAX_PARTICLE_SIZE = 6
+# Particles fade out in this many alpha steps, each with its own pre-rendered sprite
+ALPHA_LEVELS = 4
+MAX_PARTICLES = 16384
+
+_sprite_tables = {}
+# NumPy, imported by create_particle_system when the first system is made
+np = None
+
+
+def render_sprites(colors):
+    """One dot surface per colour, radius and alpha step, in a flat lookup table
+
+    Shared by every particle system using the same colours.
+    """
+    sprites = _sprite_tables.get(colors)
+    if sprites is not None:
+        return sprites
+    sprites = []
+    for color in colors:
+        for radius in range(1, MAX_PARTICLE_SIZE + 1):
+            for level in range(ALPHA_LEVELS):
+                alpha = 255 * (level + 1) // ALPHA_LEVELS
+                surface = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+                pygame.draw.circle(surface, (*color, alpha), (radius, radius), radius)
+                sprites.append(surface)
+    _sprite_tables[colors] = sprites
+    return sprites
+
+
+class NullParticles:
+    """Particle backend used when NumPy is not installed, effects fall back to plain blits"""
+    enabled = False
+    count = 0
+
+    def emit(self, preset, position, count=None):
+        pass
+
+    def update(self, dt):
+        pass
+
+    def draw(self, screen):
+        pass
+
+    def clear(self):
+        pass
+
+
+class ParticleSystem:
+    """Particles kept in NumPy arrays, stepped in one vectorized update
+
+    Every live particle sits in the first `count` rows of the arrays, dead
+    ones are compacted away after each step. Drawing picks a pre-rendered
+    dot per colour, size and alpha step and hands them all to one
+    Surface.blits call. Made through create_particle_system, which imports
+    NumPy.
+    """
+    enabled = True
+
+    def __init__(self, presets=PARTICLE_PRESETS, capacity=1024, seed=None):
+        self.presets = presets
+        self.count = 0
+        # Visual randomness only, battle rolls keep their own seeded RNG. A
+        # seed makes the effects repeat exactly, for offline rendering.
+        self.random = np.random.default_rng(seed)
+        self.allocate(capacity)
+
+        colors = []
+        self.preset_colors = {}
+        for name, preset in presets.items():
+            for color in preset['colors']:
+                if color not in colors:
+                    colors.append(color)
+            self.preset_colors[name] = np.array([colors.index(color) for color in preset['colors']],
+                                                dtype=np.int32)
+        self.sprites = render_sprites(tuple(colors))
+
+    def allocate(self, capacity):
+        old = getattr(self, 'position', None)
+        self.capacity = capacity
+        fields = {
+            'position': np.zeros((capacity, 2), dtype=np.float32),
+            'velocity': np.zeros((capacity, 2), dtype=np.float32),
+            'life': np.zeros(capacity, dtype=np.float32),
+            'max_life': np.ones(capacity, dtype=np.float32),
+            'size': np.zeros(capacity, dtype=np.float32),
+            'gravity': np.zeros(capacity, dtype=np.float32),
+            'drag': np.zeros(capacity, dtype=np.float32),
+            'color': np.zeros(capacity, dtype=np.int32),
+        }
+        for name, array in fields.items():
+            if old is not None:
+                array[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, array)
+
+    def emit(self, preset, position, count=None):
+        """Spawn particles of a preset at a position, a burst of the preset's size by default"""
+        settings = self.presets[preset]
+        count = settings['burst'] if count is None else count
+        if self.count + count > self.capacity and self.capacity < MAX_PARTICLES:
+            self.allocate(min(max(self.capacity * 2, self.count + count), MAX_PARTICLES))
+        count = min(count, self.capacity - self.count)
+        if count <= 0:
+            return
+
+        start, end = self.count, self.count + count
+        rand = self.random
+        half_spread = np.radians(settings['spread']) / 2
+        angle = np.radians(settings['direction']) + rand.uniform(-half_spread, half_spread, count)
+        speed = rand.uniform(*settings['speed'], count)
+        self.position[start:end] = position
+        self.velocity[start:end, 0] = np.cos(angle) * speed
+        self.velocity[start:end, 1] = np.sin(angle) * speed
+        life = rand.uniform(*settings['life'], count)
+        self.life[start:end] = life
+        self.max_life[start:end] = life
+        self.size[start:end] = rand.uniform(*settings['size'], count)
+        self.gravity[start:end] = settings['gravity']
+        self.drag[start:end] = settings['drag']
+        self.color[start:end] = rand.choice(self.preset_colors[preset], count)
+        self.count = end
+
+    def update(self, dt):
+        n = self.count
+        if not n:
+            return
+        velocity = self.velocity[:n]
+        velocity[:, 1] += self.gravity[:n] * dt
+        velocity *= np.maximum(0.0, 1.0 - self.drag[:n] * dt)[:, None]
+        self.position[:n] += velocity * dt
+        self.life[:n] -= dt
+
+        alive = self.life[:n] > 0
+        live = int(np.count_nonzero(alive))
+        if live < n:
+            for name in ('position', 'velocity', 'life', 'max_life', 'size', 'gravity', 'drag', 'color'):
+                array = getattr(self, name)
+                array[:live] = array[:n][alive]
+            self.count = live
+
+    def draw(self, screen):
+        n = self.count
+        if not n:
+            return
+        fade = self.life[:n] / self.max_life[:n]
+        # Particles shrink and fade out together over their life
+        radius = np.clip(np.ceil(self.size[:n] * fade), 1, MAX_PARTICLE_SIZE).astype(np.int32)
+        level = np.minimum((fade * ALPHA_LEVELS).astype(np.int32), ALPHA_LEVELS - 1)
+        index = (self.color[:n] * MAX_PARTICLE_SIZE + radius - 1) * ALPHA_LEVELS + level
+        corner = (self.position[:n] - radius[:, None]).astype(np.int32)
+        sprites = self.sprites
+        screen.blits(list(zip([sprites[i] for i in index.tolist()], corner.tolist())), doreturn=False)
+
+    def clear(self):
+        self.count = 0
+
+
+class Emitter:
+    """Emits a preset continuously at its rate from a position that can move every frame"""
+
+    def __init__(self, particles, preset, position=(0, 0)):
+        self.particles = particles
+        self.preset = preset
+        self.position = position
+        self.rate = particles.presets[preset]['rate'] if particles.enabled else 0
+        self.pending = 0.0
+
+    def update(self, dt):
+        self.pending += self.rate * dt
+        count = int(self.pending)
+        if count:
+            self.pending -= count
+            self.particles.emit(self.preset, self.position, count)
+
+
+_numpy_missing = False
+
+
+def create_particle_system(seed=None):
+    """A ParticleSystem, or NullParticles when NumPy is not installed"""
+    global np, _numpy_missing
+    if np is None and not _numpy_missing:
+        # Imported on first use, NumPy is slow to import and not needed for the menus
+        try:
+            import numpy
+        except ImportError:
+            _numpy_missing = True
+            log.warning("NumPy is not installed, particle effects are disabled")
+        else:
+            np = numpy
+    if np is None:
+        return NullParticles()
+    return ParticleSystem(seed=seed)
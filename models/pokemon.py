@@ -1,50 +1,118 @@
 import pygame
 import json
+import math
 from config import *
 import os
+from data.move_db import get_move_database
+from models.assets import load_image, load_sprite
+from models.log import get_logger
+from models.memory import track
+
+log = get_logger('data')
+
+STATES = ['poison', 'burn', 'freeze', 'asleep']
+STATE_ICON_SIZE = (24, 24)
+
+# Levelling: level L needs L * EXPERIENCE_PER_LEVEL experience to reach L + 1,
+# and every stat grows by STAT_GROWTH per level from the species' base stats
+MAX_LEVEL = 100
+EXPERIENCE_PER_LEVEL = 100
+STAT_GROWTH = 1.1
+GROWTH_TABLE = [STAT_GROWTH ** (level - 1) for level in range(1, MAX_LEVEL + 1)]
+
+# Stats of every level per species, keyed by id and base stats
+_stat_tables = {}
+
+
+def stat_table(species_id, base_stats):
+    """Each stat of a species at every level, computed once from its base stats"""
+    key = (species_id, tuple(base_stats.items()))
+    table = _stat_tables.get(key)
+    if table is None:
+        table = _stat_tables[key] = {stat: [int(value * growth) for growth in GROWTH_TABLE]
+                                     for stat, value in base_stats.items()}
+    return table
+
+
+def experience_to_reach(level):
+    """Total experience from level 1 to the start of a level"""
+    return EXPERIENCE_PER_LEVEL * level * (level - 1) // 2
+
+
+def level_for_experience(total):
+    """The level reached with a total experience, inverting experience_to_reach in O(1)"""
+    level = (1 + math.isqrt(1 + 8 * total // EXPERIENCE_PER_LEVEL)) // 2
+    # The integer square root can land one off either way
+    if experience_to_reach(level + 1) <= total:
+        level += 1
+    elif experience_to_reach(level) > total:
+        level -= 1
+    return max(1, min(level, MAX_LEVEL))
+
+
+def sprite_path(pokemon_data):
+    return os.path.join(DATA_DIR, pokemon_data['sprite_path'].replace('\\', '/'))
+
+
+def state_icon_path(state):
+    return os.path.join(BATTLE_IMAGES_DIR, 'states', f'{state}.png')
+
 
 class Pokemon:
     def __init__(self, pokemon_data):
         self.id = pokemon_data['id']
         self.name = pokemon_data['name'].capitalize()
         self.types = pokemon_data['types']
-        self.stats = pokemon_data['stats']
+        # Stats follow from the base stats and the level, see set_level()
+        self.base_stats = pokemon_data['stats']
+        self.level = pokemon_data.get('level', 1)
+        self.stats = self.stats_at(self.level)
         self.moves = pokemon_data['moves']
+        self.move_ids = [get_move_database().intern(move) for move in self.moves]
         self.current_hp = pokemon_data.get('current_hp', self.stats['hp'])
         
-        # Load sprite using relative path
-        sprite_path = os.path.join(DATA_DIR, pokemon_data['sprite_path'].replace('\\', '/'))
+        # Sprites are shared between every instance of the same Pokemon. They are
+        # cropped to their opaque pixels, the anchor places them in the original frame
+        path = sprite_path(pokemon_data)
         try:
-            self.sprite = pygame.image.load(sprite_path)
+            self.sprite, self.sprite_anchor, self.sprite_frame = load_sprite(
+                path, pokemon_data.get('sprite_anchor'), pokemon_data.get('sprite_frame'))
         except FileNotFoundError:
-            print(f"Could not load sprite at {sprite_path}")
+            log.warning("Could not load sprite at %s", path)
             # Create a fallback sprite
             self.sprite = pygame.Surface((64, 64))
             self.sprite.fill((255, 0, 255))  # Fill with magenta to make missing sprites obvious
+            self.sprite_anchor, self.sprite_frame = (0, 0), (64, 64)
         self.position = None
         self.state = None  # Can be: 'poison', 'burn', 'freeze', 'asleep' or None
         self.state_duration = 0  # For temporary states like sleep
         
         # Load state icons using relative paths
         self.state_icons = {}
-        for state in ['poison', 'burn', 'freeze', 'asleep']:
+        for state in STATES:
             try:
-                icon_path = os.path.join(BATTLE_IMAGES_DIR, 'states', f'{state}.png')
-                icon = pygame.image.load(icon_path)
-                self.state_icons[state] = pygame.transform.scale(icon, (24, 24))
+                self.state_icons[state] = load_image(state_icon_path(state), STATE_ICON_SIZE)
             except:
-                print(f"Warning: Could not load {state} icon")
+                log.warning("Could not load %s icon", state)
                 surface = pygame.Surface((24, 24))
                 surface.fill((255, 0, 0))
                 self.state_icons[state] = surface
         
-        self.level = pokemon_data.get('level', 1)
         self.experience = pokemon_data.get('experience', 0)
         self.evolution_level = pokemon_data.get('evolution_level', 0)  
+        track(self, 'Pokemon')
+        
+    def sprite_offset(self, scale=1, flip=False):
+        """Where the cropped sprite sits in its original frame, scaled and optionally mirrored"""
+        x, y = self.sprite_anchor
+        if flip:
+            x = self.sprite_frame[0] - x - self.sprite.get_width()
+        return int(x * scale), int(y * scale)
         
     def draw(self, screen, position):
         self.position = position
-        screen.blit(self.sprite, position)
+        x, y = self.sprite_offset()
+        screen.blit(self.sprite, (position[0] + x, position[1] + y))
         
     def take_damage(self, damage):
         self.current_hp = max(0, self.current_hp - damage)
@@ -56,30 +124,41 @@ class Pokemon:
     def is_fainted(self):
         return self.current_hp <= 0
         
+    def stats_at(self, level):
+        table = stat_table(self.id, self.base_stats)
+        return {stat: values[level - 1] for stat, values in table.items()}
+        
+    def set_level(self, level):
+        self.level = max(1, min(level, MAX_LEVEL))
+        self.stats = self.stats_at(self.level)
+        
+    def experience_needed(self):
+        """Experience to gain within the current level before the next one"""
+        return self.level * EXPERIENCE_PER_LEVEL
+        
     def gain_experience(self, amount):
-        self.experience += amount
-        # Simple level up system: need 100 exp per level
-        if self.experience >= self.level * 100:
-            self.level_up()
-            return True
-        return False
+        """Add experience, possibly several levels at once, returns the number of levels gained"""
+        total = experience_to_reach(self.level) + self.experience + amount
+        level = level_for_experience(total)
+        if level == MAX_LEVEL:
+            total = min(total, experience_to_reach(MAX_LEVEL))
+        gained = level - self.level
+        self.experience = total - experience_to_reach(level)
+        if gained:
+            self.set_level(level)
+            self.current_hp = self.stats['hp']  # Heal on level up
+        return gained
         
     def level_up(self):
-        self.level += 1
-        self.experience = 0
-        # Increase stats on level up
-        for stat in self.stats:
-            self.stats[stat] = int(self.stats[stat] * 1.1)  # 10% increase
-        self.current_hp = self.stats['hp']  # Heal on level up 
+        self.gain_experience(self.experience_needed() - self.experience)
 
     def load_state_icons(self):
         self.state_icons = {}
-        for state in ['poison', 'burn', 'freeze', 'asleep']:
+        for state in STATES:
             try:
-                icon = pygame.image.load(os.path.join(BATTLE_IMAGES_DIR, 'states', f'{state}.png'))
-                self.state_icons[state] = pygame.transform.scale(icon, (24, 24))
+                self.state_icons[state] = load_image(state_icon_path(state), STATE_ICON_SIZE)
             except:
-                print(f"Warning: Could not load {state} icon")
+                log.warning("Could not load %s icon", state)
                 # Create a fallback colored rectangle
                 surface = pygame.Surface((24, 24))
                 surface.fill((255, 0, 0))  # Red fallback
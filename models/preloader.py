@@ -0,0 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AssetPreloader:
+    """Loads assets on worker threads ahead of the scene that needs them
+
+    Each asset is queued once under its key. The returned futures let a
+    scene check progress every frame instead of blocking the main loop.
+    """
+
+    def __init__(self, max_workers=2):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='preload')
+        self.futures = {}
+
+    def submit(self, key, loader, *args):
+        """Queue a load unless the same asset is already queued, returns its Future"""
+        future = self.futures.get(key)
+        if future is None:
+            future = self.executor.submit(loader, *args)
+            self.futures[key] = future
+        return future
+
+    def progress(self, futures=None):
+        """Fraction of the given loads (every queued load by default) that finished"""
+        if futures is None:
+            futures = list(self.futures.values())
+        if not futures:
+            return 1.0
+        return sum(future.done() for future in futures) / len(futures)
+
+    def ready(self, futures=None):
+        return self.progress(futures) >= 1.0
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,185 @@
+import random
+import struct
+from data.move_db import get_move_database
+from models.battle_rules import STATE_EFFECTS, Combatant, HeadlessBattle
+
+REPLAY_MAGIC = b'PKRP'
+REPLAY_VERSION = 2
+HEADER_FORMAT = '<4sHQBB'
+# HP and stats are 32 bit, stats grow past 65535 at high levels
+COMBATANT_FORMAT = '<HHIBB'
+
+# Commands are stored as (command, argument) byte pairs
+ATTACK = 1  # argument: move slot of the active player Pokemon
+ENEMY_ATTACK = 2  # argument: move slot chosen by the enemy AI
+ITEM = 3  # argument: bag item index
+SWITCH = 4  # argument: party index
+RUN = 5
+
+STATE_CODES = [None] + list(STATE_EFFECTS)
+RESULT_CODES = [None, 'victory', 'defeat', 'run']
+
+
+def snapshot_pokemon(pokemon):
+    """Battle relevant fields of a Pokemon, enough to rebuild it without pygame"""
+    return {
+        'id': pokemon.id,
+        'name': pokemon.name,
+        'level': pokemon.level,
+        'current_hp': pokemon.current_hp,
+        'state': pokemon.state,
+        'state_duration': pokemon.state_duration,
+        'stats': dict(pokemon.stats),
+        'moves': list(pokemon.moves)
+    }
+
+
+def combatant_from_snapshot(snapshot):
+    moves = get_move_database()
+    return Combatant(snapshot['name'], snapshot['stats'], snapshot['current_hp'],
+                     snapshot['state'], snapshot['state_duration'],
+                     tuple(moves.intern(move) for move in snapshot['moves']))
+
+
+def _pack_string(text):
+    data = text.encode()
+    return struct.pack('<B', len(data)) + data
+
+
+def _unpack_string(data, offset):
+    length = data[offset]
+    return data[offset + 1:offset + 1 + length].decode(), offset + 1 + length
+
+
+class Replay:
+    """A recorded battle: seed, party snapshot, command stream and outcome"""
+
+    def __init__(self, seed, party, active, enemy, bag, commands=None, result=None, final_hp=None):
+        self.seed = seed
+        self.party = party
+        self.active = active
+        self.enemy = enemy
+        self.bag = bag
+        self.commands = commands or []
+        self.result = result
+        self.final_hp = final_hp or []
+
+    @classmethod
+    def from_battle(cls, seed, party, player_pokemon, enemy_pokemon, bag_items):
+        return cls(seed, [snapshot_pokemon(p) for p in party], party.index(player_pokemon),
+                   snapshot_pokemon(enemy_pokemon), [(item['name'], item['quantity']) for item in bag_items])
+
+    def record(self, command, argument=0):
+        self.commands.append((command, argument))
+
+    def finish(self, result, party, enemy_pokemon):
+        self.result = result
+        self.final_hp = [enemy_pokemon.current_hp] + [p.current_hp for p in party]
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+    def to_bytes(self):
+        parts = [struct.pack(HEADER_FORMAT, REPLAY_MAGIC, REPLAY_VERSION, self.seed,
+                             self.active, len(self.party))]
+        for snapshot in [self.enemy] + self.party:
+            parts.append(struct.pack(COMBATANT_FORMAT, snapshot['id'], snapshot['level'],
+                                     snapshot['current_hp'], STATE_CODES.index(snapshot['state']),
+                                     snapshot['state_duration']))
+            parts.append(_pack_string(snapshot['name']))
+            parts.append(struct.pack('<B', len(snapshot['stats'])))
+            for stat, value in snapshot['stats'].items():
+                parts.append(_pack_string(stat) + struct.pack('<I', value))
+            parts.append(struct.pack('<B', len(snapshot['moves'])))
+            parts.extend(_pack_string(move) for move in snapshot['moves'])
+
+        parts.append(struct.pack('<B', len(self.bag)))
+        parts.extend(_pack_string(name) + struct.pack('<H', quantity) for name, quantity in self.bag)
+        parts.append(struct.pack('<I', len(self.commands)))
+        parts.append(bytes(value for command in self.commands for value in command))
+        parts.append(struct.pack('<BB', RESULT_CODES.index(self.result), len(self.final_hp)))
+        parts.append(struct.pack(f'<{len(self.final_hp)}I', *self.final_hp))
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, seed, active, party_size = struct.unpack_from(HEADER_FORMAT, data)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError("Not a replay file or unsupported replay version")
+        offset = struct.calcsize(HEADER_FORMAT)
+
+        snapshots = []
+        for _ in range(party_size + 1):
+            pokemon_id, level, current_hp, state, state_duration = struct.unpack_from(COMBATANT_FORMAT, data, offset)
+            offset += struct.calcsize(COMBATANT_FORMAT)
+            name, offset = _unpack_string(data, offset)
+            stats = {}
+            stat_count = data[offset]
+            offset += 1
+            for _ in range(stat_count):
+                stat, offset = _unpack_string(data, offset)
+                stats[stat], = struct.unpack_from('<I', data, offset)
+                offset += 4
+            moves = []
+            move_count = data[offset]
+            offset += 1
+            for _ in range(move_count):
+                move, offset = _unpack_string(data, offset)
+                moves.append(move)
+            snapshots.append({'id': pokemon_id, 'name': name, 'level': level, 'current_hp': current_hp,
+                              'state': STATE_CODES[state], 'state_duration': state_duration,
+                              'stats': stats, 'moves': moves})
+
+        bag = []
+        bag_size = data[offset]
+        offset += 1
+        for _ in range(bag_size):
+            name, offset = _unpack_string(data, offset)
+            quantity, = struct.unpack_from('<H', data, offset)
+            bag.append((name, quantity))
+            offset += 2
+        command_count, = struct.unpack_from('<I', data, offset)
+        offset += 4
+        raw = data[offset:offset + command_count * 2]
+        commands = list(zip(raw[::2], raw[1::2]))
+        offset += command_count * 2
+        result, hp_count = struct.unpack_from('<BB', data, offset)
+        final_hp = list(struct.unpack_from(f'<{hp_count}I', data, offset + 2))
+        return cls(seed, snapshots[1:], active, snapshots[0], bag, commands,
+                   RESULT_CODES[result], final_hp)
+
+
+def play_replay(replay):
+    """Re-run a replay headless against the battle rules
+
+    Returns the result and the final HP of the enemy followed by the party.
+    """
+    party = [combatant_from_snapshot(snapshot) for snapshot in replay.party]
+    enemy = combatant_from_snapshot(replay.enemy)
+    battle = HeadlessBattle(party, enemy, [list(item) for item in replay.bag],
+                            random.Random(replay.seed), replay.active)
+
+    for command, argument in replay.commands:
+        if command == ATTACK or command == ENEMY_ATTACK:
+            battle.attack(argument, enemy_attacks=command == ENEMY_ATTACK)
+        elif command == ITEM:
+            battle.use_item(argument)
+        elif command == SWITCH:
+            battle.switch(argument)
+        elif command == RUN:
+            battle.run()
+        if battle.result:
+            break
+
+    return battle.result, [enemy.current_hp] + [p.current_hp for p in party]
+
+
+def verify_replay(replay):
+    """Whether playing the replay reproduces the recorded outcome"""
+    return play_replay(replay) == (replay.result, replay.final_hp)
@@ -0,0 +1,199 @@
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import Future
+import pygame
+from config import *
+from data.data_loader import load_pokemons
+from models.assets import load_attack_frames
+from models.battle import BattleSystem
+from models.log import get_logger
+from models.particles import create_particle_system
+from models.pokemon import Pokemon
+from models.replay import ATTACK, ENEMY_ATTACK, ITEM, SWITCH, RUN, Replay
+
+log = get_logger('replay')
+
+# Replays keep no timing, commands are issued once the battle has been idle
+# this long, and the last frames show the outcome for RESULT_HOLD seconds
+COMMAND_HOLD = 0.5
+RESULT_HOLD = 1.0
+FRAME_BYTES = WINDOW_WIDTH * WINDOW_HEIGHT * 3
+# zlib level of written PNGs, pygame's own encoder at level 6 is several times slower
+PNG_LEVEL = 1
+
+_pokemons_data = None
+
+
+def pokemon_from_snapshot(snapshot, pokemons_data):
+    """A full Pokemon with sprites, set to the state recorded in a replay snapshot"""
+    record = next((data for data in pokemons_data if data['id'] == snapshot['id']), None)
+    if record is None:
+        record = {'id': snapshot['id'], 'types': ['normal'], 'stats': snapshot['stats'],
+                  'sprite_path': os.path.join('sprites', f"{snapshot['id']}.png")}
+    pokemon = Pokemon(dict(record, name=snapshot['name'], moves=list(snapshot['moves']),
+                           level=snapshot['level']))
+    # The recorded stats win over the ones the current tables would give
+    pokemon.stats = dict(snapshot['stats'])
+    pokemon.current_hp = snapshot['current_hp']
+    pokemon.state = snapshot['state']
+    pokemon.state_duration = snapshot['state_duration']
+    return pokemon
+
+
+def _png_chunk(tag, data):
+    return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+
+
+def write_png(path, surface, level=PNG_LEVEL):
+    """Save a surface as an RGB PNG with unfiltered rows at a fast zlib level"""
+    width, height = surface.get_size()
+    pixels = pygame.image.tobytes(surface, 'RGB')
+    stride = width * 3
+    rows = b''.join(b'\x00' + pixels[y * stride:(y + 1) * stride] for y in range(height))
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(_png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+        f.write(_png_chunk(b'IDAT', zlib.compress(rows, level)))
+        f.write(_png_chunk(b'IEND', b''))
+
+
+class ReplayedEnemy:
+    """Stands in for the enemy AI, answering each enemy turn with the recorded move"""
+
+    def __init__(self, renderer):
+        self.renderer = renderer
+
+    def request_move(self, state):
+        commands = self.renderer.commands
+        if not commands or commands[0][0] != ENEMY_ATTACK:
+            raise ValueError("Replay has no recorded enemy move for this turn")
+        future = Future()
+        future.set_result(commands.popleft()[1])
+        return future
+
+
+class ReplayRenderer:
+    """Plays a replay through the battle screen on a fixed frame clock
+
+    Every frame advances the battle by exactly 1/FPS and the particles are
+    seeded from the replay, so frame N is the same in every process and a
+    recording can be rendered in independent segments.
+    """
+
+    def __init__(self, screen, replay, pokemons_data):
+        self.replay = replay
+        party = [pokemon_from_snapshot(snapshot, pokemons_data) for snapshot in replay.party]
+        enemy = pokemon_from_snapshot(replay.enemy, pokemons_data)
+        self.battle = BattleSystem(screen)
+        self.battle.particles = create_particle_system(seed=replay.seed)
+        self.battle.reset(party[replay.active], enemy, replay.seed,
+                          [{'name': name, 'quantity': quantity} for name, quantity in replay.bag], party)
+        self.battle.enemy_ai = ReplayedEnemy(self)
+        self.commands = deque(replay.commands)
+        self.dt = 1 / FPS
+        self.idle_for = 0.0
+        self.finished_for = 0.0
+        self.result = None
+
+    def idle(self):
+        battle = self.battle
+        return (battle.battle_state == 'main' and not battle.timeline.busy
+                and not battle.after_animation and not battle.pending_result)
+
+    def issue(self, command, argument):
+        battle = self.battle
+        if command == ATTACK:
+            return battle.command_attack(argument)
+        if command == ITEM:
+            return battle.command_item(argument)
+        if command == SWITCH:
+            return battle.command_switch(battle.all_player_pokemon[argument])
+        if command == RUN:
+            return battle.command_run()
+        raise ValueError(f"Unexpected replay command {command} while the player chooses")
+
+    def step(self):
+        """Advance one frame, returns False once the recording is over"""
+        if self.result or (not self.commands and self.idle()):
+            self.finished_for += self.dt
+            if self.finished_for >= RESULT_HOLD:
+                return False
+
+        result = self.battle.update(self.dt)
+        if result != 'continue' and not self.result:
+            self.result = result
+        if not self.result and self.commands and self.idle():
+            self.idle_for += self.dt
+            if self.idle_for >= COMMAND_HOLD:
+                self.idle_for = 0.0
+                result = self.issue(*self.commands.popleft())
+                if result != 'continue':
+                    self.result = result
+        return True
+
+    def count_frames(self):
+        frames = 1
+        while self.step():
+            frames += 1
+        return frames
+
+    def frames(self, start=0, stop=None):
+        """Draw and yield the frame numbers from start to stop, stepping through earlier ones without drawing"""
+        frame = 0
+        while stop is None or frame < stop:
+            if frame >= start:
+                self.battle.draw()
+                yield frame
+            if not self.step():
+                return
+            frame += 1
+
+
+def init_render_worker():
+    """Open a headless display and load the shared assets in a render process"""
+    global _pokemons_data
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    pygame.init()
+    pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    load_attack_frames()
+    _pokemons_data = load_pokemons()
+
+
+def create_renderer(path):
+    if _pokemons_data is None:
+        init_render_worker()
+    return ReplayRenderer(pygame.display.get_surface(), Replay.load(path), _pokemons_data)
+
+
+def count_replay_frames(path):
+    """Frames in the rendering of a replay, warning if the battle screen ends it differently"""
+    renderer = create_renderer(path)
+    frames = renderer.count_frames()
+    if renderer.result != renderer.replay.result:
+        log.warning("%s: rendered battle ends in %s, the replay recorded %s",
+                    os.path.basename(path), renderer.result, renderer.replay.result)
+    return frames
+
+
+def render_segment(path, start, stop, output, raw, png_level=PNG_LEVEL):
+    """Render frames start to stop of a replay to numbered PNGs in a directory or into a raw RGB stream
+
+    The raw stream must already be sized for the whole replay, each frame is
+    written at its own offset. Returns the number of frames written.
+    """
+    renderer = create_renderer(path)
+    screen = renderer.battle.screen
+    written = 0
+    if raw:
+        with open(output, 'r+b') as f:
+            for frame in renderer.frames(start, stop):
+                f.seek(frame * FRAME_BYTES)
+                f.write(pygame.image.tobytes(screen, 'RGB'))
+                written += 1
+    else:
+        for frame in renderer.frames(start, stop):
+            write_png(os.path.join(output, f"frame_{frame:06d}.png"), screen, png_level)
+            written += 1
+    return written
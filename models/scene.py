@@ -0,0 +1,106 @@
+import pygame
+from models.audio import get_audio
+from models.memory import scene_changed, track
+
+
+class Scene:
+    """A screen of the game, driven frame by frame by the SceneManager"""
+    # Subsystem the scene's surfaces are accounted to when tracking memory
+    memory_subsystem = 'Scene'
+
+    def __init__(self, game):
+        self.game = game
+        self.screen = game.screen
+        track(self, self.memory_subsystem)
+
+    def enter(self):
+        pass
+
+    def exit(self):
+        pass
+
+    def handle_event(self, event):
+        pass
+
+    def update(self, dt):
+        pass
+
+    def draw(self):
+        pass
+
+
+class SceneManager:
+    """Scene stack with a single top-level loop
+
+    Transitions requested while a frame runs are applied before the next
+    frame, so scenes never call into each other and finished scenes are
+    released as soon as they leave the stack.
+    """
+
+    def __init__(self):
+        self.stack = []
+        self.pending = []
+        self.running = False
+
+    @property
+    def current(self):
+        return self.stack[-1] if self.stack else None
+
+    def push(self, scene):
+        self.pending.append(('push', scene))
+
+    def pop(self):
+        self.pending.append(('pop', None))
+
+    def replace(self, scene):
+        self.pending.append(('replace', scene))
+
+    def switch(self, scene):
+        """Drop every scene above the root and show the given one"""
+        self.pending.append(('switch', scene))
+
+    def pop_to_root(self):
+        self.pending.append(('switch', None))
+
+    def quit(self):
+        self.running = False
+
+    def apply_pending(self):
+        changed = bool(self.pending)
+        while self.pending:
+            action, scene = self.pending.pop(0)
+            if action in ('pop', 'replace') and self.stack:
+                self.stack.pop().exit()
+            elif action == 'switch':
+                while len(self.stack) > 1:
+                    self.stack.pop().exit()
+            if scene is not None:
+                self.stack.append(scene)
+                scene.enter()
+        if changed and self.stack:
+            scene_changed(type(self.current).__name__)
+
+    def run(self, clock, fps, display):
+        self.running = True
+        self.apply_pending()
+        while self.running and self.stack:
+            scene = self.current
+            dt = clock.tick(fps) / 1000
+
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    self.quit()
+                    break
+                scene.handle_event(display.map_event(event))
+                # Events after a transition belong to the next scene
+                if self.pending:
+                    break
+
+            if self.running and not self.pending:
+                scene.update(dt)
+            if self.running and not self.pending:
+                scene.draw()
+                display.present()
+
+            self.apply_pending()
+            get_audio().update()
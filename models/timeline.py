@@ -0,0 +1,65 @@
+def linear(t):
+    return t
+
+
+def ease_out(t):
+    return 1 - (1 - t) * (1 - t)
+
+
+class Tween:
+    """A track on the timeline, reporting its eased progress from 0 to 1"""
+    __slots__ = ('start', 'duration', 'on_update', 'on_complete', 'ease')
+
+    def __init__(self, start, duration, on_update=None, on_complete=None, ease=linear):
+        self.start = start
+        self.duration = duration
+        self.on_update = on_update
+        self.on_complete = on_complete
+        self.ease = ease
+
+
+class Timeline:
+    """Schedules tweens and callbacks, advanced by the main loop's delta time"""
+
+    def __init__(self, speed=1.0):
+        self.time = 0.0
+        self.speed = speed
+        self.tracks = []
+
+    @property
+    def busy(self):
+        return bool(self.tracks)
+
+    def add(self, duration, on_update=None, on_complete=None, delay=0.0, ease=linear):
+        tween = Tween(self.time + delay, duration, on_update, on_complete, ease)
+        self.tracks.append(tween)
+        return tween
+
+    def call(self, callback, delay=0.0):
+        """Run a callback once the timeline reaches the given delay"""
+        return self.add(0.0, on_complete=callback, delay=delay)
+
+    def update(self, dt):
+        self.time += dt * self.speed
+        # Callbacks may schedule new tracks, those start on the next update
+        for tween in list(self.tracks):
+            elapsed = self.time - tween.start
+            if elapsed < 0:
+                continue
+            finished = elapsed >= tween.duration
+            if tween.on_update:
+                progress = 1.0 if finished else elapsed / tween.duration
+                tween.on_update(tween.ease(progress))
+            if finished:
+                self.tracks.remove(tween)
+                if tween.on_complete:
+                    tween.on_complete()
+
+    def finish(self):
+        """Complete every scheduled track immediately"""
+        while self.tracks:
+            self.time = max(tween.start + tween.duration for tween in self.tracks)
+            self.update(0.0)
+
+    def clear(self):
+        self.tracks = []
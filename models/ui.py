@@ -0,0 +1,157 @@
+import pygame
+from config import *
+from models.assets import load_font
+from models.audio import get_audio
+from models.memory import track
+
+# Grid cell size in pixels of the hit testing index
+HIT_CELL_SIZE = 64
+
+
+class Widget:
+    """A rectangle drawn from a surface cached per visual state
+
+    Subclasses implement render(state). The cache is dropped by
+    invalidate() when the content changes, otherwise drawing is one blit.
+    """
+
+    def __init__(self, rect):
+        self.rect = pygame.Rect(rect)
+        self.enabled = True
+        self.is_hovered = False
+        self._surfaces = {}
+
+    @property
+    def state(self):
+        if not self.enabled:
+            return 'disabled'
+        return 'hovered' if self.is_hovered else 'normal'
+
+    def render(self, state):
+        raise NotImplementedError
+
+    def invalidate(self):
+        self._surfaces.clear()
+
+    def surface(self):
+        state = self.state
+        surface = self._surfaces.get(state)
+        if surface is None:
+            surface = self._surfaces[state] = self.render(state)
+        return surface
+
+    def set_hovered(self, hovered):
+        self.is_hovered = hovered
+
+    def draw(self, screen):
+        screen.blit(self.surface(), self.rect)
+
+
+class Button(Widget):
+    def __init__(self, x, y, width, height, text, color, hover_color, font=None):
+        super().__init__((x, y, width, height))
+        self._text = text
+        self.color = color
+        self.hover_color = hover_color
+        self._font = font or load_font(32)
+        self.text_offset = 11
+        track(self, 'Button')
+
+    # Changing the label or font drops the cached surfaces
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, text):
+        if text != self._text:
+            self._text = text
+            self.invalidate()
+
+    @property
+    def font(self):
+        return self._font
+
+    @font.setter
+    def font(self, font):
+        if font is not self._font:
+            self._font = font
+            self.invalidate()
+
+    def render_frame(self, state):
+        surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        background = BUTTON_BLACK if state != 'disabled' else (*BUTTON_BLACK[:3], 80)
+        pygame.draw.rect(surface, background, surface.get_rect(), border_radius=15)
+        border_color = BRIGHT_YELLOW if state == 'hovered' else BLACK
+        border_width = 3 if state == 'hovered' else 2
+        pygame.draw.rect(surface, border_color, surface.get_rect(), border_width, border_radius=15)
+        return surface
+
+    def render(self, state):
+        surface = self.render_frame(state)
+        color = BRIGHT_YELLOW if state != 'disabled' else (150, 150, 150)
+        text_surface = self.font.render(self.text, True, color)
+        text_rect = text_surface.get_rect()
+        text_rect.centerx = self.rect.width // 2
+        text_rect.centery = self.rect.height // 2 + self.text_offset
+        surface.blit(text_surface, text_rect)
+        return surface
+
+    def set_hovered(self, hovered):
+        if hovered and not self.is_hovered:
+            get_audio().play('hover')
+        self.is_hovered = hovered
+
+
+class WidgetLayer:
+    """The active widgets of a screen, hit tested through a grid index
+
+    Only widgets in the layer receive mouse events, and a mouse move only
+    touches the widget it leaves and the one it enters.
+    """
+
+    def __init__(self, widgets=()):
+        self.hovered = None
+        self.set_widgets(widgets)
+
+    def set_widgets(self, widgets):
+        self.clear_hover()
+        self.widgets = list(widgets)
+        self.cells = {}
+        for widget in self.widgets:
+            rect = widget.rect
+            for cx in range(rect.left // HIT_CELL_SIZE, (rect.right - 1) // HIT_CELL_SIZE + 1):
+                for cy in range(rect.top // HIT_CELL_SIZE, (rect.bottom - 1) // HIT_CELL_SIZE + 1):
+                    self.cells.setdefault((cx, cy), []).append(widget)
+
+    def widget_at(self, pos):
+        for widget in self.cells.get((pos[0] // HIT_CELL_SIZE, pos[1] // HIT_CELL_SIZE), ()):
+            if widget.enabled and widget.rect.collidepoint(pos):
+                return widget
+        return None
+
+    def clear_hover(self):
+        if self.hovered:
+            self.hovered.set_hovered(False)
+            self.hovered = None
+
+    def handle_event(self, event):
+        """Track hovering, returns the widget clicked by this event if any"""
+        if event.type == pygame.MOUSEMOTION:
+            widget = self.widget_at(event.pos)
+            if widget is not self.hovered:
+                self.clear_hover()
+                if widget:
+                    widget.set_hovered(True)
+                    self.hovered = widget
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            widget = self.widget_at(event.pos)
+            if widget:
+                get_audio().play('click')
+                return widget
+        return None
+
+    def draw(self, screen):
+        for widget in self.widgets:
+            widget.draw(screen)
@@ -0,0 +1,165 @@
+"""Load generator for the battle server: many concurrent battles and turn latency
+
+    python tools/battle_load.py --connections 50 --battles 40 --duration 10
+    python tools/battle_load.py --unix /tmp/pk.sock --serve   # start a server in-process
+
+Each connection keeps --battles battles in flight, pipelined over the
+socket. Reports battles and turns per second and turn latency percentiles.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import INITIAL_POKEMON_COUNT, MAX_PLAYER_POKEMON, SERVER_HOST, SERVER_MAX_LINE, SERVER_PORT
+
+
+class Client:
+    """One connection, matching replies to requests by id"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.next_id = 0
+        self.pending = {}
+        self.receiver = asyncio.ensure_future(self.receive())
+
+    async def receive(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            reply = json.loads(line)
+            future = self.pending.pop(reply.get('id'), None)
+            if future and not future.done():
+                future.set_result(reply)
+        for future in self.pending.values():
+            future.set_exception(ConnectionError("server closed the connection"))
+
+    async def request(self, **request):
+        self.next_id += 1
+        request['id'] = self.next_id
+        future = asyncio.get_running_loop().create_future()
+        self.pending[self.next_id] = future
+        self.writer.write(json.dumps(request, separators=(',', ':')).encode() + b'\n')
+        return await future
+
+    async def close(self):
+        self.writer.close()
+        await self.receiver
+
+
+async def play_battle(client, rng, stats):
+    party = rng.sample(range(1, INITIAL_POKEMON_COUNT + 1), MAX_PLAYER_POKEMON)
+    reply = await client.request(op='start', party=party, seed=rng.getrandbits(32))
+    battle = reply['battle']
+    state = reply['state']
+    while state['result'] is None:
+        # Mostly attacks, with the odd item or switch
+        roll = rng.random()
+        usable = [i for i, quantity in enumerate(state['bag']) if quantity > 0]
+        alive = [i for i, (hp, _) in enumerate(state['party']) if hp > 0 and i != state['active']]
+        if roll < 0.05 and usable:
+            command = {'op': 'item', 'item': rng.choice(usable)}
+        elif roll < 0.1 and alive:
+            command = {'op': 'switch', 'pokemon': rng.choice(alive)}
+        else:
+            command = {'op': 'attack', 'move': rng.randrange(4)}
+
+        started = time.perf_counter()
+        reply = await client.request(battle=battle, **command)
+        stats['latencies'].append(time.perf_counter() - started)
+        if 'error' in reply:
+            if command['op'] != 'attack' or 'move' not in reply['error']:
+                stats['errors'] += 1
+            # Pokemon with fewer moves, fall back to the first one
+            reply = await client.request(op='attack', battle=battle, move=0)
+            if 'error' in reply:
+                stats['errors'] += 1
+                await client.request(op='end', battle=battle)
+                return
+        state = reply['state']
+    stats['battles'] += 1
+    stats['results'][state['result']] = stats['results'].get(state['result'], 0) + 1
+
+
+async def battle_loop(client, rng, stats, deadline):
+    while time.perf_counter() < deadline:
+        await play_battle(client, rng, stats)
+
+
+async def run_load(args):
+    server = None
+    if args.serve:
+        from models.battle_server import BattleServer
+        server = BattleServer()
+        await server.start(args.host, args.port, args.unix)
+
+    clients = []
+    for _ in range(args.connections):
+        if args.unix:
+            reader, writer = await asyncio.open_unix_connection(args.unix, limit=SERVER_MAX_LINE)
+        else:
+            reader, writer = await asyncio.open_connection(args.host, args.port, limit=SERVER_MAX_LINE)
+        clients.append(Client(reader, writer))
+
+    stats = {'latencies': [], 'battles': 0, 'errors': 0, 'results': {}}
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    deadline = started + args.duration
+    await asyncio.gather(*(battle_loop(client, random.Random(rng.getrandbits(32)), stats, deadline)
+                           for client in clients for _ in range(args.battles)))
+    elapsed = time.perf_counter() - started
+
+    for client in clients:
+        await client.close()
+    if server:
+        # Let the server notice the closed connections before the loop stops
+        while server.connections:
+            await asyncio.sleep(0.01)
+        server.server.close()
+        await server.server.wait_closed()
+    return stats, elapsed
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    parser.add_argument('--unix', metavar='PATH', help="connect to a Unix socket instead of TCP")
+    parser.add_argument('--connections', type=int, default=20)
+    parser.add_argument('--battles', type=int, default=50, help="battles in flight per connection")
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds to keep starting battles")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--serve', action='store_true', help="run the server in this process")
+    args = parser.parse_args()
+
+    stats, elapsed = asyncio.run(run_load(args))
+    latencies = sorted(stats['latencies'])
+    if not latencies:
+        print("no turns played")
+        sys.exit(1)
+    print(f"{args.connections * args.battles} simultaneous battles over {args.connections} connections, "
+          f"{elapsed:.1f}s")
+    print(f"{stats['battles']} battles ({stats['battles'] / elapsed:.0f}/s), "
+          f"{len(latencies)} turns ({len(latencies) / elapsed:.0f}/s), {stats['errors']} errors")
+    print("results: " + ", ".join(f"{result} {count}" for result, count in sorted(stats['results'].items())))
+    print("turn latency ms: " + ", ".join(
+        f"{name} {percentile(latencies, fraction) * 1000:.2f}"
+        for name, fraction in (('p50', 0.5), ('p90', 0.9), ('p99', 0.99), ('p99.9', 0.999))
+    ) + f", max {latencies[-1] * 1000:.2f}, mean {statistics.fmean(latencies) * 1000:.2f}")
+    sys.exit(1 if stats['errors'] else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Run the headless battle server
+
+    python tools/battle_server.py                      # TCP on SERVER_HOST:SERVER_PORT
+    python tools/battle_server.py --unix /tmp/pk.sock  # Unix socket
+
+The protocol is described in models/battle_server.py, tools/battle_load.py
+is a load generator for it.
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import SERVER_AI_DIFFICULTY, SERVER_HOST, SERVER_PORT
+from models.battle_server import BattleServer
+from models.enemy_ai import DIFFICULTY_LEVELS
+from models.log import configure_logging
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    parser.add_argument('--unix', metavar='PATH', help="listen on a Unix socket instead of TCP")
+    parser.add_argument('--difficulty', default=SERVER_AI_DIFFICULTY, choices=list(DIFFICULTY_LEVELS))
+    args = parser.parse_args()
+
+    configure_logging()
+    server = BattleServer(difficulty=args.difficulty)
+    if not server.pokemons:
+        print("error: data/pokemons.json is missing, run the game once to download it", file=sys.stderr)
+        sys.exit(2)
+    print(f"Serving battles on {args.unix or f'{args.host}:{args.port}'}, AI difficulty {args.difficulty}")
+    try:
+        asyncio.run(server.serve_forever(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Render recorded battle replays offline to numbered PNGs or a raw RGB frame stream
+
+    python tools/render_replays.py a.rpl -o frames          # frames/a/frame_000000.png ...
+    python tools/render_replays.py data/replays --raw       # frames/<name>.rgb per replay
+    python tools/render_replays.py a.rpl --workers 8 --segment 120
+
+Each replay is split into segments of frames rendered in parallel by a
+process pool, every worker stepping through the frames before its segment
+without drawing them. Raw streams are 800x600 RGB24 at FPS frames per
+second, e.g. `ffmpeg -f rawvideo -pix_fmt rgb24 -s 800x600 -r 60 -i a.rgb a.mp4`.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from config import FPS, REPLAY_DIR, WINDOW_HEIGHT, WINDOW_WIDTH
+from models.replay_renderer import FRAME_BYTES, PNG_LEVEL, count_replay_frames, init_render_worker, render_segment
+
+
+def replay_paths(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith('.rpl'):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='*', default=[REPLAY_DIR], help="replay files or directories")
+    parser.add_argument('-o', '--output', default='frames', help="output directory")
+    parser.add_argument('--raw', action='store_true', help="write one raw RGB24 stream per replay instead of PNGs")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="render processes")
+    parser.add_argument('--png-level', type=int, default=PNG_LEVEL, choices=range(10),
+                        help="zlib level of the PNGs, 0 is fastest and largest")
+    parser.add_argument('--segment', type=int, default=240, help="frames per segment handed to a worker")
+    args = parser.parse_args()
+
+    paths = list(replay_paths(args.paths))
+    if not paths:
+        print("No replays to render")
+        return
+
+    # Counting frames runs the battles without drawing, it also bakes the
+    # attack frame cache once before the workers start
+    init_render_worker()
+    jobs = []
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        try:
+            frames = count_replay_frames(path)
+        except (OSError, ValueError) as e:
+            print(f"{path}: could not render replay: {e}")
+            continue
+        if args.raw:
+            output = os.path.join(args.output, f"{name}.rgb")
+            os.makedirs(args.output, exist_ok=True)
+            with open(output, 'wb') as f:
+                f.truncate(frames * FRAME_BYTES)
+        else:
+            output = os.path.join(args.output, name)
+            os.makedirs(output, exist_ok=True)
+        jobs.append((path, frames, output))
+
+    started = time.perf_counter()
+    rendered = 0
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_render_worker) as pool:
+        futures = [pool.submit(render_segment, path, start, min(start + args.segment, frames), output,
+                               args.raw, args.png_level)
+                   for path, frames, output in jobs
+                   for start in range(0, frames, args.segment)]
+        for future in futures:
+            rendered += future.result()
+    elapsed = time.perf_counter() - started
+
+    for path, frames, output in jobs:
+        print(f"{os.path.basename(path)}: {frames} frames ({frames / FPS:.1f}s) -> {output}")
+    fps = rendered / elapsed if elapsed else 0.0
+    print(f"{len(jobs)} replays, {rendered} frames ({WINDOW_WIDTH}x{WINDOW_HEIGHT}) in {elapsed:.2f}s "
+          f"with {args.workers} workers: {fps:.0f} frames/s, {fps / FPS:.1f}x real time")
+
+
+if __name__ == '__main__':
+    main()
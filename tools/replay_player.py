@@ -0,0 +1,69 @@
+"""Play recorded battle replays headless and check them against their outcome
+
+    python tools/replay_player.py                    # every replay in data/replays
+    python tools/replay_player.py a.rpl --repeat 100 # time repeated playback
+
+Replays are recorded when RECORD_REPLAYS is enabled in config.py. Exits
+with code 1 if any replay does not reproduce its recorded outcome.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import REPLAY_DIR
+from models.replay import Replay, play_replay
+
+
+def replay_paths(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith('.rpl'):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='*', default=[REPLAY_DIR], help="replay files or directories")
+    parser.add_argument('--repeat', type=int, default=1, help="playbacks per replay, for timing")
+    parser.add_argument('--quiet', action='store_true', help="only print the summary and mismatches")
+    args = parser.parse_args()
+
+    replays = []
+    for path in replay_paths(args.paths):
+        try:
+            replays.append((path, Replay.load(path)))
+        except (OSError, ValueError) as e:
+            print(f"{path}: could not load replay: {e}")
+
+    mismatches = 0
+    battles = commands = 0
+    started = time.perf_counter()
+    for path, replay in replays:
+        for _ in range(args.repeat):
+            outcome = play_replay(replay)
+        battles += args.repeat
+        commands += args.repeat * len(replay.commands)
+
+        expected = (replay.result, replay.final_hp)
+        if outcome != expected:
+            mismatches += 1
+            print(f"MISMATCH {path}: recorded {expected}, replayed {outcome}")
+        elif not args.quiet:
+            print(f"ok {os.path.basename(path)}: {replay.result} after {len(replay.commands)} commands")
+    elapsed = time.perf_counter() - started
+
+    if battles:
+        print(f"\n{len(replays)} replays, {battles} battles in {elapsed:.3f}s "
+              f"({battles / elapsed:.0f} battles/s, {commands / elapsed:.0f} commands/s)")
+    print(f"{mismatches} mismatches")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+"""Soak test: a bot plays the real game loop headless and uncapped for many battles
+
+    python tools/soak.py --battles 2000                 # report every 50 battles
+    python tools/soak.py --battles 500 --report 20 --seed 7
+
+The bot posts synthetic mouse and key events: it enters a name, picks a
+team, fights, uses the bag, switches, runs and continues after results and
+game overs, saving under --name. Game.run is driven by a clock that never
+waits and steps the game by 1/FPS, so battles play out as they would at
+60 FPS, only faster.
+
+Every report window prints frame time percentiles, the Python heap and
+media bytes from the memory tracker, live objects, files opened through
+Python (from an audit hook, SDL's own file access is not seen) and the
+deepest scene and call stacks. Fails (exit code 1) when memory grows past
+--max-growth-mb from the first window, a stack keeps getting deeper, or
+the bot makes no progress for --stall-frames frames.
+"""
+import argparse
+import gc
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+from config import FPS
+from data.profile_index import get_profile_index
+from models.game import Game
+from models.memory import enable_memory_tracking
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows, peak RSS is left out there
+    resource = None
+
+
+def stack_depth():
+    frame = sys._getframe(1)
+    depth = 0
+    while frame is not None:
+        depth += 1
+        frame = frame.f_back
+    return depth
+
+
+def peak_rss_mb():
+    if resource is None:
+        return 0.0
+    # Kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (2**20 if sys.platform == 'darwin' else 2**10)
+
+
+class SoakClock:
+    """Stands in for the game clock: never waits, returns a fixed 1/FPS step and times each real frame"""
+
+    def __init__(self, on_frame):
+        self.on_frame = on_frame
+        self.last = None
+        self.frame_times = []
+
+    def tick(self, fps=0):
+        now = time.perf_counter()
+        if self.last is not None:
+            self.frame_times.append(now - self.last)
+        self.last = now
+        self.on_frame()
+        return 1000 / FPS
+
+    def get_fps(self):
+        return FPS
+
+
+class SoakBot:
+    """Plays the game through posted events, one decision per frame, and collects the soak stats"""
+
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.frames = 0
+        self.battles = 0
+        self.results = Counter()
+        self.battle_scene = None
+        self.last_progress = 0
+        self.failure = None
+        self.opens = Counter()
+        self.window_opens = 0
+        self.max_scene_depth = 0
+        self.max_call_depth = 0
+        self.windows = []
+        self.started = time.perf_counter()
+        sys.addaudithook(self.audit)
+
+        self.tracker = enable_memory_tracking()
+        self.game = Game()
+        self.game.clock = self.clock = SoakClock(self.on_frame)
+
+    def audit(self, event, args):
+        if event == 'open' and isinstance(args[0], str):
+            path = os.path.abspath(args[0])
+            if path.startswith(PROJECT_ROOT + os.sep):
+                path = os.path.relpath(path, PROJECT_ROOT)
+            self.opens[path] += 1
+            self.window_opens += 1
+
+    def post(self, event_type, **attributes):
+        if 'pos' in attributes:
+            scale = self.game.display.scale
+            attributes['pos'] = (attributes['pos'][0] * scale, attributes['pos'][1] * scale)
+        pygame.event.post(pygame.event.Event(event_type, **attributes))
+
+    def click(self, rect):
+        self.post(pygame.MOUSEMOTION, pos=rect.center, rel=(0, 0), buttons=(0, 0, 0))
+        self.post(pygame.MOUSEBUTTONDOWN, pos=rect.center, button=1)
+
+    def press(self, key, unicode=''):
+        self.post(pygame.KEYDOWN, key=key, unicode=unicode, mod=0)
+
+    def on_frame(self):
+        self.frames += 1
+        self.max_scene_depth = max(self.max_scene_depth, len(self.game.scenes.stack))
+        self.max_call_depth = max(self.max_call_depth, stack_depth())
+        scene = self.game.scenes.current
+        if scene is None:
+            return
+        name = type(scene).__name__
+
+        if name == 'BattleScene' and scene is not self.battle_scene:
+            if self.battle_scene is not None:
+                self.battle_finished()
+            self.battle_scene = scene
+            self.last_progress = self.frames
+            if self.battles >= self.args.battles:
+                self.stop()
+                return
+        elif name != 'BattleScene' and self.battle_scene is not None:
+            self.battle_finished()
+
+        if self.frames - self.last_progress > self.args.stall_frames:
+            self.failure = f"no progress for {self.args.stall_frames} frames in {name}"
+            self.stop()
+            return
+        getattr(self, f'play_{name}', self.play_other)(scene)
+
+    def battle_finished(self):
+        # Victories and defeats are pending results, running away is the only other way out
+        self.results[self.battle_scene.battle.pending_result or 'run'] += 1
+        self.battle_scene = None
+        self.battles += 1
+        self.last_progress = self.frames
+        if self.battles % self.args.report == 0:
+            self.end_window()
+
+    def stop(self):
+        # The frames since the last full window make a short one
+        if self.battles % self.args.report:
+            self.end_window()
+        self.game.scenes.quit()
+
+    def play_MainMenuScene(self, scene):
+        buttons = scene.buttons
+        can_continue = get_profile_index().can_continue(self.args.name)
+        choice = 'continue' if can_continue and self.rng.random() < 0.5 else 'new_game'
+        self.click(buttons[choice].rect)
+
+    def play_NameEntryScene(self, scene):
+        if scene.input_text != self.args.name:
+            if scene.input_text:
+                self.press(pygame.K_BACKSPACE)
+            else:
+                for char in self.args.name:
+                    self.press(pygame.K_a, char)
+        else:
+            self.press(pygame.K_RETURN, '\r')
+
+    def play_PokemonSelectScene(self, scene):
+        for _ in range(self.rng.randrange(3)):
+            self.press(pygame.K_DOWN)
+        self.press(pygame.K_RETURN, '\r')
+
+    def play_BattleScene(self, scene):
+        battle = scene.battle
+        if battle.battle_state == 'main':
+            choices = ['fight'] * 6 + ['bag', 'run']
+            if any(p is not battle.player_pokemon and not p.is_fainted() for p in battle.all_player_pokemon):
+                choices += ['pokemon']
+            self.click(battle.command_buttons[self.rng.choice(choices)].rect)
+        elif battle.battle_state == 'fight':
+            self.click(self.rng.choice(list(battle.move_buttons.values())).rect)
+        elif battle.battle_state == 'bag':
+            self.press(self.rng.choice([pygame.K_DOWN, pygame.K_RETURN, pygame.K_RETURN, pygame.K_ESCAPE]))
+        elif battle.battle_state == 'pokemon':
+            buttons = [button for pokemon, button in battle.pokemon_switch_buttons.items()
+                       if pokemon is not battle.player_pokemon and not pokemon.is_fainted()]
+            if buttons:
+                self.click(self.rng.choice(buttons).rect)
+            else:
+                self.press(pygame.K_ESCAPE)
+
+    def play_LoadingScene(self, scene):
+        pass
+
+    def play_other(self, scene):
+        # Result, game over and evolution screens all go on with Enter
+        if self.frames % 10 == 0:
+            self.press(pygame.K_RETURN, '\r')
+
+    def end_window(self):
+        frame_times = sorted(self.clock.frame_times)
+        self.clock.frame_times = []
+        gc.collect()
+        window = {
+            'battles': self.battles,
+            'frames': len(frame_times),
+            'p50': frame_times[len(frame_times) // 2] * 1000,
+            'p99': frame_times[int(len(frame_times) * 0.99)] * 1000,
+            'max': frame_times[-1] * 1000,
+            'memory': self.tracker.total_bytes() / 2**20,
+            'objects': len(gc.get_objects()),
+            'rss': peak_rss_mb(),
+            'opens': self.window_opens,
+            'scenes': self.max_scene_depth,
+            'calls': self.max_call_depth,
+        }
+        self.windows.append(window)
+        self.window_opens = 0
+        self.max_scene_depth = self.max_call_depth = 0
+        if len(self.windows) == 1:
+            print(f"{'battles':>8} {'frames':>8} {'p50 ms':>7} {'p99 ms':>7} {'max ms':>7} {'memory MB':>10} "
+                  f"{'objects':>8} {'peak rss':>9} {'opens':>6} {'scenes':>6} {'calls':>6}")
+        print(f"{window['battles']:8d} {window['frames']:8d} {window['p50']:7.2f} {window['p99']:7.2f} "
+              f"{window['max']:7.1f} {window['memory']:10.1f} {window['objects']:8d} {window['rss']:9.1f} "
+              f"{window['opens']:6d} {window['scenes']:6d} {window['calls']:6d}", flush=True)
+
+    def run(self):
+        try:
+            self.game.run()
+        except SystemExit:
+            pass
+        return self.summary()
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        frames = sum(window['frames'] for window in self.windows)
+        print(f"\n{self.battles} battles ({', '.join(f'{n} {r}' for r, n in self.results.most_common())}), "
+              f"{frames} frames in {elapsed:.1f}s: {frames / elapsed:.0f} frames/s, "
+              f"{frames / elapsed / FPS:.1f}x real time")
+        if self.opens:
+            print("most opened files: " + ", ".join(f"{path} x{count}" for path, count in self.opens.most_common(5)))
+
+        failures = [self.failure] if self.failure else []
+        # The first window warms the caches, growth is measured from its end
+        if len(self.windows) >= 2:
+            first, last = self.windows[0], self.windows[-1]
+            growth = last['memory'] - first['memory']
+            print(f"memory {first['memory']:.1f} -> {last['memory']:.1f} MB ({growth:+.1f} MB), "
+                  f"objects {first['objects']} -> {last['objects']} ({last['objects'] - first['objects']:+d}), "
+                  f"median frame {statistics.median(w['p50'] for w in self.windows):.2f} ms")
+            if growth > self.args.max_growth_mb:
+                failures.append(f"memory grew {growth:.1f} MB, over the {self.args.max_growth_mb:.1f} MB limit")
+            for depth in ('scenes', 'calls'):
+                depths = [window[depth] for window in self.windows]
+                if depths[-1] > depths[0] and depths == sorted(depths):
+                    failures.append(f"{depth} stack deepens every window: {depths[0]} -> {depths[-1]}")
+
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--battles', type=int, default=1000)
+    parser.add_argument('--report', type=int, default=50, help="battles per report window")
+    parser.add_argument('--seed', type=int, default=1, help="seed of the bot's choices")
+    parser.add_argument('--name', default='SoakBot', help="player name the bot saves under")
+    parser.add_argument('--max-growth-mb', type=float, default=16.0,
+                        help="memory growth allowed from the first report window to the last")
+    parser.add_argument('--stall-frames', type=int, default=FPS * 600,
+                        help="frames without a battle starting or ending before giving up")
+    args = parser.parse_args()
+    sys.exit(SoakBot(args).run())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""Startup benchmark: import time report and time to first menu frame
+
+    python tools/startup_bench.py              # check against the budget
+    python tools/startup_bench.py --save       # also record a local baseline
+
+Fails (exit code 1) when the median time to first frame goes over the
+budget or regresses past the tolerance of the saved baseline, or when a
+heavy optional module is imported on startup.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+# Milliseconds from interpreter start to the first main menu frame
+STARTUP_BUDGET_MS = 1500
+REGRESSION_TOLERANCE = 0.20
+BASELINE_FILE = os.path.join(PROJECT_ROOT, 'assets', 'cache', 'startup_baseline.json')
+# Modules only needed for downloading, baking or particle effects, never imported
+# by the game on the startup path
+HEAVY_MODULES = ['PIL', 'requests', 'numpy']
+
+
+def first_frame():
+    """Child process: start the game, draw the first menu frame and report the time"""
+    started = time.perf_counter()
+    import pygame
+    # pygame itself pulls in NumPy when it is installed, that is not ours to avoid
+    preloaded = sorted(sys.modules)
+    from data.move_db import MOVES_FILE
+    from models.game import Game
+    from models.menu import MainMenuScene
+
+    game = Game()
+    # Downloads would time the network, not the startup path
+    if not game.pokemons_data or not os.path.exists(MOVES_FILE):
+        print("error: data/pokemons.json or data/moves.json is missing, run the game once to download them",
+              file=sys.stderr)
+        sys.exit(2)
+    # Game.run does this before its first frame
+    game.initialize_game_data()
+    game.scenes.push(MainMenuScene(game))
+    game.scenes.apply_pending()
+    game.scenes.current.update(0)
+    game.scenes.current.draw()
+    pygame.display.flip()
+    elapsed = time.perf_counter() - started
+    modules = sorted(set(sys.modules).difference(preloaded))
+    print(json.dumps({'first_frame': elapsed, 'modules': modules}))
+
+
+def child_env():
+    env = dict(os.environ)
+    env.setdefault('SDL_VIDEODRIVER', 'dummy')
+    env.setdefault('SDL_AUDIODRIVER', 'dummy')
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+    return env
+
+
+def measure_first_frame():
+    """Wall time of a fresh interpreter until the first frame, in milliseconds"""
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), '--child'],
+                            cwd=PROJECT_ROOT, env=child_env(), capture_output=True, text=True)
+    wall = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        sys.exit(result.returncode)
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    return wall, report['first_frame'] * 1000, report['modules']
+
+
+def import_time_report(top):
+    """Slowest imports of models.game by cumulative time, from python -X importtime"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import models.game'],
+                            cwd=PROJECT_ROOT, env=child_env(), capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = [part.strip() for part in line.split(':', 1)[1].split('|')]
+        rows.append((int(cumulative_us), int(self_us), name))
+    rows.sort(reverse=True)
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    for cumulative_us, self_us, name in rows[:top]:
+        print(f"{cumulative_us / 1000:14.1f} {self_us / 1000:8.1f}  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=STARTUP_BUDGET_MS, help="budget in ms")
+    parser.add_argument('--top', type=int, default=15, help="imports to list in the report")
+    parser.add_argument('--save', action='store_true', help="save the result as the local baseline")
+    args = parser.parse_args()
+
+    if args.child:
+        first_frame()
+        return
+
+    import_time_report(args.top)
+
+    runs = [measure_first_frame() for _ in range(args.runs)]
+    wall = statistics.median(run[0] for run in runs)
+    in_process = statistics.median(run[1] for run in runs)
+    print(f"\ntime to first frame: {wall:.0f} ms (median of {args.runs}, "
+          f"{in_process:.0f} ms after interpreter start), budget {args.budget:.0f} ms")
+
+    failures = []
+    if wall > args.budget:
+        failures.append(f"over the {args.budget:.0f} ms budget")
+    loaded = [name for name in HEAVY_MODULES if name in runs[0][2]]
+    if loaded:
+        failures.append(f"heavy modules imported on startup: {', '.join(loaded)}")
+    try:
+        with open(BASELINE_FILE, 'r') as f:
+            baseline = json.load(f)['first_frame_ms']
+        print(f"baseline: {baseline:.0f} ms ({(wall / baseline - 1) * 100:+.0f}%)")
+        if wall > baseline * (1 + REGRESSION_TOLERANCE):
+            failures.append(f"regressed more than {REGRESSION_TOLERANCE:.0%} over the baseline")
+    except FileNotFoundError:
+        pass
+
+    if args.save:
+        os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+        with open(BASELINE_FILE, 'w') as f:
+            json.dump({'first_frame_ms': wall}, f)
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()